@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import sys
+
+# Añadir directorio actual al path para importar módulos
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config_loader import ConfigLoader
+from src.offline.batch_processor import run_batch
+from src.offline.result_writers import OUTPUT_FORMATS
+
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Procesa vídeos o directorios de imágenes sin ventana y guarda detecciones y distancias"
+    )
+    parser.add_argument("inputs", nargs="+", help="Vídeos, directorios de imágenes o imágenes")
+    parser.add_argument("-o", "--output", default="output", help="Directorio de salida")
+    parser.add_argument("-c", "--config", default="config/config.yml", help="Archivo de configuración")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Número de procesos")
+    parser.add_argument("--chunk-frames", type=int, default=None,
+                        help="Frames por fragmento (0 = un fragmento por archivo)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default=None, help="Formato de salida")
+    return parser.parse_args()
+
+
+def main():
+    """Procesamiento por lotes sin ventana"""
+    args = parse_args()
+
+    try:
+        config = ConfigLoader.load_config(args.config)
+    except Exception as e:
+        print(f"[ERROR] Error cargando configuración: {e}")
+        return 1
+
+    summary = run_batch(
+        config,
+        args.inputs,
+        args.output,
+        workers=args.workers,
+        chunk_frames=args.chunk_frames,
+        output_format=args.format
+    )
+    print(f"[INFO] {summary['frames']} frames en {summary['seconds']:.1f}s "
+          f"({summary['fps']:.1f} FPS con {summary['workers']} procesos)")
+
+    with open(os.path.join(args.output, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure
+from benchmarks.bench_history import synthetic_detections
+from src.analytics.rolling_stats import RollingAnalytics
+
+FRAME_SHAPE = (720, 1280, 3)
+
+
+def run(windows, per_frame=10, fps=30, warm_seconds=None):
+    """
+    Mide el coste por frame de la analítica deslizante con unas ventanas dadas
+
+    Args:
+        windows: Lista de ventanas en segundos
+        per_frame: Detecciones por frame
+        fps: Frames por segundo simulados
+        warm_seconds: Segundos simulados antes de medir (None = la ventana más larga)
+
+    Returns:
+        results: Diccionario con el coste de update y de snapshot
+    """
+    rng = np.random.default_rng(0)
+    samples = [synthetic_detections(rng, per_frame) for _ in range(64)]
+    analytics = RollingAnalytics({"analytics": {"windows_s": windows}})
+    frames = int((warm_seconds or max(windows)) * fps)
+    for frame in range(frames):
+        analytics.update(samples[frame % len(samples)], frame / fps, FRAME_SHAPE)
+
+    counter = [frames]
+
+    def update_one():
+        frame = counter[0]
+        analytics.update(samples[frame % len(samples)], frame / fps, FRAME_SHAPE)
+        counter[0] += 1
+
+    # Las medidas cruzan fronteras de bucket (cierre y expiración incluidos)
+    return {
+        "update": measure(update_one, iterations=3000, warmup=100),
+        "snapshot": measure(lambda: analytics.snapshot(timestamp=counter[0] / fps, include_heatmap=True),
+                            iterations=200, warmup=10)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la analítica deslizante")
+    parser.add_argument("--per-frame", type=int, default=10, help="Detecciones por frame")
+    args = parser.parse_args()
+    for windows in ([10], [10, 60, 300], [10, 60, 300, 3600]):
+        results = run(windows, per_frame=args.per_frame)
+        label = ",".join(f"{window}s" for window in windows)
+        print(f"ventanas {label:18s} update p50={results['update']['p50_ms']:.3f}ms "
+              f"p95={results['update']['p95_ms']:.3f}ms  snapshot p50={results['snapshot']['p50_ms']:.3f}ms")
@@ -0,0 +1,99 @@
+import argparse
+import copy
+import os
+import sys
+import cv2
+import yaml
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure
+from benchmarks.stages import synthetic_frame
+from src.detector.backends.factory import create_backend
+
+# (backend, int8)
+VARIANTS = (
+    ("ultralytics", False),
+    ("onnxruntime", False),
+    ("onnxruntime", True),
+    ("openvino", False),
+    ("openvino", True)
+)
+
+
+def variant_config(config, backend, int8, calibration_source):
+    """Copia de la configuración con el backend y la precisión indicados"""
+    config = copy.deepcopy(config)
+    config["detector"]["backend"] = backend
+    export_config = config["detector"].setdefault("export", {})
+    export_config["int8"] = int8
+    if calibration_source:
+        export_config["calibration_source"] = calibration_source
+    return config
+
+
+def run(config, frame, iterations=100, calibration_source=None, batch=4):
+    """
+    Mide la latencia de predict() de cada backend sobre el mismo frame, y por frame con un
+    lote de varias cámaras (una llamada al modelo si el backend lo admite)
+
+    Returns:
+        results: Lista de diccionarios con backend, precisión, métricas y aceleración frente a .pt
+    """
+    results = []
+    reference = None
+    for backend, int8 in VARIANTS:
+        precision = "int8" if int8 else "fp32"
+        if int8 and not (calibration_source or config["detector"].get("export", {}).get("calibration_source")):
+            print(f"[WARNING] {backend} {precision}: sin frames de calibración, se omite", file=sys.stderr)
+            continue
+        try:
+            model = create_backend(variant_config(config, backend, int8, calibration_source))
+        except ImportError as e:
+            print(f"[WARNING] {backend} {precision}: no disponible ({e})", file=sys.stderr)
+            continue
+
+        metrics = measure(lambda: model.predict([frame]), iterations=iterations, warmup=10)
+        if backend == "ultralytics":
+            reference = metrics["p50_ms"]
+        metrics["speedup"] = reference / metrics["p50_ms"] if reference else None
+        if batch > 1:
+            frames = [frame] * batch
+            batched = measure(lambda: model.predict(frames), iterations=max(1, iterations // batch), warmup=2)
+            metrics["batch_p50_ms_per_frame"] = batched["p50_ms"] / batch
+        metrics["max_batch"] = getattr(model, "max_batch", None)
+        results.append({"backend": backend, "precision": precision, **metrics})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los backends de inferencia en CPU")
+    parser.add_argument("-c", "--config", default="config/config.yml", help="Archivo de configuración")
+    parser.add_argument("-f", "--frame", default=None, help="Imagen de prueba (por defecto, sintética)")
+    parser.add_argument("-q", "--calibration", default=None,
+                        help="Vídeo o carpeta de frames grabados para la cuantización INT8")
+    parser.add_argument("-n", "--iterations", type=int, default=100, help="Muestras por backend")
+    parser.add_argument("-b", "--batch", type=int, default=4, help="Frames por lote (1 = sin medir lotes)")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    if args.frame:
+        frame = cv2.imread(args.frame)
+    else:
+        frame = synthetic_frame(config["camera"]["width"], config["camera"]["height"])
+
+    for result in run(config, frame, args.iterations, args.calibration, args.batch):
+        speedup = f"x{result['speedup']:.2f}" if result["speedup"] else "-"
+        batched = ""
+        if "batch_p50_ms_per_frame" in result:
+            limit = "dinámico" if result["max_batch"] is None else result["max_batch"]
+            batched = (f" lote{args.batch}={result['batch_p50_ms_per_frame']:8.2f}ms/frame"
+                       f" (lote máx. {limit})")
+        print(f"{result['backend']:12s} {result['precision']:5s} p50={result['p50_ms']:8.2f}ms "
+              f"p95={result['p95_ms']:8.2f}ms fps={result['fps']:7.1f} aceleración={speedup}{batched}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import contextlib
+import copy
+import io
+import os
+import sys
+import yaml
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure
+from benchmarks.stages import DistanceScalarStage, DistanceVectorizedStage
+
+
+def sweep(config, counts, width=1280, height=720, iterations=300):
+    """
+    Coste de calculate_distances por número de detecciones con cada camino forzado
+
+    Args:
+        config: Configuración completa
+        counts: Números de detecciones por frame a medir
+        width, height: Resolución del frame sintético
+        iterations: Muestras por caso
+
+    Returns:
+        rows: Lista de (detecciones, p50 por detección (API antigua), p50 escalar, p50 NumPy) en ms
+    """
+    rows = []
+    for count in counts:
+        timings = []
+        for stage_class, threshold in ((DistanceScalarStage, None), (DistanceVectorizedStage, count + 1),
+                                       (DistanceVectorizedStage, 0)):
+            stage_config = copy.deepcopy(config)
+            if threshold is not None:
+                stage_config["distance"]["vectorize_min_detections"] = threshold
+            with contextlib.redirect_stdout(io.StringIO()):
+                stage = stage_class(stage_config, width, height, count)
+            timings.append(measure(stage, iterations=iterations)["p50_ms"])
+        rows.append((count, *timings))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cruce entre el camino escalar y el vectorizado de distancias")
+    parser.add_argument("-c", "--config", default="config/config.yml", help="Archivo de configuración")
+    parser.add_argument("-d", "--detections", default="1,2,4,8,12,16,24,32,48,64,100",
+                        help="Números de detecciones por frame separados por comas")
+    args = parser.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    rows = sweep(config, [int(count) for count in args.detections.split(",")])
+    print(f"{'det':>5s} {'calculate_distance':>19s} {'escalar':>9s} {'numpy':>9s}")
+    for count, legacy, scalar, vectorized in rows:
+        print(f"{count:5d} {legacy:17.3f}ms {scalar:7.3f}ms {vectorized:7.3f}ms")
+    # Primer número de detecciones a partir del cual NumPy gana siempre
+    crossover = next((count for i, (count, _, scalar, vectorized) in enumerate(rows)
+                      if all(v < s for _, _, s, v in rows[i:])), None)
+    current = config["distance"].get("vectorize_min_detections", 32)
+    print(f"[INFO] Cruce escalar/NumPy: {crossover if crossover is not None else 'no alcanzado'} detecciones "
+          f"(distance.vectorize_min_detections = {current})")
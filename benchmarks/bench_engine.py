@@ -0,0 +1,49 @@
+import copy
+import functools
+import os
+import sys
+import yaml
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_model import StubYOLOModel
+from src.engine.supervisor import MultiProcessEngine
+
+
+def run(config, workers, cost_ms=20.0, duration=5.0, width=1280, height=720):
+    """
+    FPS agregado del motor con fuentes sintéticas (una cámara por trabajador) y un modelo
+    falso que consume cost_ms de CPU por frame
+
+    Returns:
+        stats: Estadísticas de MultiProcessEngine
+    """
+    config = copy.deepcopy(config)
+    config["camera"].update(width=width, height=height)
+    config["engine"] = {
+        **config.get("engine", {}),
+        "workers": workers,
+        # Fuentes sin ritmo fijo: el límite lo ponen los trabajadores
+        "cameras": [{"source": "synthetic", "fps": 0} for _ in range(workers)],
+        "cpu_affinity": "auto",
+        "threads_per_worker": 1
+    }
+    engine = MultiProcessEngine(config, model_factory=functools.partial(StubYOLOModel, 10, cost_ms=cost_ms))
+    return engine.run(duration=duration)
+
+
+if __name__ == "__main__":
+    with open("config/config.yml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    cost_ms = 20.0
+    baseline = None
+    for workers in counts:
+        stats = run(config, workers, cost_ms=cost_ms)
+        baseline = baseline or stats["fps"]
+        # Techo físico: cada frame consume cost_ms de CPU real y hay min(workers, cores) núcleos
+        ceiling = min(workers, cores) * 1000.0 / cost_ms
+        print(f"{workers:2d} trabajadores: {stats['fps']:7.1f} FPS (x{stats['fps'] / baseline:.2f}, "
+              f"techo {ceiling:.0f}) latencia={stats['latency_ms']:.1f}ms núcleos={stats['cpus']}")
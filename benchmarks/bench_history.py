@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure
+from benchmarks.stub_model import STUB_NAMES
+from src.detector.detections import Detections
+from src.history.history_store import HistoryStore
+
+
+def synthetic_detections(rng, count):
+    """Detecciones aleatorias con track_id y distancia"""
+    class_ids = np.array(list(STUB_NAMES), dtype=np.int32)
+    detections = Detections(
+        rng.choice(class_ids, count),
+        rng.uniform(0.3, 1.0, count).astype(np.float32),
+        rng.integers(0, 1200, count).astype(np.int32),
+        rng.integers(0, 650, count).astype(np.int32),
+        rng.integers(20, 300, count).astype(np.int32),
+        rng.integers(20, 500, count).astype(np.int32),
+        STUB_NAMES,
+        track_id=rng.integers(0, 1000, count).astype(np.int64)
+    )
+    detections.distance = rng.uniform(30, 500, count)
+    return detections
+
+
+def run(rows=5_000_000, per_frame=10, fps=30, segment_rows=1_000_000):
+    """
+    Llena un historial con rows filas (per_frame detecciones por frame a fps) y mide
+    el coste de añadir un frame y el de consultas por rango de tiempo
+
+    Returns:
+        results: Diccionario con las medidas
+    """
+    rng = np.random.default_rng(0)
+    samples = [synthetic_detections(rng, per_frame) for _ in range(64)]
+    with tempfile.TemporaryDirectory() as root:
+        store = HistoryStore(root, segment_rows=segment_rows)
+        start_time = time.time()
+        frames = rows // per_frame
+        fill_start = time.perf_counter()
+        for frame in range(frames):
+            store.append(start_time + frame / fps, frame, samples[frame % len(samples)])
+        fill_seconds = time.perf_counter() - fill_start
+        end_time = start_time + frames / fps
+
+        counter = [frames]
+
+        def append_one():
+            store.append(start_time + counter[0] / fps, counter[0], samples[counter[0] % len(samples)])
+            counter[0] += 1
+
+        # Ventana de 10 minutos en mitad del historial y consulta sobre todo el historial
+        middle = (start_time + end_time) / 2
+        window = (middle - 300, middle + 300)
+        results = {
+            "rows": store.get_stats()["rows"],
+            "segments": store.get_stats()["segments"],
+            "fill_rows_per_s": rows / fill_seconds,
+            "append": measure(append_one, iterations=2000, warmup=50),
+            "query_10min_persons_150cm": measure(
+                lambda: store.query(*window, classes=["person"], max_distance=150),
+                iterations=50, warmup=5),
+            "query_all_persons_150cm": measure(
+                lambda: store.query(classes=["person"], max_distance=150),
+                iterations=10, warmup=2),
+            "query_track": measure(
+                lambda: store.query(*window, track_id=7, columns=["timestamp", "distance"]),
+                iterations=50, warmup=5)
+        }
+        store.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del historial de detecciones")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Filas almacenadas antes de medir")
+    args = parser.parse_args()
+    results = run(rows=args.rows)
+    print(f"{results['rows']} filas en {results['segments']} segmentos "
+          f"(llenado: {results['fill_rows_per_s'] / 1e6:.1f}M filas/s)")
+    for name in ("append", "query_10min_persons_150cm", "query_all_persons_150cm", "query_track"):
+        result = results[name]
+        print(f"{name:28s} p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms")
@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualization.visualizer import DetectionVisualizer
+
+CONFIG = {
+    "distance": {"max_distance": 500},
+    "display": {
+        "show_fps": True,
+        "show_distance": True,
+        "show_labels": True,
+        "line_thickness": 2,
+        "font_scale": 0.7,
+        "distance_colormap": "GREEN_TO_RED",
+        "distance_unit": "cm",
+        "text_bg_opacity": 0.7,
+        "label_cache_mb": 16,
+        "distance_label_step": 0
+    }
+}
+
+# Misma configuración sin caché de etiquetas
+CONFIG_NO_CACHE = {"distance": CONFIG["distance"], "display": dict(CONFIG["display"], label_cache_mb=0)}
+
+
+class LegacyDetectionVisualizer(DetectionVisualizer):
+    """Renderizado anterior (copias y mezclas de frame completo) como referencia"""
+
+    def visualize_detections(self, frame, detections, object_counts, in_place=None):
+        self._update_fps()
+        frame_viz = frame.copy()
+        for det in detections:
+            x, y, w, h = det["box"]
+            distance = det["distance"]
+            if distance is not None and self.display_config["show_distance"]:
+                color = self._get_distance_color(distance)
+                label = f"{det['class_name']}: {distance:.1f}cm"
+            else:
+                color = self._get_class_color(det["class_name"])
+                label = f"{det['class_name']}: {det['confidence']:.2f}"
+            cv2.rectangle(frame_viz, (x, y), (x + w, y + h), color, self.display_config["line_thickness"])
+            self._legacy_text(frame_viz, label, (x, y - 10), color)
+        self._legacy_info(frame_viz, object_counts)
+        return frame_viz
+
+    def _legacy_text(self, frame, text, position, color):
+        font_scale = self.display_config["font_scale"]
+        thickness = self.display_config["line_thickness"]
+        opacity = self.display_config.get("text_bg_opacity", 0.7)
+        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        x, y = position
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (x, y - text_height - baseline), (x + text_width + 10, y + baseline), (0, 0, 0), -1)
+        cv2.addWeighted(overlay, opacity, frame, 1 - opacity, 0, frame)
+        cv2.putText(frame, text, (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness, cv2.LINE_AA)
+
+    def _legacy_info(self, frame, object_counts):
+        font_scale = self.display_config["font_scale"]
+        thickness = self.display_config["line_thickness"]
+        summary = ", ".join([f"{count} {obj}" for obj, count in object_counts.items()])
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (0, 0), (frame.shape[1], 40), (0, 0, 0), -1)
+        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        cv2.putText(frame, f"Objetos: {summary}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, (0, 0, 255), thickness, cv2.LINE_AA)
+        fps_text = f"FPS: {self.fps}"
+        text_size = cv2.getTextSize(fps_text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0]
+        overlay = frame.copy()
+        cv2.rectangle(overlay, (5, frame.shape[0] - 10 - text_size[1] - 10),
+                      (15 + text_size[0], frame.shape[0] - 5), (0, 0, 0), -1)
+        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        cv2.putText(frame, fps_text, (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, (0, 255, 255), thickness, cv2.LINE_AA)
+
+
+def make_detections(count, width, height, rng):
+    """Detecciones sintéticas repartidas por el frame"""
+    classes = ["person", "bottle", "cell phone", "chair"]
+    detections = []
+    for i in range(count):
+        w = int(rng.integers(30, 150))
+        h = int(rng.integers(60, 300))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(50, height - h))
+        class_name = classes[i % len(classes)]
+        detections.append({
+            "class_name": class_name,
+            "confidence": float(rng.uniform(0.5, 1.0)),
+            "box": (x, y, w, h),
+            "object_id": f"{class_name}_{i}",
+            "distance": float(rng.uniform(50, 450)) if i % 3 else None
+        })
+    counts = {}
+    for det in detections:
+        counts[det["class_name"]] = counts.get(det["class_name"], 0) + 1
+    return detections, counts
+
+
+def jitter_frames(detections, iterations, rng, sigma=3.0):
+    """
+    Una lista de detecciones por frame con las distancias variando como en una escena real
+
+    Args:
+        detections: Detecciones base
+        iterations: Número de frames
+        rng: Generador aleatorio
+        sigma: Desviación (cm) del paseo aleatorio de cada distancia
+
+    Returns:
+        frames: Lista de listas de detecciones
+    """
+    frames = []
+    current = [dict(det) for det in detections]
+    for _ in range(iterations):
+        current = [
+            dict(det, distance=float(np.clip(det["distance"] + rng.normal(0, sigma), 30, 480)))
+            if det["distance"] is not None else det
+            for det in current
+        ]
+        frames.append(current)
+    return frames
+
+
+def time_renderer(visualizer, frame, frames, counts, in_place):
+    """Tiempos por frame en ms (un conjunto de detecciones distinto en cada frame)"""
+    times = []
+    for detections in frames:
+        target = frame.copy() if in_place else frame
+        start = time.perf_counter()
+        visualizer.visualize_detections(target, detections, counts, in_place=in_place)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+def run(width=1280, height=720, count=30, iterations=100, seed=0, label_steps=(0, 5)):
+    """
+    Compara el renderizado actual (con y sin caché de etiquetas) con el anterior. Las
+    distancias cambian en cada frame, así que la caché solo acierta si se cuantizan.
+
+    Returns:
+        result: Diccionario con la mediana y p95 de cada variante (y tasa de acierto de la caché)
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    detections, counts = make_detections(count, width, height, rng)
+    frames = jitter_frames(detections, iterations, rng)
+
+    variants = {
+        "legacy": time_renderer(LegacyDetectionVisualizer(CONFIG), frame, frames, counts, False),
+        "roi_copy": time_renderer(DetectionVisualizer(CONFIG_NO_CACHE), frame, frames, counts, False)
+    }
+    cached = {}
+    for step in label_steps:
+        no_cache = {"distance": CONFIG["distance"], "display": dict(CONFIG_NO_CACHE["display"], distance_label_step=step)}
+        with_cache = {"distance": CONFIG["distance"], "display": dict(CONFIG["display"], distance_label_step=step)}
+        variants[f"roi_in_place_step{step}"] = time_renderer(DetectionVisualizer(no_cache), frame, frames, counts, True)
+        cached[step] = DetectionVisualizer(with_cache)
+        variants[f"sprite_in_place_step{step}"] = time_renderer(cached[step], frame, frames, counts, True)
+    result = {
+        name: {"p50_ms": float(np.median(t)), "p95_ms": float(np.percentile(t, 95))}
+        for name, t in variants.items()
+    }
+    for step, visualizer in cached.items():
+        stats = visualizer.get_stats()["label_cache"]
+        result[f"sprite_in_place_step{step}"].update(hit_rate=stats["hit_rate"], cache_mb=stats["mb"])
+    return result
+
+
+if __name__ == "__main__":
+    for count in (5, 30, 100):
+        result = run(count=count)
+        print(f"1280x720, {count:3d} detecciones:")
+        for name, r in result.items():
+            extra = f" acierto_cache={r['hit_rate']:.1%} ({r['cache_mb']:.1f}MB)" if "hit_rate" in r else ""
+            print(f"    {name:22s} p50={r['p50_ms']:.2f}ms p95={r['p95_ms']:.2f}ms{extra}")
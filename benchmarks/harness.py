@@ -0,0 +1,131 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+
+
+def measure(func, iterations=200, warmup=20, memory_iterations=5):
+    """
+    Mide la latencia y el pico de memoria de una función sin argumentos
+
+    Args:
+        func: Función a medir (una llamada = una muestra)
+        iterations: Número de muestras cronometradas
+        warmup: Llamadas previas descartadas
+        memory_iterations: Llamadas bajo tracemalloc para el pico de memoria
+
+    Returns:
+        result: Diccionario con p50/p95/p99/media en ms, FPS y pico de memoria en KiB
+    """
+    for _ in range(warmup):
+        func()
+
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    times = np.empty(iterations)
+    try:
+        for i in range(iterations):
+            start = time.perf_counter()
+            func()
+            times[i] = time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    # El pico de memoria se mide aparte porque tracemalloc ralentiza las llamadas
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times_ms = times * 1000
+    mean = float(times_ms.mean())
+    return {
+        "iterations": iterations,
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p95_ms": float(np.percentile(times_ms, 95)),
+        "p99_ms": float(np.percentile(times_ms, 99)),
+        "mean_ms": mean,
+        "fps": 1000.0 / mean if mean > 0 else 0.0,
+        "peak_memory_kib": peak / 1024
+    }
+
+
+def environment():
+    """
+    Describe el entorno de ejecución para que los resultados sean comparables
+
+    Returns:
+        env: Diccionario con versiones y número de núcleos
+    """
+    import cv2
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "cpu_count": os.cpu_count()
+    }
+
+
+def result_key(result):
+    """Clave única de un resultado: etapa y parámetros"""
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['stage']}[{params}]"
+
+
+def save_report(report, path):
+    """
+    Guarda el informe en JSON
+
+    Args:
+        report: Diccionario con environment y results
+        path: Ruta de salida
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+
+def compare_to_baseline(report, baseline_path, tolerance=0.15, metric="p50_ms"):
+    """
+    Compara los resultados con un informe guardado
+
+    Args:
+        report: Informe actual
+        baseline_path: Ruta del informe de referencia
+        tolerance: Empeoramiento relativo permitido (0.15 = 15%)
+        metric: Métrica a comparar
+
+    Returns:
+        comparison: Lista de diccionarios con clave, valores, ratio y si es regresión
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {result_key(result): result for result in baseline["results"]}
+
+    comparison = []
+    for result in report["results"]:
+        key = result_key(result)
+        if key not in previous:
+            continue
+        old = previous[key][metric]
+        new = result[metric]
+        ratio = new / old if old > 0 else float("inf")
+        comparison.append({
+            "key": key,
+            "baseline": old,
+            "current": new,
+            "ratio": ratio,
+            "regression": ratio > 1 + tolerance
+        })
+    return comparison
@@ -0,0 +1,114 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import yaml
+
+# Añadir raíz del proyecto al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure, environment, save_report, compare_to_baseline
+from benchmarks.stages import STAGES
+
+
+def parse_resolutions(text):
+    """Convierte "640x360,1280x720" en [(640, 360), (1280, 720)]"""
+    resolutions = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de cada etapa del pipeline")
+    parser.add_argument("-c", "--config", default="config/config.yml", help="Archivo de configuración")
+    parser.add_argument("-s", "--stages", default=",".join(STAGES), help="Etapas separadas por comas")
+    parser.add_argument("-r", "--resolutions", default="640x360,1280x720,1920x1080",
+                        help="Resoluciones separadas por comas")
+    parser.add_argument("-d", "--detections", default="1,10,50,100",
+                        help="Número de detecciones por frame separadas por comas")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Muestras por caso")
+    parser.add_argument("-o", "--output", default=None, help="Guardar el informe JSON en esta ruta")
+    parser.add_argument("-b", "--baseline", default=None, help="Informe JSON de referencia para comparar")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.15,
+                        help="Empeoramiento relativo permitido frente a la referencia")
+    return parser.parse_args()
+
+
+def run(config, stages, resolutions, detection_counts, iterations):
+    """
+    Ejecuta todas las combinaciones etapa x resolución x detecciones
+
+    Returns:
+        report: Diccionario con environment y results
+    """
+    results = []
+    for stage_name in stages:
+        stage_class = STAGES[stage_name]
+        counts = detection_counts if stage_class.uses_detections else [0]
+        for width, height in resolutions:
+            for count in counts:
+                # Silenciar los mensajes [INFO] de los componentes
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stage = stage_class(config, width, height, count)
+                try:
+                    metrics = measure(stage, iterations=iterations)
+                finally:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        stage.close()
+                params = {"resolution": f"{width}x{height}"}
+                if stage_class.uses_detections:
+                    params["detections"] = count
+                results.append({"stage": stage_name, "params": params, **metrics})
+                print(f"{stage_name:20s} {params['resolution']:>10s} det={count:<4d} "
+                      f"p50={metrics['p50_ms']:8.3f}ms p95={metrics['p95_ms']:8.3f}ms "
+                      f"p99={metrics['p99_ms']:8.3f}ms fps={metrics['fps']:9.1f} "
+                      f"mem={metrics['peak_memory_kib']:9.1f}KiB", file=sys.stderr)
+    return {"environment": environment(), "results": results}
+
+
+def main():
+    """Ejecuta los benchmarks y opcionalmente compara con una referencia"""
+    args = parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        print(f"[ERROR] Etapas desconocidas: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    report = run(
+        config,
+        stages,
+        parse_resolutions(args.resolutions),
+        [int(count) for count in args.detections.split(",")],
+        args.iterations
+    )
+
+    if args.output:
+        save_report(report, args.output)
+        print(f"[INFO] Informe guardado en {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if args.baseline:
+        comparison = compare_to_baseline(report, args.baseline, args.tolerance)
+        regressions = [item for item in comparison if item["regression"]]
+        for item in comparison:
+            flag = "REGRESIÓN" if item["regression"] else "ok"
+            print(f"{item['key']:60s} {item['baseline']:8.3f} -> {item['current']:8.3f}ms "
+                  f"(x{item['ratio']:.2f}) {flag}", file=sys.stderr)
+        if regressions:
+            print(f"[ERROR] {len(regressions)} regresiones frente a {args.baseline}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
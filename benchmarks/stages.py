@@ -0,0 +1,182 @@
+import copy
+import os
+import tempfile
+import cv2
+import numpy as np
+from benchmarks.stub_model import StubYOLOModel
+from camera.camera_utils import CameraHandler
+from src.detector.yolo_detector import YOLODetector
+from src.detector.distance_calc import DistanceCalculator
+from visualization.visualizer import DetectionVisualizer
+
+
+def synthetic_frame(width, height, seed=0):
+    """
+    Frame sintético reproducible con textura y algunas formas
+
+    Args:
+        width, height: Resolución
+        seed: Semilla
+
+    Returns:
+        frame: Imagen BGR uint8
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+    for _ in range(20):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        color = tuple(int(c) for c in rng.integers(64, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + width // 10, y + height // 6), color, -1)
+    return frame
+
+
+class CaptureDecodeStage:
+    """Decodificación de vídeo a través de CameraHandler (fuente de archivo)"""
+
+    name = "capture_decode"
+    uses_detections = False
+
+    def __init__(self, config, width, height, detections=0, frames=60):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "synthetic.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+        for i in range(frames):
+            writer.write(synthetic_frame(width, height, seed=i))
+        writer.release()
+
+        camera_config = copy.deepcopy(config)
+        camera_config["camera"]["source"] = path
+        self.camera = CameraHandler(camera_config)
+        self.camera.initialize()
+
+    def __call__(self):
+        frame, success = self.camera.read_frame()
+        if not success:
+            # Volver al principio del vídeo
+            self.camera.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            frame, success = self.camera.read_frame()
+        return frame
+
+    def close(self):
+        self.camera.release()
+        self.directory.cleanup()
+
+
+class DetectStage:
+    """Pre/post-procesado de YOLODetector con un modelo falso (sin coste de inferencia)"""
+
+    name = "detect_columnar"
+    uses_detections = True
+    tracking = False
+
+    def __init__(self, config, width, height, detections):
+        detector_config = copy.deepcopy(config)
+        detector_config["detector"]["tracking"] = self.tracking
+        self.detector = YOLODetector(detector_config, model=StubYOLOModel(detections))
+        self.frame = synthetic_frame(width, height)
+
+    def __call__(self):
+        return self.detector.detect_columnar(self.frame)
+
+    def close(self):
+        pass
+
+
+class DetectTrackedStage(DetectStage):
+    """Detección con tracker IoU activo"""
+
+    name = "detect_tracked"
+    tracking = True
+
+
+class DetectCompatStage(DetectStage):
+    """Detección con la vista de compatibilidad (lista de diccionarios)"""
+
+    name = "detect_compat"
+
+    def __call__(self):
+        return self.detector.detect(self.frame)
+
+
+class DistanceScalarStage(DetectStage):
+    """calculate_distance llamado una vez por detección (como el bucle original de main.py)"""
+
+    name = "distance_scalar"
+
+    def __init__(self, config, width, height, detections):
+        super().__init__(config, width, height, detections)
+        self.calculator = DistanceCalculator(config)
+        self.detections, _ = self.detector.detect(self.frame)
+        self.frame_height = height
+
+    def __call__(self):
+        for det in self.detections:
+            x, y, w, h = det["box"]
+            det["distance"] = self.calculator.calculate_distance(
+                det["class_name"], w, h, x, y, self.frame_height, det["object_id"]
+            )
+
+
+class DistanceVectorizedStage(DetectStage):
+    """calculate_distances sobre todas las detecciones del frame"""
+
+    name = "distance_vectorized"
+
+    def __init__(self, config, width, height, detections):
+        super().__init__(config, width, height, detections)
+        self.calculator = DistanceCalculator(config)
+        self.columnar = self.detector.detect_columnar(self.frame)
+        self.frame_height = height
+
+    def __call__(self):
+        return self.calculator.calculate_distances(self.columnar, self.frame_height)
+
+
+class SmoothingStage(DetectStage):
+    """_apply_smoothing para cada objeto del frame"""
+
+    name = "smoothing"
+
+    def __init__(self, config, width, height, detections):
+        super().__init__(config, width, height, detections)
+        self.calculator = DistanceCalculator(config)
+        self.object_ids = [f"obj_{i}" for i in range(detections)]
+        self.rng = np.random.default_rng(0)
+
+    def __call__(self):
+        values = self.rng.normal(200.0, 20.0, len(self.object_ids)).tolist()
+        for object_id, value in zip(self.object_ids, values):
+            self.calculator._apply_smoothing(value, object_id)
+
+
+class RenderStage(DetectStage):
+    """DetectionVisualizer.visualize_detections (con copia del frame)"""
+
+    name = "render"
+
+    def __init__(self, config, width, height, detections):
+        super().__init__(config, width, height, detections)
+        self.visualizer = DetectionVisualizer(config)
+        calculator = DistanceCalculator(config)
+        columnar = self.detector.detect_columnar(self.frame)
+        calculator.calculate_distances(columnar, height)
+        self.detections = columnar.to_list()
+        self.counts = columnar.counts()
+
+    def __call__(self):
+        return self.visualizer.visualize_detections(self.frame, self.detections, self.counts, in_place=False)
+
+
+STAGES = {
+    stage.name: stage
+    for stage in (
+        CaptureDecodeStage,
+        DetectStage,
+        DetectTrackedStage,
+        DetectCompatStage,
+        DistanceScalarStage,
+        DistanceVectorizedStage,
+        SmoothingStage,
+        RenderStage
+    )
+}
@@ -0,0 +1,83 @@
+import time
+import numpy as np
+
+# Subconjunto de clases COCO con tamaños conocidos en config.yml
+STUB_NAMES = {0: "person", 39: "bottle", 56: "chair", 67: "cell phone"}
+
+
+class _StubTensor:
+    """Imita la interfaz .cpu().numpy() de un tensor de PyTorch"""
+
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class _StubBoxes:
+    def __init__(self, data):
+        self.data = _StubTensor(data)
+
+
+class _StubResult:
+    def __init__(self, data):
+        self.boxes = _StubBoxes(data)
+
+
+class StubYOLOModel:
+    """Modelo falso con la interfaz de Ultralytics que devuelve un número fijo de detecciones"""
+
+    def __init__(self, detections_per_frame, seed=0, cost_ms=0.0):
+        """
+        Args:
+            detections_per_frame: Número de detecciones devueltas por frame
+            seed: Semilla para que las cajas sean reproducibles
+            cost_ms: Tiempo de CPU consumido por frame para simular la inferencia
+        """
+        self.names = STUB_NAMES
+        self.detections_per_frame = detections_per_frame
+        self.seed = seed
+        self.cost_ms = cost_ms
+        self.calls = 0
+        self._cache = {}
+
+    def _boxes(self, height, width):
+        """Cajas [x1, y1, x2, y2, conf, cls] deterministas para una resolución"""
+        key = (height, width)
+        if key not in self._cache:
+            rng = np.random.default_rng(self.seed)
+            n = self.detections_per_frame
+            w = rng.uniform(0.03, 0.15, n) * width
+            h = rng.uniform(0.08, 0.45, n) * height
+            x = rng.uniform(0, 1, n) * (width - w)
+            y = rng.uniform(0, 1, n) * (height - h)
+            classes = np.array(list(self.names))[np.arange(n) % len(self.names)]
+            self._cache[key] = np.column_stack(
+                (x, y, x + w, y + h, rng.uniform(0.5, 1.0, n), classes)
+            ).astype(np.float32)
+        return self._cache[key]
+
+    def __call__(self, source, **kwargs):
+        """
+        Simula una llamada al modelo (con cost_ms de CPU por frame)
+
+        Args:
+            source: Frame o lista de frames
+
+        Returns:
+            results: Lista de resultados, uno por frame
+        """
+        frames = source if isinstance(source, list) else [source]
+        self.calls += 1
+        if self.cost_ms:
+            # Espera activa sobre tiempo de CPU del hilo (no de reloj): con varios procesos en
+            # el mismo núcleo cada uno consume de verdad cost_ms, como la inferencia en CPU
+            end = time.thread_time() + self.cost_ms * len(frames) / 1000.0
+            while time.thread_time() < end:
+                pass
+        # Copia para imitar la transferencia desde el dispositivo
+        return [_StubResult(self._boxes(*frame.shape[:2]).copy()) for frame in frames]
@@ -1,5 +1,8 @@
 import cv2
+import sys
 import time
+import threading
+import numpy as np
 from collections import deque
 
 class CameraHandler:
@@ -19,10 +22,29 @@ class CameraHandler:
         self.fps = self.config["fps"]
         self.buffer_size = self.config.get("buffer_size", 1)
         
+        # Fuente opcional de vídeo (archivo) en lugar de cámara física
+        self.source = self.config.get("source")
+        self.is_file_source = False
+        
+        # Captura en hilo dedicado (siempre sirve el frame más reciente)
+        self.capture_thread_enabled = self.config.get("capture_thread", False)
+        
         # Inicializar cámara
         self.cap = None
         self.frame_buffer = deque(maxlen=self.buffer_size)
         
+        # Estado de la captura en segundo plano
+        self.ring = None
+        self.ring_seq = None
+        self.ring_timestamps = None
+        self.latest_slot = -1
+        self.latest_seq = 0
+        self.last_served_seq = 0
+        self.dropped_frames = 0
+        self.frame_condition = threading.Condition()
+        self.grab_thread = None
+        self.grab_running = False
+        
     def initialize(self):
         """
         Inicializa la cámara con varios métodos
@@ -30,19 +52,31 @@ class CameraHandler:
         Returns:
             bool: True si la cámara se inicializó correctamente
         """
-        # Intento 1: DirectShow (Windows)
-        try:
-            self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
+        # Fuente de archivo de vídeo (modo headless / pruebas)
+        if self.source:
+            self.cap = cv2.VideoCapture(self.source)
             if self.cap.isOpened():
-                print(f"[INFO] Cámara abierta con DirectShow en índice {self.camera_index}")
-                self._configure_camera()
+                self.is_file_source = True
+                print(f"[INFO] Vídeo abierto como fuente: {self.source}")
                 return True
-            else:
-                self.cap = None
-                print("[WARNING] No se pudo abrir la cámara con DirectShow")
-        except Exception as e:
-            print(f"[WARNING] Error con DirectShow: {e}")
+            print(f"[ERROR] No se pudo abrir el vídeo {self.source}")
             self.cap = None
+            return False
+        
+        # Intento 1: DirectShow (solo existe en Windows; en otros sistemas solo retrasa el arranque)
+        if sys.platform == "win32":
+            try:
+                self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
+                if self.cap.isOpened():
+                    print(f"[INFO] Cámara abierta con DirectShow en índice {self.camera_index}")
+                    self._configure_camera()
+                    return self._start_capture_thread()
+                else:
+                    self.cap = None
+                    print("[WARNING] No se pudo abrir la cámara con DirectShow")
+            except Exception as e:
+                print(f"[WARNING] Error con DirectShow: {e}")
+                self.cap = None
         
         # Intento 2: Apertura estándar
         try:
@@ -50,7 +84,7 @@ class CameraHandler:
             if self.cap.isOpened():
                 print(f"[INFO] Cámara abierta en modo estándar en índice {self.camera_index}")
                 self._configure_camera()
-                return True
+                return self._start_capture_thread()
             else:
                 print(f"[ERROR] No se pudo abrir la cámara en índice {self.camera_index}")
                 # Probar con cámara 0 (por defecto)
@@ -58,7 +92,7 @@ class CameraHandler:
                 if self.cap.isOpened():
                     print("[INFO] Cámara abierta en índice 0")
                     self._configure_camera()
-                    return True
+                    return self._start_capture_thread()
         except Exception as e:
             print(f"[ERROR] Error inicializando cámara: {e}")
             
@@ -78,19 +112,135 @@ class CameraHandler:
             actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
             print(f"[INFO] Resolución de cámara: {actual_width}x{actual_height}, {actual_fps} FPS")
     
-    def read_frame(self):
+    def _start_capture_thread(self):
+        """
+        Arranca el hilo de captura si está habilitado, reservando el buffer circular
+        
+        Returns:
+            bool: True si la cámara queda lista para leer
+        """
+        if not self.capture_thread_enabled:
+            return True
+        
+        # Leer un primer frame para conocer la resolución real
+        success, frame = self.cap.read()
+        if not success:
+            print("[ERROR] No se pudo leer el primer frame para el hilo de captura")
+            return False
+        
+        # Buffer circular preasignado (mínimo 2 slots para no escribir sobre el último frame)
+        slots = max(2, self.buffer_size)
+        self.ring = np.empty((slots,) + frame.shape, dtype=frame.dtype)
+        self.ring_seq = np.zeros(slots, dtype=np.int64)
+        self.ring_timestamps = np.zeros(slots, dtype=np.float64)
+        self.ring[0] = frame
+        self.ring_seq[0] = 1
+        self.ring_timestamps[0] = time.monotonic()
+        self.latest_slot = 0
+        self.latest_seq = 1
+        self.last_served_seq = 0
+        self.dropped_frames = 0
+        
+        self.grab_running = True
+        self.grab_thread = threading.Thread(target=self._grab_loop, name="camera-grab", daemon=True)
+        self.grab_thread.start()
+        print(f"[INFO] Hilo de captura iniciado (buffer de {slots} frames)")
+        return True
+    
+    def _grab_loop(self):
+        """Bucle del hilo de captura: lee continuamente en el buffer circular"""
+        slots = len(self.ring)
+        while self.grab_running:
+            # Escribir siempre en un slot distinto al último publicado
+            slot = (self.latest_slot + 1) % slots
+            target = self.ring[slot]
+            success, frame = self.cap.read(target)
+            if not success:
+                time.sleep(0.01)
+                continue
+            # OpenCV reserva un array nuevo si el destino no encaja; copiarlo al slot
+            if frame is not target and frame.ctypes.data != target.ctypes.data:
+                if frame.shape != target.shape:
+                    continue
+                target[...] = frame
+            
+            timestamp = time.monotonic()
+            with self.frame_condition:
+                self.latest_seq += 1
+                self.ring_seq[slot] = self.latest_seq
+                self.ring_timestamps[slot] = timestamp
+                self.latest_slot = slot
+                self.frame_condition.notify_all()
+    
+    def _read_latest(self, timeout=1.0, out=None):
+        """
+        Devuelve una copia del frame más reciente del buffer circular
+        
+        Args:
+            timeout: Tiempo máximo de espera por un frame nuevo (segundos)
+            out: Buffer opcional donde copiar el frame (evita reservar uno nuevo)
+            
+        Returns:
+            frame: Copia del frame más reciente o None
+            success: True si se obtuvo un frame nuevo
+            info: Diccionario con seq, timestamp y frames descartados
+        """
+        with self.frame_condition:
+            if not self.frame_condition.wait_for(
+                lambda: self.latest_seq > self.last_served_seq or not self.grab_running,
+                timeout=timeout
+            ) or not self.grab_running:
+                return None, False, None
+            
+            slot = self.latest_slot
+            seq = int(self.ring_seq[slot])
+            # Frames capturados que nunca se sirvieron
+            if self.last_served_seq:
+                self.dropped_frames += seq - self.last_served_seq - 1
+            self.last_served_seq = seq
+            if out is not None and out.shape == self.ring[slot].shape:
+                np.copyto(out, self.ring[slot])
+                frame = out
+            else:
+                frame = self.ring[slot].copy()
+            info = {
+                "seq": seq,
+                "timestamp": float(self.ring_timestamps[slot]),
+                "dropped": self.dropped_frames
+            }
+        return frame, True, info
+    
+    def read_frame(self, with_info=False, out=None):
         """
         Lee un frame de la cámara
         
+        Args:
+            with_info: Si es True devuelve además seq, timestamp y frames descartados
+            out: Buffer opcional donde leer el frame (p. ej. de un FramePool); si no encaja
+                 con la resolución se devuelve un array nuevo
+        
         Returns:
             frame: Frame capturado o None si hay error
             success: True si se leyó correctamente
+            info: (solo con with_info) Diccionario con seq, timestamp y dropped
         """
+        if self.grab_thread is not None:
+            frame, success, info = self._read_latest(out=out)
+            return (frame, success, info) if with_info else (frame, success)
+        
         if self.cap is None or not self.cap.isOpened():
-            return None, False
+            return (None, False, None) if with_info else (None, False)
         
-        # Capturar frame
-        success, frame = self.cap.read()
+        # Capturar frame (OpenCV reutiliza out si tiene la forma correcta)
+        success, frame = self.cap.read(out) if out is not None else self.cap.read()
+        
+        if with_info:
+            if not success:
+                if not self.is_file_source:
+                    print("[ERROR] Error al capturar el frame")
+                return None, False, None
+            self.latest_seq += 1
+            return frame, True, {"seq": self.latest_seq, "timestamp": time.monotonic(), "dropped": 0}
         
         if success:
             # Añadir al buffer si se configuró para estabilidad
@@ -104,11 +254,19 @@ class CameraHandler:
             
             return frame, True
         else:
-            print("[ERROR] Error al capturar el frame")
+            if not self.is_file_source:
+                print("[ERROR] Error al capturar el frame")
             return None, False
     
     def release(self):
         """Libera los recursos de la cámara"""
+        if self.grab_thread is not None:
+            self.grab_running = False
+            with self.frame_condition:
+                self.frame_condition.notify_all()
+            self.grab_thread.join(timeout=1.0)
+            self.grab_thread = None
+        
         if self.cap is not None:
             self.cap.release()
             print("[INFO] Cámara liberada")
@@ -1,17 +1,23 @@
 import cv2
-import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Añadir directorio actual al path para importar módulos
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importar módulos del proyecto
-from utils.config_loader import ConfigLoader
+from utils.config_loader import ConfigLoader, create_config_watcher
 from camera.camera_utils import CameraHandler
-from src.detector.yolo_detector import YOLODetector
 from src.detector.distance_calc import DistanceCalculator
 from visualization.visualizer import DetectionVisualizer
+from src.pipeline.pipeline import DetectionPipeline
+from src.metrics.metrics import create_metrics, now
+from src.stream.event_stream import create_publisher
+from src.recorder.event_recorder import create_recorder
+from src.history.history_store import create_history
+from src.analytics.rolling_stats import create_analytics
+from src.pipeline.startup import StartupTimer, preflight, load_detector
 
 def main():
     """Función principal de la aplicación"""
@@ -22,6 +28,8 @@ def main():
     print("  'c' - Modo calibración")
     print("  's' - Guardar calibración actual")
     
+    timer = StartupTimer()
+    
     # Ruta de configuración
     config_path = "config/config.yml"
     
@@ -37,78 +45,124 @@ def main():
     
     # Cargar configuración
     try:
-        config = ConfigLoader.load_config(config_path)
+        with timer.phase("config"):
+            config = ConfigLoader.load_config(config_path)
         print("[INFO] Configuración cargada correctamente.")
     except Exception as e:
         print(f"[ERROR] Error cargando configuración: {e}")
         return
     
+    # Comprobaciones previas (dependencias, modelo, fuente de vídeo)
+    with timer.phase("preflight"):
+        errors = preflight(config)
+    if errors:
+        for error in errors:
+            print(f"[ERROR] {error}")
+        return
+    
     # Inicializar componentes
     try:
-        # 1. Inicializar cámara
-        camera = CameraHandler(config)
-        if not camera.initialize():
+        # 1. Cargar y calentar el detector YOLO en segundo plano mientras se abre la cámara
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        detector_future = loader.submit(load_detector, config, timer)
+        loader.shutdown(wait=False)
+        
+        # 2. Inicializar cámara
+        with timer.phase("camera"):
+            camera = CameraHandler(config)
+            camera_ready = camera.initialize()
+        detector = detector_future.result()
+        if not camera_ready:
             print("[ERROR] No se pudo inicializar la cámara.")
             return
         
-        # 2. Inicializar detector YOLO
-        detector = YOLODetector(config)
-        
         # 3. Inicializar calculador de distancia
         distance_calculator = DistanceCalculator(config)
         
         # 4. Inicializar visualizador
         visualizer = DetectionVisualizer(config)
         
+        # 5. Métricas por etapa (endpoint HTTP local y volcado JSON opcionales)
+        metrics, metrics_services = create_metrics(config)
+        display_histogram = metrics.stage("display") if metrics is not None else None
+        
+        # 6. Stream de detecciones para consumidores externos (TCP/WebSocket local)
+        publisher = create_publisher(config)
+        if publisher is not None:
+            metrics_services.append(publisher)
+        
+        # 7. Historial de detecciones en disco (consultas por rango de tiempo)
+        history = create_history(config)
+        if history is not None:
+            metrics_services.append(history)
+        
+        # 8. Agregados deslizantes por clase, permanencia y ocupación (/analytics.json)
+        analytics = create_analytics(config)
+        
+        # 9. Inicializar pipeline (captura, inferencia y render en hilos separados)
+        pipeline = DetectionPipeline(config, camera, detector, distance_calculator, visualizer,
+                                     metrics=metrics, publisher=publisher, history=history,
+                                     analytics=analytics)
+        
+        # 10. Grabación de clips de evento en segundo plano (buffer previo + posterior)
+        recorder = create_recorder(config)
+        if recorder is not None:
+            metrics_services.append(recorder)
+            submit_to_recorder = lambda packet: recorder.submit(packet.output, packet.columnar, packet.timestamp)
+        else:
+            submit_to_recorder = None
+        
+        # 11. Recarga en caliente de umbrales, suavizado y opciones de visualización
+        config_watcher = create_config_watcher(config_path, config, pipeline.apply_runtime)
+        if config_watcher is not None:
+            metrics_services.append(config_watcher)
+        
+        timer.report()
+        if metrics is not None:
+            startup_seconds = timer.total()
+            metrics.register_gauge("startup_seconds", lambda: startup_seconds)
         print("[INFO] Sistema inicializado. Iniciando bucle de detección...")
         
+        # Modo sin ventana: procesar hasta fin de stream y mostrar estadísticas
+        if pipeline.headless:
+            stats = pipeline.run_headless(on_result=submit_to_recorder)
+            print(f"[INFO] Estadísticas del pipeline: {stats}")
+            for service in metrics_services:
+                service.stop()
+            distance_calculator.close()
+            camera.release()
+            return
+        
         # Variables para calibración
         calibration_mode = config["distance"].get("calibration_mode", False)
         calibration_object = None
         calibration_distance = 100  # cm por defecto
         
-        # Bucle principal
+        pipeline.start()
+        
+        # Bucle principal: mostrar resultados del pipeline y procesar teclas
         while True:
-            # Capturar frame
-            frame, success = camera.read_frame()
+            packet = pipeline.get_result(timeout=1.0)
             
-            if not success:
-                print("[ERROR] Error al capturar el frame. Reintentando...")
-                time.sleep(0.5)
+            if packet is None:
+                if pipeline.finished.is_set():
+                    print("[INFO] Fin del stream de vídeo")
+                    break
                 continue
             
             try:
-                # Detectar objetos
-                detections, object_counts = detector.detect(frame)
+                detections = packet.detections
+                object_counts = packet.object_counts
+                processed_frame = packet.output
                 
-                # Calcular distancias para cada detección
-                for det in detections:
-                    class_name = det["class_name"]
-                    x, y, w, h = det["box"]
-                    object_id = det["object_id"]
-                    
-                    # Calcular distancia si la clase está en los tamaños conocidos
-                    # Pasar información adicional (coordenadas y altura del frame)
-                    distance = distance_calculator.calculate_distance(
-                        class_name, 
-                        w, h, 
-                        x, y,
-                        frame.shape[0],  # Altura del frame
-                        object_id
-                    )
-                    det["distance"] = distance
-                    
-                    # Si estamos en modo calibración y este objeto es el seleccionado
-                    if calibration_mode and calibration_object == class_name:
-                        # Dibujar información de calibración
-                        label = f"CALIBRANDO: {class_name} a {calibration_distance}cm"
-                        cv2.putText(frame, label, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 
-                                   0.7, (0, 0, 255), 2, cv2.LINE_AA)
-                        cv2.putText(frame, "Presiona 's' para guardar, '+'/'-' para ajustar distancia", 
-                                   (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2, cv2.LINE_AA)
-                
-                # Visualizar resultados
-                processed_frame = visualizer.visualize_detections(frame, detections, object_counts)
+                # Si estamos en modo calibración y el objeto seleccionado está en el frame
+                if calibration_mode and calibration_object in object_counts:
+                    # Dibujar información de calibración
+                    label = f"CALIBRANDO: {calibration_object} a {calibration_distance}cm"
+                    cv2.putText(processed_frame, label, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 
+                               0.7, (0, 0, 255), 2, cv2.LINE_AA)
+                    cv2.putText(processed_frame, "Presiona 's' para guardar, '+'/'-' para ajustar distancia", 
+                               (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2, cv2.LINE_AA)
                 
                 # Mostrar información adicional en modo calibración
                 if calibration_mode:
@@ -129,17 +183,26 @@ def main():
                                 cv2.putText(processed_frame, f"{i+1}: {obj}", 
                                            (20, 120 + i*30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
                 
+                # Copia para el grabador (el frame vuelve al pool tras mostrarse)
+                if recorder is not None:
+                    recorder.submit(processed_frame, packet.columnar, packet.timestamp)
+                
                 # Mostrar frame procesado
+                display_start = now()
                 cv2.imshow("YOLO Distance Detector", processed_frame)
                 
                 # Capturar tecla
                 key = cv2.waitKey(1) & 0xFF
+                if display_histogram is not None:
+                    display_histogram.observe_since(display_start)
                 
                 # Procesar teclas
                 if key == ord('q'):  # Salir
                     break
                 elif key == ord('r'):  # Reiniciar tracking
-                    distance_calculator.reset_tracking()
+                    with pipeline.lock:
+                        detector.reset_tracking()
+                        distance_calculator.reset_tracking()
                     print("[INFO] Tracking reiniciado")
                 elif key == ord('c'):  # Activar/desactivar modo calibración
                     calibration_mode = not calibration_mode
@@ -159,12 +222,13 @@ def main():
                                 size_px = h if is_height else w
                                 
                                 # Calibrar
-                                distance_calculator.calibrate(
-                                    calibration_object, 
-                                    calibration_distance, 
-                                    size_px, 
-                                    is_height
-                                )
+                                with pipeline.lock:
+                                    distance_calculator.calibrate(
+                                        calibration_object, 
+                                        calibration_distance, 
+                                        size_px, 
+                                        is_height
+                                    )
                                 break
                     elif key == ord('+') or key == ord('='):  # Aumentar distancia calibración
                         calibration_distance += 5
@@ -180,13 +244,27 @@ def main():
                             print(f"[INFO] Objeto seleccionado para calibración: {calibration_object}")
             
             except Exception as e:
+                if metrics is not None:
+                    metrics.exceptions["display"].inc()
                 print(f"[ERROR] Error en procesamiento: {e}")
-                # Mostrar el frame original en caso de error
-                cv2.imshow("YOLO Distance Detector", frame)
+                # Mostrar el frame original en caso de error; con dibujo in situ el buffer
+                # capturado ya está anotado a medias, así que se mantiene el frame anterior
+                if packet.frame is not None and packet.output is not packet.frame:
+                    cv2.imshow("YOLO Distance Detector", packet.frame)
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
+            finally:
+                # Devolver el buffer del frame al pool una vez mostrado
+                pipeline.release(packet)
+        
+        # Detener pipeline
+        pipeline.stop()
+        print(f"[INFO] Estadísticas del pipeline: {pipeline.get_stats()}")
+        for service in metrics_services:
+            service.stop()
         
-        # Liberar recursos
+        # Liberar recursos (y escribir la calibración pendiente)
+        distance_calculator.close()
         camera.release()
         cv2.destroyAllWindows()
         
@@ -194,6 +272,12 @@ def main():
         print(f"[ERROR] {e}")
         # Intentar liberar recursos
         try:
+            if 'pipeline' in locals():
+                pipeline.stop()
+            for service in locals().get('metrics_services', []):
+                service.stop()
+            if 'distance_calculator' in locals():
+                distance_calculator.close()
             if 'camera' in locals():
                 camera.release()
             cv2.destroyAllWindows()
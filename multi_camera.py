@@ -0,0 +1,57 @@
+import argparse
+import json
+import os
+import sys
+
+# Añadir directorio actual al path para importar módulos
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config_loader import ConfigLoader
+from src.engine.supervisor import MultiProcessEngine
+
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Motor multiproceso: varias cámaras por equipo con memoria compartida"
+    )
+    parser.add_argument("sources", nargs="*",
+                        help="Índices de cámara, vídeos o 'synthetic' (por defecto engine.cameras)")
+    parser.add_argument("-c", "--config", default="config/config.yml", help="Archivo de configuración")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Trabajadores de inferencia")
+    parser.add_argument("-d", "--duration", type=float, default=None, help="Segundos de ejecución")
+    parser.add_argument("-o", "--output", default=None, help="Guardar las estadísticas en JSON")
+    return parser.parse_args()
+
+
+def main():
+    """Ejecuta el motor y muestra el FPS agregado"""
+    args = parse_args()
+    try:
+        config = ConfigLoader.load_config(args.config)
+    except Exception as e:
+        print(f"[ERROR] Error cargando configuración: {e}")
+        return 1
+
+    engine_config = config.setdefault("engine", {})
+    if args.sources:
+        engine_config["cameras"] = [{"source": source} for source in args.sources]
+    if args.workers:
+        engine_config["workers"] = args.workers
+
+    stats = MultiProcessEngine(config).run(duration=args.duration)
+    for camera in stats["cameras"]:
+        print(f"[INFO] {camera['source']}: {camera['processed']} frames ({camera['fps']:.1f} FPS), "
+              f"{camera['dropped']} descartados")
+    print(f"[INFO] {stats['results']} frames en {stats['seconds']:.1f}s "
+          f"({stats['fps']:.1f} FPS con {stats['workers']} trabajadores, "
+          f"latencia media {stats['latency_ms']:.1f}ms)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=4, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import threading
+import time
+import numpy as np
+
+# Campos por bucket que se pueden sumar y restar (totales acumulados por ventana)
+ADDITIVE_FIELDS = ("count", "new_tracks", "dist_sum", "dist_n", "dwell_sum", "dwell_n")
+
+
+class RollingAnalytics:
+    """
+    Agregados deslizantes por clase, permanencia por track y mapa de ocupación.
+
+    El tiempo se divide en buckets de bucket_s segundos guardados en un anillo. Cada frame
+    solo suma en el bucket actual (scatter-add vectorizado), así que su coste no depende de
+    la longitud de las ventanas. Al cambiar de bucket, cada ventana suma el bucket cerrado a
+    sus totales y resta el que sale de ella: O(ventanas) una vez por bucket. Los mínimos y
+    picos no se pueden restar y se combinan por buckets al consultar.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Configuración completa (sección analytics)
+        """
+        analytics_config = config.get("analytics", {})
+        self.bucket_s = float(analytics_config.get("bucket_s", 1.0))
+        self.windows_s = sorted(analytics_config.get("windows_s", [10, 60, 300]))
+        if self.bucket_s <= 0 or not self.windows_s:
+            raise ValueError("analytics necesita bucket_s > 0 y al menos una ventana")
+        # Buckets por ventana (el bucket actual, parcial, cuenta como uno)
+        self.window_buckets = [max(1, int(round(window / self.bucket_s))) for window in self.windows_s]
+        self.ring_size = max(self.window_buckets)
+        self.grid = tuple(analytics_config.get("heatmap_grid", [32, 18]))
+        self.anchor = analytics_config.get("heatmap_anchor", "bottom")
+        self.track_timeout_s = analytics_config.get("track_timeout_s", 2.0)
+        self.max_tracks_reported = analytics_config.get("max_tracks_reported", 10)
+
+        self.lock = threading.Lock()
+        self.names = {}
+        self.num_classes = 0
+        self.buckets = {}
+        self.totals = []
+        self._allocate(8)
+        self.current = None
+        self.first_bucket = None
+        self.last_timestamp = None
+
+        # Tracks activos: track_id -> [primera vez, última vez, class_id]
+        self.tracks = {}
+
+        # Estadísticas
+        self.updates = 0
+        self.update_time = 0.0
+
+    def _allocate(self, num_classes):
+        """Crea (o amplía a num_classes) las matrices por bucket y los totales por ventana"""
+        old_buckets, old_totals, old_classes = self.buckets, self.totals, self.num_classes
+        ring = self.ring_size
+        cells = self.grid[0] * self.grid[1]
+        buckets = {field: np.zeros((ring, num_classes)) for field in ADDITIVE_FIELDS}
+        buckets["dist_min"] = np.full((ring, num_classes), np.inf)
+        buckets["peak"] = np.zeros((ring, num_classes), dtype=np.int64)
+        buckets["frames"] = np.zeros(ring, dtype=np.int64)
+        buckets["heat"] = np.zeros((ring, cells), dtype=np.int64)
+        totals = []
+        for _ in self.windows_s:
+            window_totals = {field: np.zeros(num_classes) for field in ADDITIVE_FIELDS}
+            window_totals["frames"] = 0
+            window_totals["heat"] = np.zeros(cells, dtype=np.int64)
+            totals.append(window_totals)
+
+        if old_classes:
+            for field, values in old_buckets.items():
+                if values.ndim == 2 and field != "heat":
+                    buckets[field][:, :old_classes] = values
+                else:
+                    buckets[field] = values
+            for window_totals, old in zip(totals, old_totals):
+                for field, values in old.items():
+                    if field in ADDITIVE_FIELDS:
+                        window_totals[field][:old_classes] = values
+                    else:
+                        window_totals[field] = values
+        self.buckets = buckets
+        self.totals = totals
+        self.num_classes = num_classes
+
+    def _clear_slot(self, slot):
+        for field, values in self.buckets.items():
+            values[slot] = np.inf if field == "dist_min" else 0
+
+    def _reset(self, bucket):
+        for field, values in self.buckets.items():
+            values[...] = np.inf if field == "dist_min" else 0
+        for window_totals in self.totals:
+            for field, values in window_totals.items():
+                window_totals[field] = values * 0
+        self.current = bucket
+        self.first_bucket = bucket
+
+    def _advance(self, timestamp):
+        """Avanza el bucket actual hasta el del timestamp (cierra y expira buckets)"""
+        bucket = int(timestamp // self.bucket_s)
+        if self.current is None or bucket - self.current >= self.ring_size:
+            # Primer frame o hueco más largo que todas las ventanas: se empieza de cero
+            self._reset(bucket)
+            self._expire_tracks(timestamp)
+            return
+        if bucket <= self.current:
+            return
+        buckets = self.buckets
+        while self.current < bucket:
+            closed = self.current % self.ring_size
+            self.current += 1
+            for window_totals, size in zip(self.totals, self.window_buckets):
+                expired = self.current - size
+                expired_slot = expired % self.ring_size if expired >= self.first_bucket else None
+                for field in ADDITIVE_FIELDS + ("frames", "heat"):
+                    window_totals[field] += buckets[field][closed]
+                    if expired_slot is not None:
+                        window_totals[field] -= buckets[field][expired_slot]
+            self._clear_slot(self.current % self.ring_size)
+        self._expire_tracks(timestamp)
+
+    def _expire_tracks(self, timestamp):
+        """Cierra los tracks no vistos en track_timeout_s y suma su permanencia al bucket actual"""
+        limit = timestamp - self.track_timeout_s
+        expired = [track_id for track_id, track in self.tracks.items() if track[1] < limit]
+        if not expired:
+            return
+        slot = self.current % self.ring_size
+        for track_id in expired:
+            first_seen, last_seen, class_id = self.tracks.pop(track_id)
+            self.buckets["dwell_sum"][slot, class_id] += last_seen - first_seen
+            self.buckets["dwell_n"][slot, class_id] += 1
+
+    def update(self, detections, timestamp, frame_shape):
+        """
+        Acumula las detecciones de un frame (coste independiente de la longitud de las ventanas)
+
+        Args:
+            detections: Detections columnar con distancias y track_id opcionales
+            timestamp: Instante de captura (time.monotonic)
+            frame_shape: Forma del frame (alto, ancho[, canales]) para el mapa de ocupación
+        """
+        start = time.perf_counter()
+        with self.lock:
+            self._advance(timestamp)
+            self.last_timestamp = timestamp
+            slot = self.current % self.ring_size
+            buckets = self.buckets
+            buckets["frames"][slot] += 1
+            if len(detections):
+                self.names = detections.names
+                class_id = detections.class_id.astype(np.intp)
+                max_class = int(class_id.max()) + 1
+                if max_class > self.num_classes:
+                    self._allocate(max(max_class, 2 * self.num_classes))
+                    buckets = self.buckets
+
+                frame_counts = np.bincount(class_id, minlength=self.num_classes)
+                buckets["count"][slot] += frame_counts
+                np.maximum(buckets["peak"][slot], frame_counts, out=buckets["peak"][slot])
+
+                if detections.distance is not None:
+                    valid = ~np.isnan(detections.distance)
+                    valid_class = class_id[valid]
+                    distance = detections.distance[valid]
+                    np.add.at(buckets["dist_sum"][slot], valid_class, distance)
+                    np.add.at(buckets["dist_n"][slot], valid_class, 1)
+                    np.minimum.at(buckets["dist_min"][slot], valid_class, distance)
+
+                # Ocupación: celda del centro (o de la base) de cada caja
+                height, width = frame_shape[:2]
+                grid_w, grid_h = self.grid
+                x, y = detections.x.astype(np.intp), detections.y.astype(np.intp)
+                w, h = detections.w.astype(np.intp), detections.h.astype(np.intp)
+                anchor_y = y + h if self.anchor == "bottom" else y + h // 2
+                cell_x = np.clip((x + w // 2) * grid_w // width, 0, grid_w - 1)
+                cell_y = np.clip(anchor_y * grid_h // height, 0, grid_h - 1)
+                np.add.at(buckets["heat"][slot], cell_y * grid_w + cell_x, 1)
+
+                if detections.track_id is not None:
+                    tracks = self.tracks
+                    new_classes = []
+                    for track_id, track_class in zip(detections.track_id.tolist(), class_id.tolist()):
+                        track = tracks.get(track_id)
+                        if track is None:
+                            tracks[track_id] = [timestamp, timestamp, track_class]
+                            new_classes.append(track_class)
+                        else:
+                            track[1] = timestamp
+                    if new_classes:
+                        np.add.at(buckets["new_tracks"][slot], new_classes, 1)
+        self.updates += 1
+        self.update_time += time.perf_counter() - start
+
+    def _window_index(self, window_s):
+        if window_s is None:
+            return 0
+        for index, window in enumerate(self.windows_s):
+            if window == window_s:
+                return index
+        raise ValueError(f"Ventana no configurada: {window_s}s (disponibles: {self.windows_s})")
+
+    def _window_slots(self, index):
+        """Slots de los buckets que forman la ventana (incluye el actual)"""
+        start = max(self.current - self.window_buckets[index] + 1, self.first_bucket)
+        return np.arange(start, self.current + 1) % self.ring_size
+
+    def _window_values(self, index):
+        """Totales de una ventana: acumulados de los buckets cerrados más el bucket actual"""
+        slot = self.current % self.ring_size
+        values = {field: total + self.buckets[field][slot] for field, total in self.totals[index].items()}
+        slots = self._window_slots(index)
+        values["dist_min"] = self.buckets["dist_min"][slots].min(axis=0)
+        values["peak"] = self.buckets["peak"][slots].max(axis=0)
+        return values
+
+    def heatmap(self, window_s=None, timestamp=None):
+        """
+        Mapa de ocupación de una ventana
+
+        Args:
+            window_s: Longitud de la ventana (None = la más corta)
+            timestamp: Instante de referencia (None = ahora)
+
+        Returns:
+            heatmap: Array (alto, ancho) de la rejilla con las detecciones por celda
+        """
+        index = self._window_index(window_s)
+        with self.lock:
+            if self.current is None:
+                return np.zeros((self.grid[1], self.grid[0]), dtype=np.int64)
+            self._advance(time.monotonic() if timestamp is None else timestamp)
+            slot = self.current % self.ring_size
+            heat = self.totals[index]["heat"] + self.buckets["heat"][slot]
+        return heat.reshape(self.grid[1], self.grid[0])
+
+    def snapshot(self, window_s=None, timestamp=None, include_heatmap=False):
+        """
+        Estado de los agregados deslizantes
+
+        Args:
+            window_s: Longitud de la ventana (None = todas)
+            timestamp: Instante de referencia en time.monotonic (None = ahora)
+            include_heatmap: Añadir el mapa de ocupación de cada ventana (lista de filas)
+
+        Returns:
+            snapshot: Diccionario serializable a JSON con una entrada por ventana y los tracks activos
+        """
+        indices = range(len(self.windows_s)) if window_s is None else [self._window_index(window_s)]
+        with self.lock:
+            result = {"bucket_s": self.bucket_s, "windows": {}, "tracks": {"active": 0, "longest": []}}
+            if self.current is None:
+                return result
+            now = time.monotonic() if timestamp is None else timestamp
+            self._advance(now)
+            names = self.names
+            for index in indices:
+                values = self._window_values(index)
+                frames = int(values["frames"])
+                classes = {}
+                for class_id in np.flatnonzero((values["count"] > 0) | (values["dwell_n"] > 0)).tolist():
+                    count = values["count"][class_id]
+                    dist_n = values["dist_n"][class_id]
+                    dwell_n = values["dwell_n"][class_id]
+                    classes[names.get(class_id, str(class_id))] = {
+                        "detections": int(count),
+                        "per_frame": float(count / frames) if frames else 0.0,
+                        "peak": int(values["peak"][class_id]),
+                        "new_tracks": int(values["new_tracks"][class_id]),
+                        "distance_min": float(values["dist_min"][class_id]) if dist_n else None,
+                        "distance_mean": float(values["dist_sum"][class_id] / dist_n) if dist_n else None,
+                        "dwell_mean_s": float(values["dwell_sum"][class_id] / dwell_n) if dwell_n else None
+                    }
+                window = {"frames": frames, "classes": classes}
+                if include_heatmap:
+                    window["heatmap"] = values["heat"].reshape(self.grid[1], self.grid[0]).tolist()
+                result["windows"][str(self.windows_s[index])] = window
+
+            # Permanencia de los tracks aún visibles (los más largos primero)
+            dwell = sorted(((track[1] - track[0], track_id, track[2]) for track_id, track in self.tracks.items()),
+                           reverse=True)
+            result["tracks"] = {
+                "active": len(dwell),
+                "longest": [
+                    {"track_id": track_id, "class": names.get(class_id, str(class_id)), "dwell_s": seconds}
+                    for seconds, track_id, class_id in dwell[:self.max_tracks_reported]
+                ]
+            }
+        return result
+
+    def query(self, params):
+        """
+        Vista para el endpoint HTTP de métricas (/analytics.json?window=60&heatmap=1)
+
+        Args:
+            params: Diccionario de parámetros de la petición
+
+        Returns:
+            snapshot: Resultado de snapshot()
+        """
+        window = params.get("window")
+        return self.snapshot(window_s=float(window) if window else None,
+                             include_heatmap=params.get("heatmap", "0") not in ("0", "false", ""))
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: Frames acumulados, tracks activos y coste medio por frame
+        """
+        return {
+            "updates": self.updates,
+            "active_tracks": len(self.tracks),
+            "update_ms": self.update_time / self.updates * 1000 if self.updates else 0.0
+        }
+
+
+def create_analytics(config):
+    """
+    Crea los agregados deslizantes si están activados
+
+    Args:
+        config: Configuración completa (sección analytics)
+
+    Returns:
+        analytics: RollingAnalytics o None
+    """
+    if not config.get("analytics", {}).get("enabled", False):
+        return None
+    analytics = RollingAnalytics(config)
+    windows = ", ".join(f"{window}s" for window in analytics.windows_s)
+    print(f"[INFO] Analítica deslizante activa (ventanas: {windows}, buckets de {analytics.bucket_s}s)")
+    return analytics
@@ -0,0 +1,256 @@
+import cv2
+import numpy as np
+
+# Valor de relleno del letterbox (el mismo que usa Ultralytics)
+PAD_VALUE = 114
+
+
+class InferenceBackend:
+    """Interfaz común de los backends de inferencia"""
+
+    name = None
+
+    def __init__(self, confidence, iou_threshold, max_det):
+        """
+        Args:
+            confidence: Confianza mínima de una detección
+            iou_threshold: Umbral IoU para non-maximum suppression
+            max_det: Máximo de detecciones por frame
+        """
+        self.confidence = confidence
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        self.names = {}
+
+    def predict(self, frames):
+        """
+        Ejecuta el modelo sobre una lista de frames
+
+        Args:
+            frames: Lista de imágenes BGR
+
+        Returns:
+            outputs: Lista de arrays (N, 6) float32 [x1, y1, x2, y2, conf, cls] en coordenadas
+                     de cada frame, uno por frame y en el mismo orden
+        """
+        raise NotImplementedError
+
+
+def letterbox(frame, input_size):
+    """
+    Redimensiona manteniendo la proporción, rellena hasta el tamaño de entrada y normaliza
+
+    Args:
+        frame: Imagen BGR uint8
+        input_size: Tupla (ancho, alto) de entrada del modelo
+
+    Returns:
+        blob: Array (1, 3, alto, ancho) float32 RGB en [0, 1]
+        scale: Factor de escala aplicado al frame
+        pad: Tupla (izquierda, arriba) con el relleno en píxeles
+    """
+    width, height = input_size
+    frame_height, frame_width = frame.shape[:2]
+    scale = min(width / frame_width, height / frame_height)
+    new_width = int(round(frame_width * scale))
+    new_height = int(round(frame_height * scale))
+    if (new_width, new_height) != (frame_width, frame_height):
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    left = (width - new_width) // 2
+    top = (height - new_height) // 2
+    padded = cv2.copyMakeBorder(
+        frame, top, height - new_height - top, left, width - new_width - left,
+        cv2.BORDER_CONSTANT, value=(PAD_VALUE, PAD_VALUE, PAD_VALUE)
+    )
+    # blobFromImage hace BGR->RGB, HWC->CHW y la normalización en una sola pasada
+    blob = cv2.dnn.blobFromImage(padded, scalefactor=1.0 / 255.0, swapRB=True)
+    return blob, scale, (left, top)
+
+
+class Letterbox:
+    """Letterbox y normalización sobre buffers preasignados y reutilizados entre frames"""
+
+    def __init__(self, input_size):
+        """
+        Args:
+            input_size: Tupla (ancho, alto) de entrada del modelo
+        """
+        width, height = input_size
+        self.input_size = input_size
+        self.canvas = np.full((height, width, 3), PAD_VALUE, dtype=np.uint8)
+        self.blob = np.empty((1, 3, height, width), dtype=np.float32)
+        # Vista RGB/CHW del lienzo: la normalización escribe el blob en una sola pasada
+        self.canvas_chw = self.canvas[:, :, ::-1].transpose(2, 0, 1)
+        self.frame_shape = None
+
+    def _configure(self, frame_shape):
+        """Recalcula la geometría (solo cuando cambia la resolución de entrada)"""
+        width, height = self.input_size
+        frame_height, frame_width = frame_shape
+        self.scale = min(width / frame_width, height / frame_height)
+        new_width = int(round(frame_width * self.scale))
+        new_height = int(round(frame_height * self.scale))
+        left = (width - new_width) // 2
+        top = (height - new_height) // 2
+        self.pad = (left, top)
+        self.size = (new_width, new_height)
+        self.resize = (new_width, new_height) != (frame_width, frame_height)
+        self.canvas[...] = PAD_VALUE
+        # Región del lienzo donde se escribe el frame; el relleno no se vuelve a tocar
+        self.region = self.canvas[top:top + new_height, left:left + new_width]
+        self.frame_shape = frame_shape
+
+    def __call__(self, frame, out=None):
+        """
+        Prepara un frame para el modelo sin reservar memoria
+
+        Args:
+            frame: Imagen BGR uint8
+            out: Array (3, alto, ancho) float32 opcional donde escribir (p. ej. una fila de un lote)
+
+        Returns:
+            blob: Array (1, 3, alto, ancho) float32 RGB en [0, 1] (se sobrescribe en la siguiente llamada)
+            scale: Factor de escala aplicado al frame
+            pad: Tupla (izquierda, arriba) con el relleno en píxeles
+        """
+        if frame.shape[:2] != self.frame_shape:
+            self._configure(frame.shape[:2])
+        if self.resize:
+            cv2.resize(frame, self.size, dst=self.region, interpolation=cv2.INTER_LINEAR)
+        else:
+            self.region[...] = frame
+        np.multiply(self.canvas_chw, np.float32(1.0 / 255.0),
+                    out=self.blob[0] if out is None else out, casting="unsafe")
+        return self.blob, self.scale, self.pad
+
+
+def decode_yolo_output(output, confidence, iou_threshold, max_det, scale, pad, frame_shape):
+    """
+    Convierte la salida cruda de YOLOv8 exportado en detecciones finales
+
+    Args:
+        output: Array (1, 4 + num_clases, anclas) con [cx, cy, w, h, puntuaciones...]
+        confidence: Confianza mínima
+        iou_threshold: Umbral IoU para NMS (por clase)
+        max_det: Máximo de detecciones
+        scale, pad: Transformación del letterbox a deshacer
+        frame_shape: Forma del frame original
+
+    Returns:
+        data: Array (N, 6) float32 [x1, y1, x2, y2, conf, cls] en coordenadas del frame
+    """
+    prediction = output[0]
+    scores = prediction[4:]
+
+    # Filtrar por confianza antes de calcular argmax sobre las clases
+    best = scores.max(axis=0)
+    candidates = np.flatnonzero(best >= confidence)
+    if candidates.size == 0:
+        return np.empty((0, 6), dtype=np.float32)
+
+    class_ids = scores[:, candidates].argmax(axis=0)
+    conf = best[candidates]
+    cx, cy, w, h = prediction[:4, candidates]
+    xywh = np.column_stack((cx - w / 2, cy - h / 2, w, h)).astype(np.float64)
+
+    keep = cv2.dnn.NMSBoxesBatched(xywh, conf.astype(np.float64), class_ids.astype(np.int32),
+                                   confidence, iou_threshold)
+    keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+    # NMSBoxesBatched devuelve los índices ordenados por confianza
+    keep = keep[:max_det]
+
+    frame_height, frame_width = frame_shape[:2]
+    boxes = xywh[keep]
+    x1 = np.clip((boxes[:, 0] - pad[0]) / scale, 0, frame_width)
+    y1 = np.clip((boxes[:, 1] - pad[1]) / scale, 0, frame_height)
+    x2 = np.clip((boxes[:, 0] + boxes[:, 2] - pad[0]) / scale, 0, frame_width)
+    y2 = np.clip((boxes[:, 1] + boxes[:, 3] - pad[1]) / scale, 0, frame_height)
+    return np.column_stack((x1, y1, x2, y2, conf[keep], class_ids[keep])).astype(np.float32)
+
+
+class ExportedModelBackend(InferenceBackend):
+    """
+    Base para modelos exportados con alto y ancho fijos: letterbox y NMS se hacen aquí.
+
+    Los modelos se exportan con lote dinámico y un lote de frames se ejecuta en una sola
+    llamada; los exportados con lote fijo de 1 (cachés antiguas) se ejecutan frame a frame.
+    """
+
+    # Frames por llamada al modelo (None = lote dinámico); lo fija cada backend al cargar
+    max_batch = 1
+
+    def __init__(self, names, confidence, iou_threshold, max_det, input_size):
+        """
+        Args:
+            names: Diccionario id de clase -> nombre
+            confidence, iou_threshold, max_det: Parámetros de post-procesado
+            input_size: Tupla (ancho, alto) con la que se exportó el modelo
+        """
+        super().__init__(confidence, iou_threshold, max_det)
+        self.names = names
+        self.input_size = input_size
+        self.letterbox = Letterbox(input_size)
+        # Blob del lote, reservado de nuevo solo cuando llega un lote mayor
+        self.batch_blob = None
+
+    def _set_batch_dim(self, dim):
+        """
+        Fija max_batch a partir de la dimensión de lote de la entrada del modelo
+
+        Args:
+            dim: Tamaño del lote (None si es dinámico)
+        """
+        self.max_batch = dim
+        if dim == 1:
+            print("[INFO] Modelo exportado con lote fijo de 1: los lotes se ejecutan frame a frame "
+                  "(borra la caché de exportación para re-exportarlo con lote dinámico)")
+
+    def infer(self, blob):
+        """
+        Ejecuta el modelo sobre un blob preprocesado
+
+        Args:
+            blob: Array (lote, 3, alto, ancho) float32
+
+        Returns:
+            output: Salida cruda (lote, 4 + num_clases, anclas)
+        """
+        raise NotImplementedError
+
+    def predict(self, frames):
+        """
+        Ejecuta el modelo con una llamada por lote (o por frame si el lote es fijo)
+
+        Args:
+            frames: Lista de imágenes BGR
+
+        Returns:
+            outputs: Lista de arrays (N, 6) [x1, y1, x2, y2, conf, cls]
+        """
+        step = len(frames) if self.max_batch is None else self.max_batch
+        outputs = []
+        for start in range(0, len(frames), max(step, 1)):
+            outputs.extend(self._predict_batch(frames[start:start + step]))
+        return outputs
+
+    def _predict_batch(self, frames):
+        """Letterbox de cada frame en su fila del blob del lote y una única inferencia"""
+        if len(frames) == 1:
+            blob, scale, pad = self.letterbox(frames[0])
+            transforms = [(scale, pad)]
+        else:
+            if self.batch_blob is None or len(self.batch_blob) < len(frames):
+                self.batch_blob = np.empty((len(frames),) + self.letterbox.blob.shape[1:], dtype=np.float32)
+            blob = self.batch_blob[:len(frames)]
+            transforms = []
+            for row, frame in zip(blob, frames):
+                _, scale, pad = self.letterbox(frame, out=row)
+                transforms.append((scale, pad))
+
+        output = self.infer(blob)
+        return [
+            decode_yolo_output(output[i:i + 1], self.confidence, self.iou_threshold, self.max_det,
+                               scale, pad, frame.shape)
+            for i, (frame, (scale, pad)) in enumerate(zip(frames, transforms))
+        ]
@@ -0,0 +1,189 @@
+import json
+import os
+from src.detector.backends.base import letterbox
+from src.offline.frame_sources import build_shards, iter_frames, list_images, video_frame_count
+
+BACKEND_EXTENSIONS = {"onnxruntime": ".onnx", "openvino": ".xml"}
+
+
+def artefact_path(cache_dir, model_name, backend, input_size, int8=False):
+    """
+    Ruta del modelo exportado en caché; la clave es modelo, tamaño de entrada, backend y precisión
+
+    Args:
+        cache_dir: Directorio raíz de la caché
+        model_name: Nombre del modelo (yolov8n...)
+        backend: onnxruntime u openvino
+        input_size: Tupla (ancho, alto)
+        int8: Si el modelo está cuantizado a INT8
+
+    Returns:
+        path: Ruta del archivo .onnx o .xml
+    """
+    width, height = input_size
+    key = f"{model_name}_{width}x{height}_{'int8' if int8 else 'fp32'}"
+    return os.path.join(cache_dir, backend, key + BACKEND_EXTENSIONS[backend])
+
+
+def _names_path(path):
+    return os.path.splitext(path)[0] + ".names.json"
+
+
+def _save_names(path, names):
+    with open(_names_path(path), "w", encoding="utf-8") as f:
+        json.dump({str(k): v for k, v in names.items()}, f)
+
+
+def _load_names(path):
+    with open(_names_path(path), "r", encoding="utf-8") as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def ensure_exported(model_name, backend, input_size, cache_dir, int8=False,
+                    calibration_source=None, calibration_frames=200):
+    """
+    Devuelve el modelo exportado, exportándolo solo si no está ya en caché
+
+    Args:
+        model_name: Nombre del modelo (yolov8n...)
+        backend: onnxruntime u openvino
+        input_size: Tupla (ancho, alto)
+        cache_dir: Directorio de la caché
+        int8: Cuantización estática INT8
+        calibration_source: Vídeo, carpeta o imagen con frames grabados (obligatorio con int8)
+        calibration_frames: Número de frames de calibración
+
+    Returns:
+        path: Ruta del modelo exportado
+        names: Diccionario id de clase -> nombre
+    """
+    if backend not in BACKEND_EXTENSIONS:
+        raise ValueError(f"Backend sin exportación: {backend}")
+
+    path = artefact_path(cache_dir, model_name, backend, input_size, int8)
+    if os.path.exists(path) and os.path.exists(_names_path(path)):
+        print(f"[INFO] Usando modelo exportado en caché: {path}")
+        return path, _load_names(path)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if int8:
+        if not calibration_source:
+            raise ValueError("La cuantización INT8 necesita detector.export.calibration_source")
+        # Se cuantiza a partir del modelo FP32 del mismo backend (también en caché)
+        fp32_path, names = ensure_exported(model_name, backend, input_size, cache_dir)
+        frames = load_calibration_frames(calibration_source, calibration_frames, input_size)
+        print(f"[INFO] Cuantizando {model_name} a INT8 con {len(frames)} frames de calibración...")
+        if backend == "onnxruntime":
+            _quantize_onnx(fp32_path, path, frames)
+        else:
+            _quantize_openvino(fp32_path, path, frames)
+    elif backend == "onnxruntime":
+        names = _export_onnx(model_name, input_size, path)
+    else:
+        # OpenVINO se convierte desde el ONNX FP32 en caché
+        onnx_path, names = ensure_exported(model_name, "onnxruntime", input_size, cache_dir)
+        _convert_openvino(onnx_path, path, input_size)
+
+    _save_names(path, names)
+    print(f"[INFO] Modelo exportado guardado en {path}")
+    return path, names
+
+
+def _export_onnx(model_name, input_size, path):
+    """Exporta el .pt a ONNX con Ultralytics (lote dinámico, alto y ancho fijos)"""
+    import onnx
+    from ultralytics import YOLO
+
+    width, height = input_size
+    print(f"[INFO] Exportando {model_name} a ONNX ({width}x{height}, lote dinámico)...")
+    model = YOLO(f"{model_name}.pt")
+    exported = model.export(format="onnx", imgsz=(height, width), dynamic=True, half=False)
+
+    # Ultralytics hace dinámicos lote, alto y ancho: se fijan alto y ancho a los de exportación
+    graph = onnx.load(str(exported))
+    dims = graph.graph.input[0].type.tensor_type.shape.dim
+    dims[2].dim_value = height
+    dims[3].dim_value = width
+    onnx.save(graph, path)
+    os.remove(str(exported))
+    return dict(model.names)
+
+
+def _convert_openvino(onnx_path, path, input_size):
+    """Convierte un modelo ONNX a OpenVINO IR (.xml + .bin) con lote dinámico"""
+    import openvino as ov
+
+    width, height = input_size
+    print(f"[INFO] Convirtiendo {onnx_path} a OpenVINO...")
+    model = ov.convert_model(onnx_path)
+    model.reshape([-1, 3, height, width])
+    ov.save_model(model, path, compress_to_fp16=False)
+
+
+def load_calibration_frames(source, max_frames, input_size):
+    """
+    Toma frames repartidos a lo largo de una grabación y los preprocesa como en inferencia
+
+    Args:
+        source: Vídeo, carpeta de imágenes o imagen
+        max_frames: Número máximo de frames
+        input_size: Tupla (ancho, alto)
+
+    Returns:
+        blobs: Lista de arrays (1, 3, alto, ancho) float32
+    """
+    if os.path.isdir(source):
+        total = len(list_images(source))
+    else:
+        total = video_frame_count(source)
+    stride = max(1, total // max_frames) if total else 1
+
+    blobs = []
+    for shard in build_shards([source]):
+        for index, _, frame in iter_frames(shard):
+            if index % stride:
+                continue
+            blobs.append(letterbox(frame, input_size)[0])
+            if len(blobs) >= max_frames:
+                return blobs
+    if not blobs:
+        raise ValueError(f"No se pudieron leer frames de calibración de {source}")
+    return blobs
+
+
+def _quantize_onnx(fp32_path, path, frames):
+    """Cuantización estática QDQ con ONNX Runtime"""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.iterator = iter(frames)
+
+        def get_next(self):
+            blob = next(self.iterator, None)
+            return None if blob is None else {input_name: blob}
+
+    quantize_static(
+        fp32_path,
+        path,
+        FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+
+
+def _quantize_openvino(fp32_path, path, frames):
+    """Cuantización estática INT8 con NNCF"""
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(fp32_path)
+    quantized = nncf.quantize(model, nncf.Dataset(frames), subset_size=len(frames))
+    ov.save_model(quantized, path, compress_to_fp16=False)
+
@@ -0,0 +1,61 @@
+from src.detector.backends.ultralytics_backend import UltralyticsBackend
+
+BACKENDS = ("ultralytics", "onnxruntime", "openvino")
+
+
+def parse_input_size(value):
+    """
+    Normaliza el tamaño de entrada: 640 o [ancho, alto]
+
+    Returns:
+        input_size: Tupla (ancho, alto)
+    """
+    if isinstance(value, int):
+        return value, value
+    width, height = value
+    return int(width), int(height)
+
+
+def create_backend(config, model=None):
+    """
+    Crea el backend de inferencia configurado en detector.backend
+
+    Args:
+        config: Configuración completa de la aplicación
+        model: Modelo ya construido con la interfaz de Ultralytics (fuerza el backend ultralytics)
+
+    Returns:
+        backend: InferenceBackend listo para predict()
+    """
+    detector_config = config["detector"]
+    backend = detector_config.get("backend", "ultralytics")
+    model_name = detector_config["model"]
+    confidence = detector_config["confidence"]
+    iou_threshold = detector_config.get("iou_threshold", 0.45)
+    max_det = detector_config.get("max_det", 100)
+
+    if model is not None or backend == "ultralytics":
+        return UltralyticsBackend(model_name, confidence, iou_threshold, max_det, model=model)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de inferencia desconocido: {backend}")
+
+    # Import diferido: solo se necesitan onnxruntime/openvino si se usan
+    from src.detector.backends.export_cache import ensure_exported
+
+    export_config = detector_config.get("export", {})
+    input_size = parse_input_size(export_config.get("input_size", 640))
+    path, names = ensure_exported(
+        model_name,
+        backend,
+        input_size,
+        export_config.get("cache_dir", "models/exported"),
+        int8=export_config.get("int8", False),
+        calibration_source=export_config.get("calibration_source"),
+        calibration_frames=export_config.get("calibration_frames", 200)
+    )
+    threads = export_config.get("threads", 0)
+    if backend == "onnxruntime":
+        from src.detector.backends.onnx_backend import OnnxRuntimeBackend
+        return OnnxRuntimeBackend(path, names, confidence, iou_threshold, max_det, input_size, threads)
+    from src.detector.backends.openvino_backend import OpenVINOBackend
+    return OpenVINOBackend(path, names, confidence, iou_threshold, max_det, input_size, threads)
@@ -0,0 +1,34 @@
+from src.detector.backends.base import ExportedModelBackend
+
+
+class OnnxRuntimeBackend(ExportedModelBackend):
+    """Modelo exportado a ONNX ejecutado con ONNX Runtime en CPU"""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path, names, confidence, iou_threshold, max_det, input_size, threads=0):
+        """
+        Args:
+            model_path: Ruta del archivo .onnx
+            names: Diccionario id de clase -> nombre
+            confidence, iou_threshold, max_det: Parámetros de post-procesado
+            input_size: Tupla (ancho, alto) de entrada
+            threads: Hilos intra-operación (0 = decide ONNX Runtime)
+        """
+        import onnxruntime as ort
+
+        super().__init__(names, confidence, iou_threshold, max_det, input_size)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Dimensión de lote simbólica (str) o ausente = lote dinámico
+        batch = model_input.shape[0] if model_input.shape else None
+        self._set_batch_dim(batch if isinstance(batch, int) and batch > 0 else None)
+        print(f"[INFO] Modelo ONNX cargado: {model_path}")
+
+    def infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
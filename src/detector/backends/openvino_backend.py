@@ -0,0 +1,34 @@
+from src.detector.backends.base import ExportedModelBackend
+
+
+class OpenVINOBackend(ExportedModelBackend):
+    """Modelo en formato OpenVINO IR ejecutado en CPU"""
+
+    name = "openvino"
+
+    def __init__(self, model_path, names, confidence, iou_threshold, max_det, input_size, threads=0):
+        """
+        Args:
+            model_path: Ruta del archivo .xml (el .bin debe estar al lado)
+            names: Diccionario id de clase -> nombre
+            confidence, iou_threshold, max_det: Parámetros de post-procesado
+            input_size: Tupla (ancho, alto) de entrada
+            threads: Hilos de inferencia (0 = decide OpenVINO)
+        """
+        import openvino as ov
+
+        super().__init__(names, confidence, iou_threshold, max_det, input_size)
+        core = ov.Core()
+        properties = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            properties["INFERENCE_NUM_THREADS"] = threads
+        self.compiled_model = core.compile_model(model_path, "CPU", properties)
+        # Una única petición reutilizada: evita reservar tensores en cada frame
+        self.request = self.compiled_model.create_infer_request()
+        batch = self.compiled_model.input(0).get_partial_shape()[0]
+        self._set_batch_dim(None if batch.is_dynamic else batch.get_length())
+        print(f"[INFO] Modelo OpenVINO cargado: {model_path}")
+
+    def infer(self, blob):
+        self.request.infer({0: blob})
+        return self.request.get_output_tensor(0).data
@@ -0,0 +1,54 @@
+from src.detector.backends.base import InferenceBackend
+
+
+class UltralyticsBackend(InferenceBackend):
+    """Modelo PyTorch (.pt) ejecutado con Ultralytics"""
+
+    name = "ultralytics"
+
+    def __init__(self, model_name, confidence, iou_threshold, max_det, model=None):
+        """
+        Args:
+            model_name: Nombre del modelo (yolov8n, yolov8s...)
+            confidence, iou_threshold, max_det: Parámetros de inferencia
+            model: Modelo ya construido con la interfaz de Ultralytics (None = cargar desde disco)
+        """
+        super().__init__(confidence, iou_threshold, max_det)
+        self.model_name = model_name
+        self.model = model if model is not None else self._load_model()
+        self.names = self.model.names
+
+    def _load_model(self):
+        """Carga el modelo YOLO usando Ultralytics"""
+        from ultralytics import YOLO
+
+        print(f"[INFO] Cargando modelo {self.model_name}...")
+
+        try:
+            model = YOLO(f"{self.model_name}.pt")
+            print(f"[INFO] Modelo {self.model_name} cargado correctamente")
+        except Exception as e:
+            print(f"[ERROR] Error cargando modelo: {e}")
+            print("[INFO] Intentando descargar modelo...")
+            # La primera vez que se usa, Ultralytics descargará el modelo automáticamente
+            model = YOLO(f"{self.model_name}.pt")
+        return model
+
+    def predict(self, frames):
+        """
+        Ejecuta el modelo sobre una lista de frames con una sola llamada
+
+        Args:
+            frames: Lista de imágenes BGR
+
+        Returns:
+            outputs: Lista de arrays (N, 6) [x1, y1, x2, y2, conf, cls]
+        """
+        results = self.model(
+            frames,
+            conf=self.confidence,
+            iou=self.iou_threshold,
+            max_det=self.max_det
+        )
+        # boxes.data es (N, 6) [x1, y1, x2, y2, conf, cls] (o (N, 7) con id de tracking)
+        return [result.boxes.data.cpu().numpy() for result in results]
@@ -0,0 +1,302 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: bloqueo con msvcrt
+    fcntl = None
+    import msvcrt
+
+# Sección usada por una sola cámara y por los archivos antiguos (formato plano)
+DEFAULT_KEY = "default"
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Bloqueo exclusivo entre procesos sobre path + ".lock" (espera hasta obtenerlo)
+
+    Args:
+        path: Ruta del archivo protegido
+    """
+    with open(f"{path}.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK reintenta durante ~10 s y luego falla: seguir esperando
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def get_store(path, watch_interval=1.0, debounce=0.5):
+    """
+    Almacén de calibración compartido por todos los calculadores del proceso que usan el mismo archivo
+
+    Args:
+        path: Ruta del archivo JSON de calibración
+        watch_interval: Segundos entre comprobaciones de cambios externos (0 = sin recarga)
+        debounce: Segundos que se agrupan los cambios antes de escribir
+
+    Returns:
+        store: CalibrationStore
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = CalibrationStore(path, watch_interval, debounce)
+            _stores[key] = store
+        store.users += 1
+        return store
+
+
+def release_store(store):
+    """
+    Suelta una referencia obtenida con get_store; la última escribe lo pendiente y detiene el hilo
+
+    Args:
+        store: CalibrationStore devuelto por get_store
+    """
+    with _stores_lock:
+        store.users -= 1
+        if store.users > 0:
+            return
+        _stores.pop(os.path.abspath(store.path), None)
+    store.close()
+
+
+def parse_calibration(data):
+    """
+    Normaliza el contenido del archivo a {"cameras": {clave: {clase: {...}}}}
+
+    Args:
+        data: JSON cargado (formato por cámaras o formato plano antiguo clase -> valores)
+
+    Returns:
+        cameras: Diccionario clave de cámara -> calibración por clase
+    """
+    if not isinstance(data, dict):
+        return {}
+    cameras = data.get("cameras")
+    if isinstance(cameras, dict):
+        return cameras
+    # Formato antiguo: toda la calibración pertenece a la cámara por defecto
+    return {DEFAULT_KEY: data} if data else {}
+
+
+class CalibrationStore:
+    """
+    Calibración por cámara con escritura en segundo plano (agrupada y atómica) y recarga
+    automática cuando otro proceso modifica el archivo.
+
+    Los lectores nunca bloquean: cada cambio sustituye el diccionario completo y aumenta
+    version, así que basta comparar un entero para saber si hay que reconstruir tablas.
+    """
+
+    def __init__(self, path, watch_interval=1.0, debounce=0.5):
+        """
+        Args:
+            path: Ruta del archivo JSON de calibración
+            watch_interval: Segundos entre comprobaciones de cambios externos (0 = sin recarga)
+            debounce: Segundos que se agrupan los cambios antes de escribir
+        """
+        self.path = path
+        self.watch_interval = watch_interval
+        self.debounce = debounce
+        self.cameras = {}
+        self.version = 0
+        self.file_stat = None
+
+        self.condition = threading.Condition()
+        # Serializa las escrituras del hilo de fondo y de flush(); nunca se toma al leer
+        self.write_lock = threading.Lock()
+        self.dirty = set()
+        self.write_deadline = None
+        self.writes = 0
+        self.reloads = 0
+        # Calculadores que comparten el almacén (ver get_store / release_store)
+        self.users = 0
+        self.stopped = False
+
+        self.reload()
+        self.thread = threading.Thread(target=self._loop, name="calibration-store", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def section(self, key):
+        """
+        Calibración de una cámara (o la de la cámara por defecto si no tiene propia)
+
+        Args:
+            key: Clave de la cámara
+
+        Returns:
+            calibration: Diccionario clase -> {focal_length, correction_factor}; no modificar
+        """
+        cameras = self.cameras
+        return cameras.get(key) or cameras.get(DEFAULT_KEY) or {}
+
+    def update(self, key, class_name, values):
+        """
+        Actualiza la calibración de una clase y programa la escritura (no bloquea)
+
+        Args:
+            key: Clave de la cámara
+            class_name: Nombre de la clase calibrada
+            values: Diccionario con focal_length y correction_factor
+        """
+        with self.condition:
+            cameras = dict(self.cameras)
+            # Una cámara sin sección propia parte de la calibración por defecto
+            section = dict(self.section(key))
+            section[class_name] = {**section.get(class_name, {}), **values}
+            cameras[key] = section
+            self.cameras = cameras
+            self.version += 1
+            self.dirty.add(key)
+            if self.write_deadline is None:
+                self.write_deadline = time.monotonic() + self.debounce
+            self.condition.notify()
+
+    def flush(self):
+        """Escribe de inmediato los cambios pendientes"""
+        self._write(self._take_pending())
+
+    def close(self):
+        """
+        Detiene el hilo de fondo y escribe los cambios pendientes. No depende de atexit,
+        que no se ejecuta en procesos hijos que terminan con os._exit (multiprocessing).
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join(timeout=5.0)
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def _take_pending(self):
+        """Secciones modificadas pendientes de escribir (y las marca como escritas)"""
+        with self.condition:
+            pending = {key: self.cameras.get(key, {}) for key in self.dirty}
+            self.dirty.clear()
+            self.write_deadline = None
+            return pending
+
+    def reload(self):
+        """
+        Recarga el archivo si cambió desde la última lectura o escritura
+
+        Returns:
+            changed: True si se cargó una calibración nueva
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.file_stat:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cameras = parse_calibration(json.load(f))
+        except (OSError, ValueError) as e:
+            # Archivo a medio escribir por un editor externo: se reintenta en la próxima comprobación
+            print(f"[WARNING] Error cargando calibración: {e}")
+            return False
+        with self.condition:
+            # Los cambios locales aún no escritos tienen prioridad sobre el archivo
+            for key in self.dirty:
+                cameras[key] = self.cameras.get(key, {})
+            self.cameras = cameras
+            self.version += 1
+            self.file_stat = signature
+        if self.reloads or self.writes:
+            print(f"[INFO] Calibración recargada desde {self.path}")
+        self.reloads += 1
+        return True
+
+    def _write(self, pending):
+        """
+        Fusiona las cámaras modificadas con el archivo actual y lo reemplaza atómicamente
+
+        Args:
+            pending: Diccionario clave de cámara -> calibración a escribir
+        """
+        if not pending:
+            return
+        with self.write_lock:
+            self._replace_file(pending)
+
+    def _replace_file(self, pending):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Leer-fusionar-sustituir bajo bloqueo: sin él, dos procesos que escriben a la
+            # vez pierden las secciones del otro
+            with file_lock(self.path):
+                # Conservar las secciones que otros procesos hayan escrito mientras tanto
+                cameras = {}
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        cameras = parse_calibration(json.load(f))
+                cameras.update(pending)
+
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"cameras": cameras}, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+
+                stat = os.stat(self.path)
+                self.file_stat = (stat.st_mtime_ns, stat.st_size)
+            self.writes += 1
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Error guardando calibración: {e}")
+
+    def _loop(self):
+        next_check = time.monotonic() + self.watch_interval
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                now = time.monotonic()
+                timeouts = []
+                if self.write_deadline is not None:
+                    timeouts.append(self.write_deadline - now)
+                if self.watch_interval:
+                    timeouts.append(next_check - now)
+                if not timeouts or min(timeouts) > 0:
+                    self.condition.wait(min(timeouts) if timeouts else None)
+                if self.stopped:
+                    # close() hace la última escritura
+                    return
+                due = self.write_deadline is not None and time.monotonic() >= self.write_deadline
+            # La escritura se hace fuera del candado: update() nunca espera por el disco
+            if due:
+                self._write(self._take_pending())
+            if self.watch_interval and time.monotonic() >= next_check:
+                self.reload()
+                next_check = time.monotonic() + self.watch_interval
@@ -0,0 +1,159 @@
+import numpy as np
+
+
+class Detections:
+    """Detecciones de un frame en formato columnar (un array por campo)"""
+
+    __slots__ = ("class_id", "conf", "x", "y", "w", "h", "names", "track_id", "distance", "evicted")
+
+    def __init__(self, class_id, conf, x, y, w, h, names, track_id=None, distance=None):
+        """
+        Inicializa el contenedor columnar
+
+        Args:
+            class_id: Array int con el id de clase de cada detección
+            conf: Array float con la confianza
+            x, y: Arrays int con la esquina superior izquierda
+            w, h: Arrays int con ancho y alto en píxeles
+            names: Diccionario id de clase -> nombre (model.names)
+            track_id: Array int opcional con el id de seguimiento
+            distance: Array float opcional con distancias (NaN = sin distancia)
+        """
+        # object_id de tracks eliminados en este frame (los rellena el tracker)
+        self.evicted = []
+        self.class_id = class_id
+        self.conf = conf
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.names = names
+        self.track_id = track_id
+        self.distance = distance
+
+    @classmethod
+    def empty(cls, names):
+        """
+        Crea un contenedor sin detecciones
+
+        Args:
+            names: Diccionario id de clase -> nombre
+
+        Returns:
+            detections: Detections vacío
+        """
+        ints = np.empty(0, dtype=np.int32)
+        return cls(ints, np.empty(0, dtype=np.float32), ints, ints, ints, ints, names)
+
+    @classmethod
+    def from_xyxy(cls, data, names):
+        """
+        Construye las columnas a partir de una matriz (N, 6) [x1, y1, x2, y2, conf, cls]
+
+        Args:
+            data: Array NumPy con una fila por detección
+            names: Diccionario id de clase -> nombre
+
+        Returns:
+            detections: Detections con coordenadas enteras (x, y, w, h)
+        """
+        if len(data) == 0:
+            return cls.empty(names)
+        # Truncado a entero igual que map(int, xyxy)
+        xyxy = data[:, :4].astype(np.int32)
+        x = xyxy[:, 0]
+        y = xyxy[:, 1]
+        return cls(
+            data[:, -1].astype(np.int32),
+            data[:, -2].astype(np.float32),
+            x,
+            y,
+            xyxy[:, 2] - x,
+            xyxy[:, 3] - y,
+            names
+        )
+
+    def __len__(self):
+        return len(self.class_id)
+
+    def boxes(self):
+        """
+        Devuelve las cajas como matriz (N, 4) [x, y, w, h]
+
+        Returns:
+            boxes: Array int con las cajas
+        """
+        return np.stack((self.x, self.y, self.w, self.h), axis=1)
+
+    def instance_ids(self):
+        """
+        Índice (desde 1) de cada detección dentro de su clase, en orden de aparición
+
+        Returns:
+            ids: Array int con el ordinal por clase
+        """
+        n = len(self.class_id)
+        if n == 0:
+            return np.empty(0, dtype=np.int32)
+        order = np.argsort(self.class_id, kind="stable")
+        sorted_ids = self.class_id[order]
+        positions = np.arange(n)
+        group_start = np.zeros(n, dtype=bool)
+        group_start[0] = True
+        group_start[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        starts = np.maximum.accumulate(np.where(group_start, positions, 0))
+        ids = np.empty(n, dtype=np.int32)
+        ids[order] = positions - starts + 1
+        return ids
+
+    def object_ids(self):
+        """
+        Identificadores de objeto con el formato "<clase>_<n>"
+
+        Returns:
+            ids: Lista de strings (usa track_id si existe)
+        """
+        numbers = self.track_id if self.track_id is not None else self.instance_ids()
+        names = self.names
+        return [f"{names[c]}_{n}" for c, n in zip(self.class_id.tolist(), numbers.tolist())]
+
+    def counts(self):
+        """
+        Conteo de objetos por clase en orden de primera aparición
+
+        Returns:
+            object_counts: Diccionario nombre de clase -> número de detecciones
+        """
+        if len(self.class_id) == 0:
+            return {}
+        classes, first, counts = np.unique(self.class_id, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        return {self.names[int(classes[i])]: int(counts[i]) for i in order}
+
+    def to_list(self):
+        """
+        Vista de compatibilidad: lista de diccionarios como la que devolvía detect()
+
+        Returns:
+            detections: Lista de detecciones con class_name, confidence, box y object_id
+                        (y distance si ya se calculó)
+        """
+        names = self.names
+        object_ids = self.object_ids()
+        detections = [
+            {
+                "class_name": names[c],
+                "confidence": conf,
+                "box": (x, y, w, h),
+                "object_id": object_id
+            }
+            for c, conf, x, y, w, h, object_id in zip(
+                self.class_id.tolist(), self.conf.tolist(),
+                self.x.tolist(), self.y.tolist(), self.w.tolist(), self.h.tolist(),
+                object_ids
+            )
+        ]
+        if self.distance is not None:
+            for det, distance in zip(detections, self.distance.tolist()):
+                det["distance"] = None if distance != distance else distance  # NaN -> None
+        return detections
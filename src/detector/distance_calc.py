@@ -1,29 +1,206 @@
-from collections import deque
 import numpy as np
 import cv2
-import json
-import os
+from src.detector.smoothing import DistanceSmoother
+from src.detector.calibration_store import get_store, release_store, DEFAULT_KEY
+from utils.config_loader import DistanceParams
 
 class DistanceCalculator:
     """Clase para cálculo de distancias a objetos detectados"""
     
-    def __init__(self, config):
+    def __init__(self, config, calibration_key=None):
         """
         Inicializa el calculador de distancia
         
         Args:
             config: Configuración con parámetros de distancia y tamaños de objetos
+            calibration_key: Cámara cuya calibración se usa (None = distance.calibration_key)
         """
         self.config = config
-        self.distance_history = {}
         self.focal_length = config["distance"]["focal_length"]
         self.smooth_frames = config["distance"]["smooth_frames"]
         self.object_sizes = config["object_sizes"]
         self.max_distance = config["distance"].get("max_distance", 500)
         self.min_size_px = config["distance"].get("min_size_px", 20)
+        # Por debajo de este número de detecciones el bucle en Python puro es más rápido
+        # que el camino NumPy (sobrecoste fijo por llamada); ver benchmarks/bench_distance.py
+        self.vectorize_min_detections = config["distance"].get("vectorize_min_detections", 32)
+        
+        # Historial de distancias por objeto (preasignado y vectorizado)
+        self.smoothing_params = DistanceParams.from_config(config)
+        self.smoother = self._create_smoother(self.smoothing_params)
+        
+        # Calibración por cámara, compartida en el proceso y recargada si cambia el archivo
+        distance_config = config["distance"]
+        self.calibration_key = calibration_key or distance_config.get("calibration_key", DEFAULT_KEY)
+        self.calibration = get_store(
+            distance_config.get("calibration_file", "config/calibration.json"),
+            watch_interval=distance_config.get("calibration_watch_s", 1.0),
+            debounce=distance_config.get("calibration_debounce_s", 0.5)
+        )
+        
+        # Tablas por id de clase para el cálculo vectorizado (se construyen bajo demanda)
+        self._lut_version = None
+        self._lut_names = None
+        self._lut_valid = None
+        self._lut_is_person = None
+        self._lut_use_height = None
+        self._lut_distance_factor = None
+        self._lut_rows = None
+    
+    def _build_lookup_tables(self, names):
+        """
+        Precalcula por id de clase el tamaño real, eje de referencia, focal y corrección
+        
+        Args:
+            names: Diccionario id de clase -> nombre (model.names)
+        """
+        # La versión se lee antes de la calibración: un cambio concurrente fuerza otra reconstrucción
+        self._lut_version = self.calibration.version
+        calibration_data = self.calibration_data
+        size = max(names.keys()) + 1 if names else 0
+        valid = np.zeros(size, dtype=bool)
+        is_person = np.zeros(size, dtype=bool)
+        use_height = np.zeros(size, dtype=bool)
+        # real_size * focal_length * correction_factor combinados en un único factor
+        distance_factor = np.zeros(size, dtype=np.float64)
+        # Misma tabla como diccionario para el camino escalar: id -> (persona, altura, factor)
+        rows = {}
+        
+        for class_id, class_name in names.items():
+            if class_name not in self.object_sizes:
+                continue
+            obj_info = self.object_sizes[class_name]
+            calibration = calibration_data.get(class_name, {})
+            
+            # Las personas siempre usan la altura
+            person = class_name == "person"
+            height_ref = person or obj_info.get("reference") == "height"
+            real_size = obj_info["height"] if height_ref else obj_info["width"]
+            
+            focal_length = calibration.get("focal_length", self.focal_length)
+            correction_factor = obj_info.get("correction_factor", 1.0) * calibration.get("correction_factor", 1.0)
+            
+            valid[class_id] = True
+            is_person[class_id] = person
+            use_height[class_id] = height_ref
+            distance_factor[class_id] = real_size * focal_length * correction_factor
+            rows[class_id] = (person, height_ref, float(distance_factor[class_id]))
+        
+        self._lut_rows = rows
+        self._lut_valid = valid
+        self._lut_is_person = is_person
+        self._lut_use_height = use_height
+        self._lut_distance_factor = distance_factor
+        self._lut_names = names
+    
+    @property
+    def calibration_data(self):
+        """Calibración vigente de esta cámara (clase -> focal_length, correction_factor)"""
+        return self.calibration.section(self.calibration_key)
+    
+    def calculate_distances(self, detections, frame_height):
+        """
+        Calcula la distancia de todas las detecciones de un frame de forma vectorizada
         
-        # Cargar calibración si existe
-        self.calibration_data = self._load_calibration()
+        Args:
+            detections: Detections columnar del frame
+            frame_height: Altura total del frame
+            
+        Returns:
+            distances: Array float con distancias en cm (NaN si no se puede calcular);
+                       también se asigna a detections.distance
+        """
+        # Liberar el historial de los tracks que el tracker dio por perdidos
+        for object_id in detections.evicted:
+            self.smoother.release(object_id)
+        
+        n = len(detections)
+        distances = np.full(n, np.nan)
+        detections.distance = distances
+        if n == 0:
+            return distances
+        
+        if self._lut_names is not detections.names or self._lut_version != self.calibration.version:
+            self._build_lookup_tables(detections.names)
+        
+        if n < self.vectorize_min_detections:
+            return self._calculate_few(detections, frame_height, distances)
+        
+        class_id = detections.class_id
+        w = detections.w.astype(np.float64)
+        h = detections.h.astype(np.float64)
+        y = detections.y
+        
+        # Clases conocidas y tamaño mínimo
+        known = np.zeros(n, dtype=bool)
+        in_table = class_id < len(self._lut_valid)
+        known[in_table] = self._lut_valid[class_id[in_table]]
+        mask = known & (w >= self.min_size_px) & (h >= self.min_size_px)
+        if not mask.any():
+            return distances
+        
+        idx = np.flatnonzero(mask)
+        cid = class_id[idx]
+        size_px = np.where(self._lut_use_height[cid], h[idx], w[idx])
+        
+        # Porción visible de las personas (mismas reglas que calculate_person_distance)
+        y_sel = y[idx]
+        bottom = y_sel + h[idx]
+        touches_bottom = bottom >= frame_height - 10
+        below_top = y_sel > 10
+        visible_portion = np.ones(len(idx))
+        visible_portion[touches_bottom & below_top] = 0.75
+        visible_portion[~touches_bottom & below_top] = 0.6
+        visible_portion[~self._lut_is_person[cid]] = 1.0
+        
+        raw = self._lut_distance_factor[cid] * visible_portion / size_px
+        np.minimum(raw, self.max_distance, out=raw)
+        
+        # Suavizado temporal de todos los objetos en una sola pasada (IDs solo de los válidos)
+        numbers = detections.track_id if detections.track_id is not None else detections.instance_ids()
+        names = detections.names
+        object_ids = [f"{names[c]}_{i}" for c, i in zip(cid.tolist(), numbers[idx].tolist())]
+        distances[idx] = self.smoother.update(object_ids, raw)
+        
+        return distances
+    
+    def _calculate_few(self, detections, frame_height, distances):
+        """
+        Camino escalar de calculate_distances para pocas detecciones (mismas reglas y tablas)
+        
+        Args:
+            detections: Detections columnar del frame
+            frame_height: Altura total del frame
+            distances: Array de salida relleno de NaN
+            
+        Returns:
+            distances: El mismo array con las distancias calculadas
+        """
+        rows = self._lut_rows
+        names = detections.names
+        min_size_px = self.min_size_px
+        max_distance = self.max_distance
+        smoother = self.smoother
+        track_ids = detections.track_id.tolist() if detections.track_id is not None else None
+        # Ordinal por clase en orden de aparición (igual que Detections.instance_ids)
+        instances = {}
+        columns = zip(detections.class_id.tolist(), detections.y.tolist(),
+                      detections.w.tolist(), detections.h.tolist())
+        for i, (class_id, y, w, h) in enumerate(columns):
+            if track_ids is None:
+                number = instances[class_id] = instances.get(class_id, 0) + 1
+            else:
+                number = track_ids[i]
+            row = rows.get(class_id)
+            if row is None or w < min_size_px or h < min_size_px:
+                continue
+            person, use_height, factor = row
+            visible_portion = 1.0
+            if person and y > 10:
+                visible_portion = 0.75 if y + h >= frame_height - 10 else 0.6
+            distance = min(factor * visible_portion / (h if use_height else w), max_distance)
+            distances[i] = smoother.update_one(f"{names[class_id]}_{number}", distance)
+        return distances
     
     def calculate_distance(self, class_name, width_px, height_px, x, y, frame_height, object_id):
         """
@@ -160,39 +337,42 @@ class DistanceCalculator:
         Returns:
             smoothed_distance: Distancia suavizada
         """
-        # Inicializar historial si no existe para este objeto
-        if object_id not in self.distance_history:
-            self.distance_history[object_id] = deque(maxlen=self.smooth_frames)
-            
-        # Añadir medición actual al historial
-        self.distance_history[object_id].append(distance)
-        
-        # Para estabilidad, necesitamos al menos 3 mediciones
-        if len(self.distance_history[object_id]) < 3:
-            return distance
-        
-        # Convertir a array para operaciones estadísticas
-        distance_array = np.array(self.distance_history[object_id])
-        
-        # MEJORA: Usar filtro de mediana para eliminar valores atípicos
-        # Esto es más robusto que un promedio simple
-        median_distance = np.median(distance_array)
-        mad = np.median(np.abs(distance_array - median_distance))  # Median Absolute Deviation
-        
-        # Filtrar distancias que están a más de 2 MAD de la mediana
-        if mad > 0:  # Evitar división por cero
-            filtered_distances = distance_array[np.abs(distance_array - median_distance) <= 2 * mad]
-            if len(filtered_distances) > 0:
-                # MEJORA: Usar promedio ponderado dando más peso a mediciones recientes
-                weights = np.linspace(0.5, 1.0, len(filtered_distances))
-                return np.average(filtered_distances, weights=weights)
-        
-        # Si no se pudo aplicar filtrado avanzado, usar mediana
-        return median_distance
+        return self.smoother.update_one(object_id, distance)
         
     def reset_tracking(self):
         """Resetea el historial de distancias"""
-        self.distance_history = {}
+        self.smoother.reset()
+    
+    @staticmethod
+    def _create_smoother(params):
+        """Crea el motor de suavizado a partir de DistanceParams"""
+        return DistanceSmoother(
+            params.smooth_frames,
+            method=params.smoothing,
+            ema_alpha=params.ema_alpha,
+            process_noise=params.process_noise,
+            measurement_noise=params.measurement_noise
+        )
+    
+    def apply_runtime(self, runtime):
+        """
+        Aplica parámetros recargados en caliente (llamar con la inferencia detenida o bajo su candado)
+        
+        Args:
+            runtime: RuntimeConfig compilado
+        """
+        params = runtime.distance
+        self.max_distance = params.max_distance
+        self.min_size_px = params.min_size_px
+        # Un suavizado distinto empieza con historial vacío
+        smoothing = (params.smoothing, params.smooth_frames, params.ema_alpha,
+                     params.process_noise, params.measurement_noise)
+        current = self.smoothing_params
+        if smoothing != (current.smoothing, current.smooth_frames, current.ema_alpha,
+                         current.process_noise, current.measurement_noise):
+            self.smoother = self._create_smoother(params)
+            self.smooth_frames = params.smooth_frames
+        self.smoothing_params = params
     
     def calibrate(self, class_name, real_distance, pixel_size, is_height=False):
         """
@@ -218,47 +398,27 @@ class DistanceCalculator:
         # Calcular focal_length específico para este objeto
         focal_length = (pixel_size * real_distance) / real_size
         
-        # Inicializar datos de calibración para esta clase si no existen
-        if class_name not in self.calibration_data:
-            self.calibration_data[class_name] = {}
-        
-        # Guardar focal_length calibrado
-        self.calibration_data[class_name]["focal_length"] = focal_length
-        
         # Calcular factor de corrección comparando con distancia estimada usando focal_length normal
         estimated_distance = (real_size * self.focal_length) / pixel_size
         correction_factor = real_distance / estimated_distance
-        self.calibration_data[class_name]["correction_factor"] = correction_factor
         
-        # Guardar calibración
-        self._save_calibration()
+        # Guardar calibración: el almacén escribe en segundo plano y la nueva versión
+        # fuerza la reconstrucción de las tablas vectorizadas
+        self.calibration.update(self.calibration_key, class_name, {
+            "focal_length": focal_length,
+            "correction_factor": correction_factor
+        })
         
         print(f"[INFO] Calibración para '{class_name}' guardada: focal_length={focal_length:.2f}, factor={correction_factor:.2f}")
         return True
     
-    def _load_calibration(self):
+    def close(self):
         """
-        Carga datos de calibración desde archivo
-        
-        Returns:
-            calibration_data: Diccionario con datos de calibración
+        Escribe la calibración pendiente y suelta el almacén compartido (el último
+        calculador que lo usa detiene su hilo). Llamar una vez al terminar.
         """
-        calibration_file = "config/calibration.json"
-        if os.path.exists(calibration_file):
-            try:
-                with open(calibration_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"[WARNING] Error cargando calibración: {e}")
-        
-        return {}
-    
-    def _save_calibration(self):
-        """Guarda datos de calibración en archivo"""
-        calibration_file = "config/calibration.json"
-        try:
-            os.makedirs(os.path.dirname(calibration_file), exist_ok=True)
-            with open(calibration_file, 'w') as f:
-                json.dump(self.calibration_data, f, indent=4)
-        except Exception as e:
-            print(f"[ERROR] Error guardando calibración: {e}")
\ No newline at end of file
+        if self.calibration is None:
+            return
+        self.calibration.flush()
+        release_store(self.calibration)
+        self.calibration = None
\ No newline at end of file
@@ -0,0 +1,242 @@
+import time
+import warnings
+import cv2
+import numpy as np
+from src.detector.detections import Detections
+
+
+def downsample_gray(frame, size=(64, 36)):
+    """
+    Reduce un frame a una miniatura en escala de grises para comparaciones baratas
+
+    Args:
+        frame: Imagen BGR
+        size: Tamaño (ancho, alto) de la miniatura
+
+    Returns:
+        small: Miniatura uint8
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def scene_change(previous, current):
+    """
+    Diferencia media absoluta entre dos miniaturas (0-255)
+
+    Args:
+        previous: Miniatura del frame de referencia
+        current: Miniatura del frame actual
+
+    Returns:
+        change: Diferencia media por píxel
+    """
+    return float(cv2.absdiff(previous, current).mean())
+
+
+class AdaptiveFrameSkipper:
+    """Ejecuta el detector cada K frames y propaga las cajas en los intermedios"""
+
+    def __init__(self, config, detector):
+        """
+        Inicializa el salto adaptativo de frames
+
+        Args:
+            config: Configuración completa (usa detector.frame_skip)
+            detector: YOLODetector
+        """
+        skip_config = config["detector"].get("frame_skip", {})
+        self.detector = detector
+        self.target_fps = skip_config.get("target_fps", 15)
+        self.min_interval = skip_config.get("min_interval", 1)
+        self.max_interval = skip_config.get("max_interval", 8)
+        self.scene_threshold = skip_config.get("scene_threshold", 12.0)
+        self.propagation = skip_config.get("propagation", "velocity")
+        self.flow_scale = skip_config.get("flow_scale", 0.5)
+
+        self.interval = self.min_interval
+        self.frames_since_detection = 0
+
+        # Estado del último frame detectado y del último frame procesado
+        self.reference_small = None
+        self.anchor = None
+        self.offsets = None
+        self.previous_gray = None
+        self.track_velocity = {}
+        self.last_positions = {}
+
+        # Tiempos medios (EMA) de detección y propagación en segundos
+        self.detect_time = None
+        self.propagate_time = 0.0
+
+        # Estadísticas
+        self.frames = 0
+        self.detections_run = 0
+        self.scene_triggers = 0
+
+    def process(self, frame):
+        """
+        Devuelve las detecciones del frame, detectando o propagando según el intervalo
+
+        Args:
+            frame: Imagen a procesar
+
+        Returns:
+            detections: Detections del frame
+        """
+        self.frames += 1
+        small = downsample_gray(frame)
+
+        run_detector = (
+            self.anchor is None
+            or self.frames_since_detection + 1 >= self.interval
+        )
+        if not run_detector and scene_change(self.reference_small, small) > self.scene_threshold:
+            self.scene_triggers += 1
+            run_detector = True
+
+        start = time.monotonic()
+        if run_detector:
+            detections = self.detector.detect_columnar(frame)
+            self._update_velocities(detections)
+            self.anchor = detections
+            self.offsets = np.zeros((len(detections), 2))
+            self.reference_small = small
+            self.frames_since_detection = 0
+            self.detections_run += 1
+            elapsed = time.monotonic() - start
+            self.detect_time = elapsed if self.detect_time is None else 0.8 * self.detect_time + 0.2 * elapsed
+            self._adapt_interval()
+        else:
+            detections = self._propagate(frame)
+            self.frames_since_detection += 1
+            elapsed = time.monotonic() - start
+            self.propagate_time = 0.8 * self.propagate_time + 0.2 * elapsed
+
+        if self.propagation == "optical_flow":
+            self.previous_gray = self._flow_gray(frame)
+        return detections
+
+    def get_stats(self):
+        """
+        Devuelve estadísticas del salto de frames
+
+        Returns:
+            stats: Diccionario con intervalo actual y proporción de frames detectados
+        """
+        return {
+            "interval": self.interval,
+            "frames": self.frames,
+            "detections_run": self.detections_run,
+            "detect_ratio": self.detections_run / self.frames if self.frames else 0.0,
+            "scene_triggers": self.scene_triggers,
+            "detect_ms": (self.detect_time or 0.0) * 1000,
+            "propagate_ms": self.propagate_time * 1000
+        }
+
+    def _adapt_interval(self):
+        """
+        Ajusta K para que el coste medio por frame alcance el FPS objetivo:
+        (t_det + (K - 1) * t_prop) / K <= 1 / target_fps
+        """
+        budget = 1.0 / self.target_fps
+        if self.detect_time <= budget:
+            interval = self.min_interval
+        elif self.propagate_time >= budget:
+            interval = self.max_interval
+        else:
+            interval = int(np.ceil((self.detect_time - self.propagate_time) / (budget - self.propagate_time)))
+        self.interval = int(np.clip(interval, self.min_interval, self.max_interval))
+
+    def _update_velocities(self, detections):
+        """Estima la velocidad (píxeles/frame) de cada track entre dos detecciones"""
+        if detections.track_id is None:
+            self.track_velocity = {}
+            self.last_positions = {}
+            return
+        steps = max(self.frames_since_detection + 1, 1)
+        positions = {}
+        velocity = {}
+        for track_id, x, y in zip(detections.track_id.tolist(), detections.x.tolist(), detections.y.tolist()):
+            positions[track_id] = (x, y)
+            previous = self.last_positions.get(track_id)
+            if previous is not None:
+                velocity[track_id] = ((x - previous[0]) / steps, (y - previous[1]) / steps)
+        self.last_positions = positions
+        self.track_velocity = velocity
+
+    def _flow_gray(self, frame):
+        """Frame en grises y reducido para el flujo óptico"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.flow_scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.flow_scale, fy=self.flow_scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _propagate(self, frame):
+        """
+        Desplaza las cajas de la última detección con el modelo de movimiento configurado
+
+        Args:
+            frame: Frame actual
+
+        Returns:
+            detections: Detections con las cajas desplazadas
+        """
+        anchor = self.anchor
+        n = len(anchor)
+        if n == 0:
+            return Detections.empty(anchor.names)
+
+        # El desplazamiento se acumula en coma flotante desde la última detección
+        if self.propagation == "optical_flow" and self.previous_gray is not None:
+            self.offsets += self._flow_offsets(frame, anchor)
+        elif anchor.track_id is not None and self.track_velocity:
+            for i, track_id in enumerate(anchor.track_id.tolist()):
+                velocity = self.track_velocity.get(track_id)
+                if velocity is not None:
+                    self.offsets[i] += velocity
+
+        return Detections(
+            anchor.class_id,
+            anchor.conf,
+            np.rint(anchor.x + self.offsets[:, 0]).astype(np.int32),
+            np.rint(anchor.y + self.offsets[:, 1]).astype(np.int32),
+            anchor.w,
+            anchor.h,
+            anchor.names,
+            track_id=anchor.track_id
+        )
+
+    def _flow_offsets(self, frame, anchor):
+        """
+        Desplazamiento de cada caja como mediana del flujo óptico de una rejilla 3x3 de puntos
+
+        Args:
+            frame: Frame actual
+            anchor: Detections de la última detección
+
+        Returns:
+            offsets: Array (N, 2) con el desplazamiento en píxeles del frame completo
+        """
+        gray = self._flow_gray(frame)
+        scale = self.flow_scale
+        n = len(anchor)
+        x = anchor.x + self.offsets[:, 0]
+        y = anchor.y + self.offsets[:, 1]
+
+        # Rejilla 3x3 dentro de cada caja (en coordenadas reducidas)
+        fractions = np.array([0.25, 0.5, 0.75])
+        fx, fy = np.meshgrid(fractions, fractions)
+        px = (x[:, None] + anchor.w[:, None] * fx.ravel()[None, :]) * scale
+        py = (y[:, None] + anchor.h[:, None] * fy.ravel()[None, :]) * scale
+        points = np.stack((px.ravel(), py.ravel()), axis=1).astype(np.float32).reshape(-1, 1, 2)
+
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.previous_gray, gray, points, None,
+                                                    winSize=(15, 15), maxLevel=2)
+        flow = (moved - points).reshape(n, 9, 2).astype(np.float64) / scale
+        flow[~status.reshape(n, 9).astype(bool)] = np.nan
+
+        # Mediana robusta por caja (0 si ningún punto se siguió)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nan_to_num(np.nanmedian(flow, axis=1))
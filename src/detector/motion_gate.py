@@ -0,0 +1,139 @@
+import time
+import cv2
+import numpy as np
+
+
+def fast_thumbnail(frame, size=(64, 36), prescale=4):
+    """
+    Miniatura en grises en dos pasos: reducción bilineal a prescale veces el tamaño final
+    y promedio por área. Cuesta una fracción de INTER_AREA sobre el frame completo y
+    sigue promediando suficientes píxeles para no reaccionar al ruido del sensor.
+
+    Args:
+        frame: Imagen BGR o en grises
+        size: Tamaño (ancho, alto) de la miniatura
+        prescale: Factor del tamaño intermedio
+
+    Returns:
+        small: Miniatura uint8
+    """
+    width, height = size
+    intermediate = cv2.resize(frame, (width * prescale, height * prescale), interpolation=cv2.INTER_LINEAR)
+    if intermediate.ndim == 3:
+        intermediate = cv2.cvtColor(intermediate, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(intermediate, size, interpolation=cv2.INTER_AREA)
+
+
+class MotionGate:
+    """Omite la inferencia en frames estáticos y reutiliza las últimas detecciones y distancias"""
+
+    def __init__(self, config, detect):
+        """
+        Inicializa la compuerta de movimiento
+
+        Args:
+            config: Configuración completa (usa detector.motion_gate)
+            detect: Función frame -> Detections que se ejecuta cuando la escena cambia
+        """
+        gate_config = config["detector"].get("motion_gate", {})
+        self.detect = detect
+        self.threshold = gate_config.get("threshold", 4.0)
+        self.max_stale_frames = gate_config.get("max_stale_frames", 30)
+        self.max_stale_s = gate_config.get("max_stale_ms", 2000) / 1000.0
+        self.size = tuple(gate_config.get("thumbnail_size", [64, 36]))
+
+        # Sensibilidad por región: rejilla de multiplicadores (0 = ignorar la región)
+        sensitivity = np.asarray(gate_config.get("sensitivity", [[1.0]]), dtype=np.float32)
+        if sensitivity.ndim != 2:
+            raise ValueError("motion_gate.sensitivity debe ser una rejilla (lista de filas)")
+        self.grid = (sensitivity.shape[1], sensitivity.shape[0])
+        with np.errstate(divide="ignore"):
+            # Umbral de cada celda; las celdas ignoradas nunca lo superan
+            self.cell_thresholds = np.where(sensitivity > 0, self.threshold / sensitivity, np.inf)
+
+        # Último frame inferido
+        self.reference = None
+        self.last_detections = None
+        self.last_inference_time = 0.0
+        self.frames_since_inference = 0
+        self.reused = False
+
+        # Estadísticas
+        self.frames = 0
+        self.skipped = 0
+        self.stale_refreshes = 0
+        self.gate_time = 0.0
+        self.last_change = 0.0
+
+    def changed_cells(self, small):
+        """
+        Celdas de la rejilla cuyo cambio medio respecto al frame de referencia supera su umbral
+
+        Args:
+            small: Miniatura del frame actual
+
+        Returns:
+            changed: Array booleano (filas, columnas)
+        """
+        # El promedio por área de la diferencia da el cambio medio de cada celda
+        cells = cv2.resize(cv2.absdiff(self.reference, small), self.grid, interpolation=cv2.INTER_AREA)
+        cells = cells.reshape(self.grid[1], self.grid[0]).astype(np.float32)
+        self.last_change = float(cells.max())
+        return cells > self.cell_thresholds
+
+    def process(self, frame):
+        """
+        Devuelve las detecciones del frame: nuevas si la escena cambió o las anteriores si no
+
+        Args:
+            frame: Imagen BGR
+
+        Returns:
+            detections: Detections del frame (self.reused indica si son las anteriores,
+                        que ya llevan sus distancias)
+        """
+        start = time.perf_counter()
+        self.frames += 1
+        small = fast_thumbnail(frame, self.size)
+
+        run_detector = self.reference is None or self.reference.shape != small.shape
+        if not run_detector:
+            stale = (self.frames_since_inference + 1 >= self.max_stale_frames
+                     or time.monotonic() - self.last_inference_time >= self.max_stale_s)
+            if self.changed_cells(small).any():
+                run_detector = True
+            elif stale:
+                # Escena quieta demasiado tiempo: refrescar para no arrastrar errores
+                self.stale_refreshes += 1
+                run_detector = True
+        self.gate_time += time.perf_counter() - start
+
+        if not run_detector:
+            self.skipped += 1
+            self.frames_since_inference += 1
+            self.reused = True
+            return self.last_detections
+
+        detections = self.detect(frame)
+        self.reference = small
+        self.last_detections = detections
+        self.last_inference_time = time.monotonic()
+        self.frames_since_inference = 0
+        self.reused = False
+        return detections
+
+    def get_stats(self):
+        """
+        Devuelve estadísticas de la compuerta
+
+        Returns:
+            stats: Diccionario con proporción de frames omitidos y coste medio
+        """
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+            "stale_refreshes": self.stale_refreshes,
+            "gate_ms": self.gate_time / self.frames * 1000 if self.frames else 0.0,
+            "last_change": self.last_change
+        }
@@ -0,0 +1,255 @@
+import numpy as np
+
+# Métodos de suavizado disponibles
+SMOOTHING_METHODS = ("median", "ema", "kalman")
+
+
+class DistanceSmoother:
+    """Suavizado temporal de distancias para todos los objetos en una pasada vectorizada"""
+
+    def __init__(self, window, method="median", ema_alpha=0.3, process_noise=4.0,
+                 measurement_noise=100.0, initial_capacity=64):
+        """
+        Inicializa el motor de suavizado
+
+        Args:
+            window: Número de mediciones recientes por objeto (smooth_frames)
+            method: "median" (mediana/MAD ponderada), "ema" o "kalman"
+            ema_alpha: Peso de la medición nueva en el filtro EMA
+            process_noise: Varianza del proceso del filtro de Kalman (cm²)
+            measurement_noise: Varianza de la medición del filtro de Kalman (cm²)
+            initial_capacity: Número inicial de objetos reservados
+        """
+        if method not in SMOOTHING_METHODS:
+            raise ValueError(f"Método de suavizado desconocido: {method}")
+        self.window = window
+        self.method = method
+        self.ema_alpha = ema_alpha
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+        # Historial preasignado (objetos x ventana) con índice circular por fila
+        self.history = np.zeros((initial_capacity, window), dtype=np.float64)
+        self.head = np.zeros(initial_capacity, dtype=np.int64)
+        self.count = np.zeros(initial_capacity, dtype=np.int64)
+
+        # Estado de los filtros EMA / Kalman
+        self.state = np.zeros(initial_capacity, dtype=np.float64)
+        self.variance = np.zeros(initial_capacity, dtype=np.float64)
+
+        # object_id -> fila del historial
+        self.slots = {}
+        self.free_slots = list(range(initial_capacity - 1, -1, -1))
+
+        self._positions = np.arange(window)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, object_id):
+        return object_id in self.slots
+
+    def _grow(self):
+        """Duplica la capacidad del historial"""
+        old = len(self.head)
+        new = old * 2
+        history = np.zeros((new, self.window), dtype=np.float64)
+        history[:old] = self.history
+        self.history = history
+        self.head = np.concatenate((self.head, np.zeros(old, dtype=np.int64)))
+        self.count = np.concatenate((self.count, np.zeros(old, dtype=np.int64)))
+        self.state = np.concatenate((self.state, np.zeros(old, dtype=np.float64)))
+        self.variance = np.concatenate((self.variance, np.zeros(old, dtype=np.float64)))
+        self.free_slots.extend(range(new - 1, old - 1, -1))
+
+    def _slot(self, object_id):
+        """
+        Devuelve la fila asignada a un objeto, reservando una si es nuevo
+
+        Args:
+            object_id: ID único del objeto
+
+        Returns:
+            slot: Índice de fila
+        """
+        slot = self.slots.get(object_id)
+        if slot is None:
+            if not self.free_slots:
+                self._grow()
+            slot = self.free_slots.pop()
+            self.head[slot] = 0
+            self.count[slot] = 0
+            self.slots[object_id] = slot
+        return slot
+
+    def release(self, object_id):
+        """
+        Libera el estado de un objeto que ya no se sigue
+
+        Args:
+            object_id: ID único del objeto
+        """
+        slot = self.slots.pop(object_id, None)
+        if slot is not None:
+            self.count[slot] = 0
+            self.free_slots.append(slot)
+
+    def reset(self):
+        """Libera el estado de todos los objetos"""
+        for object_id in list(self.slots):
+            self.release(object_id)
+
+    def update(self, object_ids, distances):
+        """
+        Añade una medición por objeto y devuelve las distancias suavizadas
+
+        Args:
+            object_ids: Lista de IDs (únicos dentro del frame)
+            distances: Array con la distancia actual de cada objeto
+
+        Returns:
+            smoothed: Array con las distancias suavizadas
+        """
+        values = np.asarray(distances, dtype=np.float64)
+        if len(values) == 0:
+            return values.copy()
+        rows = np.fromiter((self._slot(object_id) for object_id in object_ids),
+                           dtype=np.int64, count=len(values))
+
+        if self.method == "ema":
+            return self._update_ema(rows, values)
+        if self.method == "kalman":
+            return self._update_kalman(rows, values)
+        return self._update_median(rows, values)
+
+    def update_one(self, object_id, distance):
+        """
+        Versión escalar de update para un único objeto
+
+        Args:
+            object_id: ID único del objeto
+            distance: Distancia actual
+
+        Returns:
+            smoothed_distance: Distancia suavizada
+        """
+        if self.method != "median":
+            return float(self.update((object_id,), (distance,))[0])
+
+        # Camino escalar en Python puro: con una sola fila NumPy solo añade sobrecoste
+        slot = self._slot(object_id)
+        window = self.window
+        row = self.history[slot]
+        head = int(self.head[slot])
+        row[head] = distance
+        head = (head + 1) % window
+        count = min(int(self.count[slot]) + 1, window)
+        self.head[slot] = head
+        self.count[slot] = count
+        if count < 3:
+            return distance
+
+        values = row.tolist()
+        ordered = [values[(head - count + i) % window] for i in range(count)]
+        median = self._list_median(ordered)
+        deviations = [abs(value - median) for value in ordered]
+        mad = self._list_median(deviations)
+        if mad > 0:
+            kept = [value for value, deviation in zip(ordered, deviations) if deviation <= 2 * mad]
+            if kept:
+                last = max(len(kept) - 1, 1)
+                weights = [0.5 + 0.5 * i / last for i in range(len(kept))]
+                return sum(w * v for w, v in zip(weights, kept)) / sum(weights)
+        return median
+
+    @staticmethod
+    def _list_median(values):
+        """Mediana de una lista corta"""
+        ordered = sorted(values)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def _update_median(self, rows, values):
+        """Filtro de mediana/MAD con promedio ponderado hacia las mediciones recientes"""
+        window = self.window
+        head = self.head[rows]
+        self.history[rows, head] = values
+        self.head[rows] = (head + 1) % window
+        count = np.minimum(self.count[rows] + 1, window)
+        self.count[rows] = count
+
+        smoothed = values.copy()
+
+        # Para estabilidad, necesitamos al menos 3 mediciones
+        ready = count >= 3
+        if not ready.any():
+            return smoothed
+        r = rows[ready]
+        c = count[ready]
+        h = self.head[r]
+
+        # Ordenar cronológicamente cada fila del buffer circular (más antiguo primero)
+        positions = self._positions
+        idx = (h[:, None] - c[:, None] + positions[None, :]) % window
+        valid = positions[None, :] < c[:, None]
+        data = np.where(valid, self.history[r[:, None], idx], np.nan)
+
+        # Mediana y MAD por fila ignorando posiciones vacías (NaN queda al final al ordenar)
+        median = self._row_median(data, c)
+        deviation = np.abs(data - median[:, None])
+        mad = self._row_median(deviation, c)
+
+        # Filtrar distancias a más de 2 MAD y ponderar linealmente de 0.5 a 1.0
+        keep = valid & (deviation <= 2 * mad[:, None])
+        kept = keep.sum(axis=1)
+        rank = np.cumsum(keep, axis=1) - 1
+        weights = np.where(keep, 0.5 + 0.5 * rank / np.maximum(kept - 1, 1)[:, None], 0.0)
+        weight_sum = weights.sum(axis=1)
+        weighted = (weights * np.where(keep, data, 0.0)).sum(axis=1)
+
+        # Si no se pudo aplicar filtrado avanzado, usar mediana
+        use_average = (mad > 0) & (kept > 0)
+        result = median.copy()
+        result[use_average] = weighted[use_average] / weight_sum[use_average]
+        smoothed[ready] = result
+        return smoothed
+
+    @staticmethod
+    def _row_median(data, count):
+        """
+        Mediana por fila considerando solo los primeros count valores válidos
+
+        Args:
+            data: Matriz (k, ventana) con NaN en posiciones vacías
+            count: Número de valores válidos por fila
+
+        Returns:
+            median: Array con la mediana de cada fila
+        """
+        ordered = np.sort(data, axis=1)
+        rows = np.arange(len(ordered))
+        return (ordered[rows, (count - 1) // 2] + ordered[rows, count // 2]) / 2
+
+    def _update_ema(self, rows, values):
+        """Media móvil exponencial por objeto"""
+        new = self.count[rows] == 0
+        state = self.state[rows]
+        state = np.where(new, values, self.ema_alpha * values + (1 - self.ema_alpha) * state)
+        self.state[rows] = state
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+        return state
+
+    def _update_kalman(self, rows, values):
+        """Filtro de Kalman 1-D (modelo de distancia constante) por objeto"""
+        new = self.count[rows] == 0
+        state = self.state[rows]
+        variance = self.variance[rows] + self.process_noise
+        gain = variance / (variance + self.measurement_noise)
+        state = np.where(new, values, state + gain * (values - state))
+        variance = np.where(new, self.measurement_noise, (1 - gain) * variance)
+        self.state[rows] = state
+        self.variance[rows] = variance
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+        return state
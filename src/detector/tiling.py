@@ -0,0 +1,238 @@
+import numpy as np
+from src.detector.tracker import iou_matrix
+
+MERGE_METHODS = ("nms", "wbf")
+
+# Píxeles desde el borde del tile a partir de los que una caja se considera cortada
+EDGE_MARGIN = 2
+
+
+def tile_grid(frame_shape, tile_size, overlap, regions):
+    """
+    Rejilla de tiles solapados que cubre las regiones indicadas
+
+    Args:
+        frame_shape: Forma del frame (alto, ancho, ...)
+        tile_size: Lado del tile en píxeles
+        overlap: Fracción de solape entre tiles vecinos (0-1)
+        regions: Lista de [x1, y1, x2, y2] normalizados (0-1) donde buscar objetos pequeños
+
+    Returns:
+        tiles: Array (T, 4) int [x1, y1, x2, y2] sin duplicados
+    """
+    frame_height, frame_width = frame_shape[:2]
+    step = max(1, int(tile_size * (1 - overlap)))
+    tiles = []
+    for rx1, ry1, rx2, ry2 in regions:
+        x1, x2 = int(rx1 * frame_width), int(rx2 * frame_width)
+        y1, y2 = int(ry1 * frame_height), int(ry2 * frame_height)
+        xs = _tile_starts(x1, x2, frame_width, tile_size, step)
+        ys = _tile_starts(y1, y2, frame_height, tile_size, step)
+        for ty in ys:
+            for tx in xs:
+                tiles.append((tx, ty, min(tx + tile_size, frame_width), min(ty + tile_size, frame_height)))
+    if not tiles:
+        return np.empty((0, 4), dtype=np.int32)
+    return np.unique(np.array(tiles, dtype=np.int32), axis=0)
+
+
+def _tile_starts(start, end, limit, tile_size, step):
+    """Posiciones iniciales en un eje, repartidas uniformemente y sin salirse del frame"""
+    if limit <= tile_size:
+        return [0]
+    start = min(start, limit - tile_size)
+    last = min(max(end - tile_size, start), limit - tile_size)
+    # Mínimo de tiles para que el paso no supere step (solape mínimo garantizado)
+    count = int(np.ceil((last - start) / step)) + 1
+    return np.linspace(start, last, count).round().astype(int).tolist()
+
+
+def fast_nms(boxes, scores, class_ids, iou_threshold):
+    """
+    NMS por clase totalmente vectorizado (Fast NMS): una caja se suprime si alguna caja
+    de la misma clase con más confianza la solapa por encima del umbral
+
+    Args:
+        boxes: Array (N, 4) [x1, y1, x2, y2]
+        scores: Array (N,)
+        class_ids: Array (N,)
+        iou_threshold: Umbral IoU
+
+    Returns:
+        keep: Índices conservados, ordenados por confianza descendente
+        iou: Matriz IoU (N, N) en el orden de confianza (para reutilizarla en la fusión)
+        order: Orden por confianza aplicado
+    """
+    order = np.argsort(-scores, kind="stable")
+    boxes = boxes[order]
+    classes = class_ids[order]
+    iou = iou_matrix(boxes, boxes)
+    # Solo cuentan los pares de la misma clase y con más confianza (triángulo superior)
+    iou = np.where(classes[:, None] == classes[None, :], iou, 0.0)
+    suppressed = np.triu(iou, k=1).max(axis=0) > iou_threshold
+    return order[~suppressed], iou, order
+
+
+def merge_detections(data, iou_threshold=0.5, method="nms", max_det=300):
+    """
+    Fusiona las detecciones de todos los tiles y de la vista completa en coordenadas globales
+
+    Args:
+        data: Array (N, 6+) con [x1, y1, x2, y2, ..., conf, cls] en coordenadas del frame
+        iou_threshold: Umbral IoU para considerar dos cajas el mismo objeto
+        method: "nms" (conservar la de más confianza) o "wbf" (promedio ponderado por confianza)
+        max_det: Máximo de detecciones resultantes
+
+    Returns:
+        merged: Array (M, 6) float32 [x1, y1, x2, y2, conf, cls]
+    """
+    if len(data) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+    boxes = data[:, :4].astype(np.float32)
+    scores = data[:, -2].astype(np.float32)
+    class_ids = data[:, -1].astype(np.int32)
+
+    keep, iou, order = fast_nms(boxes, scores, class_ids, iou_threshold)
+    keep = keep[:max_det]
+    if method == "nms":
+        return np.column_stack((boxes[keep], scores[keep], class_ids[keep])).astype(np.float32)
+
+    # WBF: cada caja se asigna a la caja conservada de más confianza que la solapa
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    kept_rows = rank[keep]
+    member = iou[kept_rows] > iou_threshold
+    member[np.arange(len(keep)), kept_rows] = True
+    first = member.argmax(axis=0)
+    assigned = member.any(axis=0)
+    weights = np.zeros(member.shape, dtype=np.float32)
+    columns = np.flatnonzero(assigned)
+    weights[first[columns], columns] = scores[order][columns]
+    fused = (weights @ boxes[order]) / weights.sum(axis=1, keepdims=True)
+    return np.column_stack((fused, scores[keep], class_ids[keep])).astype(np.float32)
+
+
+class TiledInference:
+    """Inferencia por tiles solapados más la vista completa en un único lote"""
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Configuración completa (sección detector.tiling)
+        """
+        tiling_config = config["detector"].get("tiling", {})
+        self.tile_size = tiling_config.get("tile_size", 640)
+        self.overlap = tiling_config.get("overlap", 0.2)
+        self.regions = tiling_config.get("regions", [[0.0, 0.0, 1.0, 0.6]])
+        self.max_tiles = tiling_config.get("max_tiles", 4)
+        self.small_size = tiling_config.get("small_size_px", 64)
+        self.merge_method = tiling_config.get("merge", "nms")
+        self.merge_iou = tiling_config.get("merge_iou", 0.5)
+        self.max_det = config["detector"].get("max_det", 100)
+        if self.merge_method not in MERGE_METHODS:
+            raise ValueError(f"Método de fusión desconocido: {self.merge_method}")
+
+        self.frame_shape = None
+        self.tiles = np.empty((0, 4), dtype=np.int32)
+        # Objetos pequeños vistos recientemente en cada tile (con decaimiento)
+        self.hits = np.zeros(0, dtype=np.float32)
+        self.cursor = 0
+        self.tiles_run = 0
+        self.frames = 0
+
+    def _configure(self, frame_shape):
+        """Recalcula la rejilla si cambia la resolución"""
+        self.tiles = tile_grid(frame_shape, self.tile_size, self.overlap, self.regions)
+        self.hits = np.zeros(len(self.tiles), dtype=np.float32)
+        self.cursor = 0
+        self.frame_shape = frame_shape
+        print(f"[INFO] Inferencia por tiles: {len(self.tiles)} tiles candidatos de {self.tile_size}px, "
+              f"máximo {self.max_tiles} por frame")
+
+    def select_tiles(self):
+        """
+        Elige los tiles del frame: primero los que tenían objetos pequeños y el resto
+        por turnos, para que todas las regiones se revisen periódicamente con coste acotado
+
+        Returns:
+            chosen: Índices de los tiles a procesar
+        """
+        count = min(self.max_tiles, len(self.tiles))
+        if count == 0:
+            return []
+        # Siempre queda al menos un hueco para explorar por turnos
+        ranked = np.argsort(-self.hits, kind="stable")
+        chosen = [int(i) for i in ranked[:count - 1] if self.hits[i] > 0.5]
+        while len(chosen) < count:
+            index = self.cursor
+            self.cursor = (self.cursor + 1) % len(self.tiles)
+            if index not in chosen:
+                chosen.append(index)
+        return chosen
+
+    def predict(self, backend, frame):
+        """
+        Detecta sobre la vista completa y los tiles elegidos con una llamada al backend
+
+        Args:
+            backend: InferenceBackend
+            frame: Imagen BGR
+
+        Returns:
+            data: Array (N, 6) [x1, y1, x2, y2, conf, cls] fusionado en coordenadas del frame
+        """
+        if frame.shape != self.frame_shape:
+            self._configure(frame.shape)
+        chosen = self.select_tiles()
+        tiles = self.tiles[chosen]
+
+        # Los recortes son vistas del frame (sin copia); el backend redimensiona cada uno
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles.tolist()]
+        outputs = backend.predict([frame] + crops)
+
+        frame_height, frame_width = frame.shape[:2]
+        parts = [outputs[0]]
+        for (x1, y1, x2, y2), output in zip(tiles.tolist(), outputs[1:]):
+            if len(output) == 0:
+                continue
+            # Las cajas cortadas por un borde interior del tile las cubre un vecino o la vista completa
+            cut = (((output[:, 0] <= EDGE_MARGIN) & (x1 > 0)) |
+                   ((output[:, 1] <= EDGE_MARGIN) & (y1 > 0)) |
+                   ((output[:, 2] >= x2 - x1 - EDGE_MARGIN) & (x2 < frame_width)) |
+                   ((output[:, 3] >= y2 - y1 - EDGE_MARGIN) & (y2 < frame_height)))
+            output = output[~cut]
+            output[:, [0, 2]] += x1
+            output[:, [1, 3]] += y1
+            parts.append(output)
+        data = np.concatenate([part[:, [0, 1, 2, 3, -2, -1]] for part in parts])
+        merged = merge_detections(data, self.merge_iou, self.merge_method, self.max_det)
+
+        self._update_hits(merged)
+        self.tiles_run += len(chosen)
+        self.frames += 1
+        return merged
+
+    def _update_hits(self, merged):
+        """Cuenta los objetos pequeños cuyo centro cae en cada tile (vectorizado)"""
+        self.hits *= 0.5
+        if len(merged) == 0 or len(self.tiles) == 0:
+            return
+        small = merged[(merged[:, 3] - merged[:, 1]) < self.small_size]
+        if len(small) == 0:
+            return
+        cx = (small[:, 0] + small[:, 2]) / 2
+        cy = (small[:, 1] + small[:, 3]) / 2
+        tiles = self.tiles
+        inside = ((cx[None, :] >= tiles[:, 0:1]) & (cx[None, :] < tiles[:, 2:3]) &
+                  (cy[None, :] >= tiles[:, 1:2]) & (cy[None, :] < tiles[:, 3:4]))
+        self.hits += inside.sum(axis=1)
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: Tiles candidatos y tiles procesados por frame
+        """
+        return {
+            "tiles": len(self.tiles),
+            "tiles_per_frame": self.tiles_run / self.frames if self.frames else 0.0
+        }
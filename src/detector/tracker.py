@@ -0,0 +1,226 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Calcula la matriz IoU entre dos conjuntos de cajas de forma vectorizada
+
+    Args:
+        boxes_a: Array (N, 4) [x1, y1, x2, y2]
+        boxes_b: Array (M, 4) [x1, y1, x2, y2]
+
+    Returns:
+        iou: Array (N, M) con el IoU de cada par
+    """
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+def greedy_assignment(score, threshold, maximize=True):
+    """
+    Asignación voraz: empareja primero los pares con mejor puntuación
+
+    Args:
+        score: Matriz (N, M) de puntuaciones
+        threshold: Umbral mínimo (o máximo si maximize=False) para aceptar un par
+        maximize: True para IoU, False para distancias
+
+    Returns:
+        rows, cols: Arrays con los índices emparejados
+    """
+    if maximize:
+        candidates = np.argwhere(score >= threshold)
+        order = np.argsort(-score[candidates[:, 0], candidates[:, 1]], kind="stable")
+    else:
+        candidates = np.argwhere(score <= threshold)
+        order = np.argsort(score[candidates[:, 0], candidates[:, 1]], kind="stable")
+
+    used_rows = np.zeros(score.shape[0], dtype=bool)
+    used_cols = np.zeros(score.shape[1], dtype=bool)
+    rows = []
+    cols = []
+    for row, col in candidates[order].tolist():
+        if used_rows[row] or used_cols[col]:
+            continue
+        used_rows[row] = True
+        used_cols[col] = True
+        rows.append(row)
+        cols.append(col)
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+
+def hungarian_assignment(score, threshold):
+    """
+    Asignación óptima (húngaro) maximizando el IoU total
+
+    Args:
+        score: Matriz (N, M) de IoU
+        threshold: IoU mínimo para aceptar un par
+
+    Returns:
+        rows, cols: Arrays con los índices emparejados
+    """
+    rows, cols = linear_sum_assignment(-score)
+    keep = score[rows, cols] >= threshold
+    return rows[keep], cols[keep]
+
+
+class IoUTracker:
+    """Seguimiento multi-objeto por IoU con respaldo por centroide"""
+
+    def __init__(self, iou_threshold=0.3, max_age=15, assignment="greedy", centroid_threshold=0.5):
+        """
+        Inicializa el tracker
+
+        Args:
+            iou_threshold: IoU mínimo para asociar una detección a un track
+            max_age: Frames sin detección antes de eliminar un track
+            assignment: "greedy" o "hungarian" (requiere scipy)
+            centroid_threshold: Distancia máxima entre centros, relativa a la diagonal del track,
+                                para asociar por centroide cuando no hay solape
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.centroid_threshold = centroid_threshold
+        if assignment == "hungarian" and linear_sum_assignment is None:
+            print("[WARNING] scipy no disponible, se usa asignación voraz")
+            assignment = "greedy"
+        self.assignment = assignment
+
+        self.next_id = 1
+        self._reset_state()
+
+    def _reset_state(self):
+        """Vacía todos los tracks"""
+        self.ids = np.empty(0, dtype=np.int64)
+        self.class_ids = np.empty(0, dtype=np.int32)
+        self.boxes = np.empty((0, 4), dtype=np.float64)
+        self.velocity = np.empty((0, 2), dtype=np.float64)
+        self.age = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def reset(self):
+        """Elimina todos los tracks (los IDs siguen creciendo)"""
+        self._reset_state()
+
+    def predict(self):
+        """
+        Posición prevista de cada track en el siguiente frame (velocidad constante)
+
+        Returns:
+            boxes: Array (T, 4) [x1, y1, x2, y2]
+        """
+        return self.boxes + np.tile(self.velocity, 2)
+
+    def update(self, detections):
+        """
+        Asocia las detecciones del frame a tracks existentes y asigna track_id
+
+        Args:
+            detections: Detections columnar; se rellenan track_id y evicted
+
+        Returns:
+            evicted: Lista de object_id de tracks eliminados en este frame
+        """
+        n = len(detections)
+        det_boxes = np.stack((detections.x, detections.y,
+                              detections.x + detections.w, detections.y + detections.h),
+                             axis=1).astype(np.float64) if n else np.empty((0, 4))
+        det_classes = detections.class_id
+
+        det_track = np.full(n, -1, dtype=np.int64)
+        track_matched = np.zeros(len(self.ids), dtype=bool)
+
+        if len(self.ids) and n:
+            predicted = self.predict()
+            score = iou_matrix(predicted, det_boxes)
+            same_class = self.class_ids[:, None] == det_classes[None, :]
+            score[~same_class] = 0.0
+
+            if self.assignment == "hungarian":
+                rows, cols = hungarian_assignment(score, self.iou_threshold)
+            else:
+                rows, cols = greedy_assignment(score, self.iou_threshold)
+            det_track[cols] = rows
+            track_matched[rows] = True
+
+            # Respaldo por centroide para objetos rápidos sin solape
+            free_tracks = np.flatnonzero(~track_matched)
+            free_dets = np.flatnonzero(det_track < 0)
+            if len(free_tracks) and len(free_dets):
+                track_centers = (predicted[free_tracks, :2] + predicted[free_tracks, 2:]) / 2
+                det_centers = (det_boxes[free_dets, :2] + det_boxes[free_dets, 2:]) / 2
+                diagonal = np.hypot(predicted[free_tracks, 2] - predicted[free_tracks, 0],
+                                    predicted[free_tracks, 3] - predicted[free_tracks, 1])
+                distance = np.hypot(track_centers[:, None, 0] - det_centers[None, :, 0],
+                                    track_centers[:, None, 1] - det_centers[None, :, 1])
+                distance /= np.maximum(diagonal, 1.0)[:, None]
+                distance[self.class_ids[free_tracks][:, None] != det_classes[free_dets][None, :]] = np.inf
+                rows, cols = greedy_assignment(distance, self.centroid_threshold, maximize=False)
+                det_track[free_dets[cols]] = free_tracks[rows]
+                track_matched[free_tracks[rows]] = True
+
+        # Actualizar tracks emparejados
+        matched_dets = np.flatnonzero(det_track >= 0)
+        matched_tracks = det_track[matched_dets]
+        if len(matched_tracks):
+            old_centers = (self.boxes[matched_tracks, :2] + self.boxes[matched_tracks, 2:]) / 2
+            new_centers = (det_boxes[matched_dets, :2] + det_boxes[matched_dets, 2:]) / 2
+            # Velocidad suavizada (píxeles por frame)
+            self.velocity[matched_tracks] = 0.5 * self.velocity[matched_tracks] + 0.5 * (new_centers - old_centers)
+            self.boxes[matched_tracks] = det_boxes[matched_dets]
+            self.age[matched_tracks] = 0
+            self.hits[matched_tracks] += 1
+
+        # Envejecer tracks no emparejados y moverlos según su velocidad
+        unmatched = ~track_matched
+        self.age[unmatched] += 1
+        self.boxes[unmatched] += np.tile(self.velocity[unmatched], 2)
+
+        # Crear tracks para detecciones nuevas
+        new_dets = np.flatnonzero(det_track < 0)
+        new_ids = np.arange(self.next_id, self.next_id + len(new_dets), dtype=np.int64)
+        self.next_id += len(new_dets)
+        first_new = len(self.ids)
+        det_track[new_dets] = np.arange(first_new, first_new + len(new_dets))
+        self.ids = np.concatenate((self.ids, new_ids))
+        self.class_ids = np.concatenate((self.class_ids, det_classes[new_dets].astype(np.int32)))
+        self.boxes = np.concatenate((self.boxes, det_boxes[new_dets]))
+        self.velocity = np.concatenate((self.velocity, np.zeros((len(new_dets), 2))))
+        self.age = np.concatenate((self.age, np.zeros(len(new_dets), dtype=np.int64)))
+        self.hits = np.concatenate((self.hits, np.ones(len(new_dets), dtype=np.int64)))
+
+        detections.track_id = self.ids[det_track] if n else np.empty(0, dtype=np.int64)
+
+        # Eliminar tracks viejos
+        expired = self.age > self.max_age
+        evicted = []
+        if expired.any():
+            names = detections.names
+            evicted = [f"{names[c]}_{i}" for c, i in zip(self.class_ids[expired].tolist(),
+                                                         self.ids[expired].tolist())]
+            keep = ~expired
+            self.ids = self.ids[keep]
+            self.class_ids = self.class_ids[keep]
+            self.boxes = self.boxes[keep]
+            self.velocity = self.velocity[keep]
+            self.age = self.age[keep]
+            self.hits = self.hits[keep]
+
+        detections.evicted = evicted
+        return evicted
@@ -1,16 +1,20 @@
-from ultralytics import YOLO
 import time
 import numpy as np
+from src.detector.detections import Detections
+from src.detector.tracker import IoUTracker
+from src.detector.backends.factory import create_backend
+from src.detector.tiling import TiledInference
 
 class YOLODetector:
-    """Detector de objetos basado en YOLOv8"""
+    """Detector de objetos basado en YOLOv8 (PyTorch, ONNX Runtime u OpenVINO)"""
     
-    def __init__(self, config):
+    def __init__(self, config, model=None):
         """
         Inicializa el detector YOLO
         
         Args:
             config: Configuración con parámetros del detector
+            model: Modelo ya construido con la interfaz de Ultralytics (None = cargar desde config)
         """
         self.config = config
         self.detector_config = config["detector"]
@@ -19,21 +23,36 @@ class YOLODetector:
         self.iou_threshold = self.detector_config.get("iou_threshold", 0.45)
         self.max_det = self.detector_config.get("max_det", 100)
         
-        # Cargar modelo
-        self._load_model()
+        # Seguimiento de objetos: un tracker por fuente (cámara)
+        self.tracking = self.detector_config.get("tracking", False)
+        self.tracker_config = self.detector_config.get("tracker", {})
+        self.trackers = {}
+        
+        # Registro de métricas opcional (PipelineMetrics); lo asigna el pipeline
+        self.metrics = None
+        
+        # Cargar modelo con el backend configurado en detector.backend
+        self.backend = create_backend(config, model)
+        self.names = self.backend.names
+        
+        # Inferencia por tiles para objetos pequeños (opcional)
+        self.tiler = None
+        if self.detector_config.get("tiling", {}).get("enabled", False):
+            self.tiler = TiledInference(config)
     
-    def _load_model(self):
-        """Carga el modelo YOLO usando Ultralytics"""
-        print(f"[INFO] Cargando modelo {self.model_name}...")
-        
-        try:
-            self.model = YOLO(f"{self.model_name}.pt")
-            print(f"[INFO] Modelo {self.model_name} cargado correctamente")
-        except Exception as e:
-            print(f"[ERROR] Error cargando modelo: {e}")
-            print("[INFO] Intentando descargar modelo...")
-            # La primera vez que se usa, Ultralytics descargará el modelo automáticamente
-            self.model = YOLO(f"{self.model_name}.pt")
+    def warmup(self, width, height, runs=1):
+        """
+        Ejecuta inferencias sobre un frame vacío para que el primer frame real no pague
+        la inicialización perezosa del modelo (grafo, reservas de memoria, fusiones)
+        
+        Args:
+            width, height: Resolución de los frames que llegarán
+            runs: Número de inferencias de calentamiento
+        """
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        for _ in range(runs):
+            # Directamente al backend: el calentamiento no debe crear tracks
+            self.backend.predict([frame])
     
     def detect(self, frame):
         """
@@ -46,54 +65,118 @@ class YOLODetector:
             detections: Lista de detecciones con clase, confianza y coordenadas
             object_counts: Diccionario con conteo de objetos por clase
         """
+        columnar = self.detect_columnar(frame)
+        return columnar.to_list(), columnar.counts()
+    
+    def detect_columnar(self, frame):
+        """
+        Detecta objetos en un frame y devuelve las detecciones en formato columnar
+        
+        Args:
+            frame: Imagen a procesar
+        
+        Returns:
+            detections: Detections con un array por campo
+        """
         if frame is None:
             print("[ERROR] Frame nulo recibido")
-            return [], {}
+            return Detections.empty(self.names)
         
         # Ejecutar detección con YOLOv8
-        results = self.model(
-            frame, 
-            conf=self.confidence,
-            iou=self.iou_threshold,
-            max_det=self.max_det
-        )
-        
-        # Extraer detecciones
-        detections = []
-        
-        # Contadores por clase
-        object_counts = {}
-        
-        # Para cada detección en el primer frame
-        for det in results[0].boxes:
-            # Extraer clase
-            class_id = int(det.cls.item())
-            class_name = self.model.names[class_id]
-            
-            # Extraer confianza
-            confidence = det.conf.item()
-            
-            # Extraer coordenadas
-            xyxy = det.xyxy.cpu().numpy()[0]  # xmin, ymin, xmax, ymax
-            x, y, x2, y2 = map(int, xyxy)
-            w = x2 - x
-            h = y2 - y
-            
-            # Contar por clase
-            if class_name not in object_counts:
-                object_counts[class_name] = 1
-            else:
-                object_counts[class_name] += 1
-            
-            # ID único
-            object_id = f"{class_name}_{object_counts[class_name]}"
-            
-            # Añadir a lista de detecciones
-            detections.append({
-                "class_name": class_name,
-                "confidence": confidence,
-                "box": (x, y, w, h),
-                "object_id": object_id
-            })
-        
-        return detections, object_counts
\ No newline at end of file
+        start = time.perf_counter()
+        if self.tiler is not None:
+            data = self.tiler.predict(self.backend, frame)
+        else:
+            data = self.backend.predict([frame])[0]
+        postprocess_start = time.perf_counter()
+        
+        detections = self._track(Detections.from_xyxy(data, self.names))
+        if self.metrics is not None:
+            self.metrics.stages["inference"].observe(postprocess_start - start)
+            self.metrics.stages["postprocess"].observe_since(postprocess_start)
+        return detections
+    
+    def detect_batch(self, frames, source_ids=None):
+        """
+        Detecta objetos en varios frames con una única llamada al modelo
+        
+        Args:
+            frames: Lista de imágenes (pueden venir de fuentes distintas)
+            source_ids: Lista opcional con la fuente de cada frame (un tracker por fuente)
+        
+        Returns:
+            results: Lista de tuplas (detections, object_counts), una por frame y en el mismo orden
+        """
+        return [(columnar.to_list(), columnar.counts())
+                for columnar in self.detect_batch_columnar(frames, source_ids)]
+    
+    def detect_batch_columnar(self, frames, source_ids=None):
+        """
+        Versión columnar de detect_batch
+        
+        Args:
+            frames: Lista de imágenes
+            source_ids: Lista opcional con la fuente de cada frame
+        
+        Returns:
+            results: Lista de Detections, una por frame y en el mismo orden
+        """
+        # Los frames nulos no se envían al modelo
+        valid = [i for i, frame in enumerate(frames) if frame is not None]
+        outputs = [Detections.empty(self.names) for _ in frames]
+        if not valid:
+            return outputs
+        
+        results = self.backend.predict([frames[i] for i in valid])
+        
+        for i, data in zip(valid, results):
+            source_id = source_ids[i] if source_ids is not None else None
+            outputs[i] = self._track(Detections.from_xyxy(data, self.names), source_id)
+        return outputs
+    
+    def _track(self, detections, source_id=None):
+        """
+        Asigna IDs estables con el tracker de la fuente si el seguimiento está activo
+        
+        Args:
+            detections: Detections del frame
+            source_id: Fuente a la que pertenece el frame
+        
+        Returns:
+            detections: Las mismas detecciones con track_id y evicted rellenados
+        """
+        if not self.tracking:
+            return detections
+        tracker = self.trackers.get(source_id)
+        if tracker is None:
+            tracker = IoUTracker(
+                iou_threshold=self.tracker_config.get("iou_threshold", 0.3),
+                max_age=self.tracker_config.get("max_age", 15),
+                assignment=self.tracker_config.get("assignment", "greedy"),
+                centroid_threshold=self.tracker_config.get("centroid_threshold", 0.5)
+            )
+            self.trackers[source_id] = tracker
+        tracker.update(detections)
+        return detections
+    
+    def reset_tracking(self):
+        """Elimina todos los tracks activos"""
+        for tracker in self.trackers.values():
+            tracker.reset()
+    
+    def apply_runtime(self, runtime):
+        """
+        Aplica umbrales recargados en caliente sin volver a cargar el modelo
+        
+        Args:
+            runtime: RuntimeConfig compilado
+        """
+        params = runtime.detector
+        self.confidence = params.confidence
+        self.iou_threshold = params.iou_threshold
+        self.max_det = params.max_det
+        self.backend.confidence = params.confidence
+        self.backend.iou_threshold = params.iou_threshold
+        self.backend.max_det = params.max_det
+        if self.tiler is not None:
+            self.tiler.max_det = params.max_det
@@ -0,0 +1,238 @@
+import os
+import queue
+import sys
+import time
+import cv2
+import numpy as np
+from src.engine.shared_ring import SharedFrameRing, DROPPED
+
+
+def configure_worker(cpus, threads):
+    """
+    Fija la afinidad de CPU y los hilos internos de un proceso para no sobresuscribir núcleos
+
+    Args:
+        cpus: Lista de núcleos permitidos (vacía o None = sin fijar)
+        threads: Hilos internos de OpenCV/PyTorch/OpenMP
+    """
+    if cpus:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        else:
+            print("[WARNING] Afinidad de CPU no soportada en este sistema")
+    # Se fija antes de cargar el backend: PyTorch y ONNX Runtime lo leen al inicializarse
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(threads)
+
+
+class SyntheticSource:
+    """Fuente sintética: fondo con textura y rectángulos en movimiento (sin E/S)"""
+
+    def __init__(self, shape, seed=0):
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 64, shape, dtype=np.uint8)
+        height, width = shape[:2]
+        self.box_size = (max(1, width // 10), max(1, height // 3))
+        self.span = np.array((width - self.box_size[0], height - self.box_size[1]), dtype=np.float64)
+        self.positions = rng.uniform(0, 1, (4, 2)) * self.span
+        self.velocity = rng.uniform(-6, 6, (4, 2))
+
+    def read(self, target, seq):
+        """Dibuja el frame seq directamente sobre el slot"""
+        np.copyto(target, self.background)
+        box_width, box_height = self.box_size
+        positions = (self.positions + self.velocity * seq) % np.maximum(self.span, 1)
+        for x, y in positions.astype(int).tolist():
+            cv2.rectangle(target, (x, y), (x + box_width, y + box_height), (200, 200, 200), -1)
+        return True
+
+
+def open_source(source):
+    """
+    Abre una fuente de captura
+
+    Args:
+        source: Índice de cámara (int o cadena numérica), ruta de vídeo o "synthetic"
+
+    Returns:
+        cap: cv2.VideoCapture o None para la fuente sintética
+        live: True si es una cámara en vivo
+    """
+    if source == "synthetic":
+        return None, False
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source)), True
+    return cv2.VideoCapture(source), False
+
+
+def capture_main(camera_id, source, ring_spec, out_queue, stop_event, fps=0):
+    """
+    Proceso de captura: escribe frames en el buffer compartido y envía sus descriptores
+
+    Args:
+        camera_id: Identificador de la cámara
+        source: Índice de cámara, ruta de vídeo o "synthetic"
+        ring_spec: Especificación del SharedFrameRing de la cámara
+        out_queue: Cola del trabajador asignado a la cámara
+        stop_event: Evento de parada compartido
+        fps: Ritmo de la fuente sintética o de vídeo (0 = lo más rápido posible)
+    """
+    ring = SharedFrameRing.attach(ring_spec)
+    height, width = ring.shape[:2]
+    cap, live = open_source(source)
+    synthetic = SyntheticSource(ring.shape, seed=camera_id) if cap is None else None
+    if cap is not None and not cap.isOpened():
+        print(f"[ERROR] Cámara {camera_id}: no se pudo abrir la fuente {source}")
+        ring.close()
+        return
+
+    interval = 1.0 / fps if fps and not live else 0.0
+    next_time = time.monotonic()
+    seq = 0
+    try:
+        while not stop_event.is_set():
+            slot = ring.acquire()
+            if slot is None:
+                # Trabajadores saturados: una cámara en vivo descarta el frame, las demás esperan
+                if live:
+                    cap.grab()
+                    ring.counters[DROPPED] += 1
+                else:
+                    time.sleep(0.001)
+                continue
+
+            target = ring.frames[slot]
+            if synthetic is not None:
+                success = synthetic.read(target, seq)
+            else:
+                success, frame = cap.read(target)
+                if success and frame.ctypes.data != target.ctypes.data:
+                    # Resolución distinta a la del buffer: redimensionar dentro del slot
+                    cv2.resize(frame, (width, height), dst=target)
+            if not success:
+                if live:
+                    time.sleep(0.01)
+                else:
+                    # Fin de vídeo: volver al principio
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+
+            seq += 1
+            timestamp = time.monotonic()
+            ring.publish(slot, seq, timestamp)
+            out_queue.put((camera_id, slot, seq, timestamp))
+
+            if interval:
+                next_time += interval
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # No esperar a vaciar la cola al salir: los descriptores pendientes ya no sirven
+        out_queue.cancel_join_thread()
+        if cap is not None:
+            cap.release()
+        ring.close()
+
+
+def detections_array(detections):
+    """
+    Empaqueta las detecciones en un único array pequeño para la cola de resultados
+
+    Returns:
+        data: Array (N, 8) float32 [x, y, w, h, conf, cls, track_id, distance]
+    """
+    track_id = detections.track_id if detections.track_id is not None else np.full(len(detections), -1)
+    distance = detections.distance if detections.distance is not None else np.full(len(detections), np.nan)
+    return np.column_stack((
+        detections.x, detections.y, detections.w, detections.h,
+        detections.conf, detections.class_id, track_id, distance
+    )).astype(np.float32)
+
+
+def worker_main(worker_id, config, ring_specs, in_queue, result_queue, stop_event,
+                cpus=None, threads=1, max_batch_size=4, model_factory=None):
+    """
+    Proceso de inferencia: lee frames del buffer compartido sin copiarlos y publica resultados
+
+    Args:
+        worker_id: Identificador del trabajador
+        config: Configuración completa
+        ring_specs: Diccionario camera_id -> especificación del buffer de las cámaras asignadas
+        in_queue: Cola de descriptores (camera_id, slot, seq, timestamp)
+        result_queue: Cola de resultados hacia el supervisor
+        stop_event: Evento de parada compartido
+        cpus: Núcleos asignados al trabajador
+        threads: Hilos internos de inferencia
+        max_batch_size: Frames máximos por llamada al modelo
+        model_factory: Función opcional que construye el modelo (pruebas y benchmarks)
+    """
+    configure_worker(cpus, threads)
+    # Imports diferidos: el backend se carga ya con la afinidad y los hilos fijados
+    from src.detector.yolo_detector import YOLODetector
+    from src.detector.distance_calc import DistanceCalculator
+    from src.history.history_store import create_history
+
+    config["detector"].setdefault("export", {})["threads"] = threads
+    rings = {camera_id: SharedFrameRing.attach(spec) for camera_id, spec in ring_specs.items()}
+    detector = YOLODetector(config, model=model_factory() if model_factory is not None else None)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    # Un calculador por cámara: el suavizado se indexa por ID de objeto
+    calculators = {
+        camera_id: DistanceCalculator(config, calibration_key=f"camera_{camera_id}") for camera_id in rings
+    }
+    # Historial por cámara (el trabajador es el único que escribe en él)
+    histories = {camera_id: create_history(config, camera=f"camera_{camera_id}") for camera_id in rings}
+    result_queue.put(("ready", worker_id, detector.names))
+
+    try:
+        while not stop_event.is_set():
+            try:
+                batch = [in_queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while len(batch) < max_batch_size:
+                try:
+                    batch.append(in_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Vistas de los slots: el modelo lee directamente de la memoria compartida
+            frames = [rings[camera_id].frames[slot] for camera_id, slot, _, _ in batch]
+            try:
+                results = detector.detect_batch_columnar(frames, [item[0] for item in batch])
+            except Exception as e:
+                print(f"[ERROR] Trabajador {worker_id}: error en inferencia: {e}")
+                results = None
+            finally:
+                for camera_id, slot, _, _ in batch:
+                    rings[camera_id].release(slot)
+            if results is None:
+                continue
+
+            for (camera_id, _, seq, timestamp), detections in zip(batch, results):
+                calculators[camera_id].calculate_distances(detections, rings[camera_id].shape[0])
+                if histories[camera_id] is not None:
+                    histories[camera_id].append(time.time() - (time.monotonic() - timestamp), seq, detections)
+                message = ("result", worker_id, camera_id, seq, timestamp, detections_array(detections))
+                try:
+                    result_queue.put_nowait(message)
+                except queue.Full:
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        result_queue.cancel_join_thread()
+        for history in histories.values():
+            if history is not None:
+                history.close()
+        # El proceso termina sin atexit: escribir aquí la calibración pendiente
+        for calculator in calculators.values():
+            calculator.close()
+        for ring in rings.values():
+            ring.close()
@@ -0,0 +1,109 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+# Estados de un slot: cada transición la hace un único proceso
+FREE = 0      # Libre: solo el proceso de captura puede escribir
+READY = 1     # Publicado: pertenece al trabajador que recibió su descriptor
+
+# Contadores de la cabecera
+CAPTURED = 0
+DROPPED = 1
+
+
+class SharedFrameRing:
+    """
+    Buffer circular de frames en memoria compartida para una cámara.
+
+    Disposición: estado, seq y timestamp de cada slot, dos contadores y después los
+    frames. Por las colas solo viajan descriptores (cámara, slot, seq, timestamp).
+    """
+
+    def __init__(self, shm, slots, shape, owner):
+        self.shm = shm
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = owner
+        self.name = shm.name
+
+        header = np.ndarray((3 * slots + 2,), dtype=np.int64, buffer=shm.buf)
+        self.states = header[:slots]
+        self.seqs = header[slots:2 * slots]
+        self.timestamps = header[2 * slots:3 * slots].view(np.float64)
+        self.counters = header[3 * slots:]
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8,
+                                 buffer=shm.buf, offset=header.nbytes)
+        self.cursor = 0
+
+    @staticmethod
+    def _size(slots, shape):
+        return (3 * slots + 2) * 8 + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, slots, shape):
+        """
+        Reserva un buffer nuevo (lo hace el supervisor)
+
+        Args:
+            slots: Número de frames del buffer
+            shape: Forma (alto, ancho, 3) de los frames
+
+        Returns:
+            ring: SharedFrameRing propietario de la memoria
+        """
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(slots, shape))
+        ring = cls(shm, slots, shape, owner=True)
+        ring.states[:] = FREE
+        ring.seqs[:] = 0
+        ring.counters[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Abre un buffer existente desde otro proceso
+
+        Args:
+            spec: Diccionario devuelto por spec()
+
+        Returns:
+            ring: SharedFrameRing sin propiedad de la memoria
+        """
+        shm = shared_memory.SharedMemory(name=spec["name"])
+        return cls(shm, spec["slots"], spec["shape"], owner=False)
+
+    def spec(self):
+        """Datos necesarios para abrir el buffer desde otro proceso (serializables)"""
+        return {"name": self.name, "slots": self.slots, "shape": self.shape}
+
+    def acquire(self):
+        """
+        Busca un slot libre para escribir (solo proceso de captura)
+
+        Returns:
+            slot: Índice del slot o None si todos están en uso
+        """
+        for offset in range(self.slots):
+            slot = (self.cursor + offset) % self.slots
+            if self.states[slot] == FREE:
+                self.cursor = (slot + 1) % self.slots
+                return slot
+        return None
+
+    def publish(self, slot, seq, timestamp):
+        """Marca un slot como escrito; su descriptor puede enviarse a un trabajador"""
+        self.seqs[slot] = seq
+        self.timestamps[slot] = timestamp
+        self.states[slot] = READY
+        self.counters[CAPTURED] += 1
+
+    def release(self, slot):
+        """Devuelve un slot al proceso de captura (solo trabajador)"""
+        self.states[slot] = FREE
+
+    def close(self):
+        """Cierra la vista y, si es propietario, libera la memoria compartida"""
+        # Las vistas NumPy deben soltarse antes de cerrar el segmento
+        self.states = self.seqs = self.timestamps = self.counters = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,226 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from src.engine.processes import capture_main, worker_main
+from src.engine.shared_ring import SharedFrameRing, CAPTURED, DROPPED
+
+
+def assign_cpus(affinity, workers):
+    """
+    Núcleos de cada trabajador
+
+    Args:
+        affinity: "auto" (repartir los núcleos disponibles), lista de listas o None
+        workers: Número de trabajadores
+
+    Returns:
+        cpus: Lista con los núcleos de cada trabajador (None = sin fijar)
+    """
+    if not affinity:
+        return [None] * workers
+    if affinity == "auto":
+        if not hasattr(os, "sched_getaffinity"):
+            return [None] * workers
+        cores = sorted(os.sched_getaffinity(0))
+        chunk = max(1, len(cores) // workers)
+        return [[cores[(i * chunk + j) % len(cores)] for j in range(chunk)] for i in range(workers)]
+    return [affinity[i % len(affinity)] for i in range(workers)]
+
+
+class MultiProcessEngine:
+    """Supervisor con N procesos de captura y M trabajadores de inferencia en memoria compartida"""
+
+    def __init__(self, config, model_factory=None):
+        """
+        Args:
+            config: Configuración completa (sección engine y camera)
+            model_factory: Función opcional que construye el modelo en cada trabajador
+        """
+        self.config = config
+        self.model_factory = model_factory
+        engine_config = config.get("engine", {})
+        camera_config = config["camera"]
+        default_source = camera_config.get("source") or camera_config.get("index", 0)
+        self.cameras = engine_config.get("cameras") or [{"source": default_source}]
+        self.workers = engine_config.get("workers", 1)
+        self.ring_slots = engine_config.get("ring_slots", 4)
+        self.max_batch_size = engine_config.get("max_batch_size", 4)
+        self.threads = engine_config.get("threads_per_worker", 1)
+        self.cpus = assign_cpus(engine_config.get("cpu_affinity"), self.workers)
+        self.start_method = engine_config.get("start_method", "spawn")
+        self.result_queue_size = engine_config.get("result_queue_size", 256)
+        self.width = camera_config["width"]
+        self.height = camera_config["height"]
+        self.fps = camera_config.get("fps", 30)
+
+        self.rings = []
+        self.processes = []
+        self.names = {}
+        self.results = 0
+        self.results_by_camera = [0] * len(self.cameras)
+        self.latency_total = 0.0
+        self.start_time = None
+
+    def camera_worker(self, camera_id):
+        """Trabajador asignado a una cámara (fijo, para conservar su tracker)"""
+        return camera_id % self.workers
+
+    def start(self, ready_timeout=300.0):
+        """
+        Reserva los buffers, arranca los trabajadores y, cuando han cargado el modelo, la captura
+
+        Args:
+            ready_timeout: Espera máxima por la carga de los modelos (segundos)
+        """
+        context = mp.get_context(self.start_method)
+        self.stop_event = context.Event()
+        self.result_queue = context.Queue(maxsize=self.result_queue_size)
+        self.worker_queues = [context.Queue() for _ in range(self.workers)]
+
+        for camera in self.cameras:
+            shape = (camera.get("height", self.height), camera.get("width", self.width), 3)
+            self.rings.append(SharedFrameRing.create(self.ring_slots, shape))
+
+        for worker_id in range(self.workers):
+            ring_specs = {
+                camera_id: ring.spec() for camera_id, ring in enumerate(self.rings)
+                if self.camera_worker(camera_id) == worker_id
+            }
+            process = context.Process(
+                target=worker_main,
+                args=(worker_id, self.config, ring_specs, self.worker_queues[worker_id],
+                      self.result_queue, self.stop_event),
+                kwargs={
+                    "cpus": self.cpus[worker_id],
+                    "threads": self.threads,
+                    "max_batch_size": self.max_batch_size,
+                    "model_factory": self.model_factory
+                },
+                name=f"engine-worker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        # Esperar a que todos los trabajadores tengan el modelo cargado
+        ready = 0
+        deadline = time.monotonic() + ready_timeout
+        while ready < self.workers:
+            try:
+                message = self.result_queue.get(timeout=max(0.1, deadline - time.monotonic()))
+            except queue.Empty:
+                self.stop()
+                raise RuntimeError("Los trabajadores de inferencia no arrancaron a tiempo")
+            if message[0] == "ready":
+                ready += 1
+                self.names = message[2]
+
+        for camera_id, (camera, ring) in enumerate(zip(self.cameras, self.rings)):
+            process = context.Process(
+                target=capture_main,
+                args=(camera_id, camera.get("source", "synthetic"), ring.spec(),
+                      self.worker_queues[self.camera_worker(camera_id)], self.stop_event),
+                kwargs={"fps": camera.get("fps", self.fps)},
+                name=f"engine-capture-{camera_id}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+        self.start_time = time.monotonic()
+        print(f"[INFO] Motor iniciado: {len(self.cameras)} cámaras, {self.workers} trabajadores")
+
+    def poll(self, timeout=0.1):
+        """
+        Obtiene el siguiente resultado
+
+        Args:
+            timeout: Espera máxima en segundos
+
+        Returns:
+            result: Diccionario con camera_id, seq, timestamp, latency, worker_id y detections
+                    (array (N, 8) [x, y, w, h, conf, cls, track_id, distance]) o None
+        """
+        try:
+            message = self.result_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message[0] != "result":
+            return None
+        _, worker_id, camera_id, seq, timestamp, detections = message
+        latency = time.monotonic() - timestamp
+        self.results += 1
+        self.results_by_camera[camera_id] += 1
+        self.latency_total += latency
+        return {
+            "camera_id": camera_id,
+            "seq": seq,
+            "timestamp": timestamp,
+            "latency": latency,
+            "worker_id": worker_id,
+            "detections": detections
+        }
+
+    def run(self, duration=None, on_result=None):
+        """
+        Arranca el motor y consume resultados durante duration segundos (None = hasta Ctrl+C)
+
+        Args:
+            duration: Duración en segundos
+            on_result: Callback opcional con cada resultado
+
+        Returns:
+            stats: Estadísticas finales
+        """
+        self.start()
+        try:
+            while duration is None or time.monotonic() - self.start_time < duration:
+                result = self.poll()
+                if result is not None and on_result is not None:
+                    on_result(result)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stats = self.get_stats()
+            self.stop()
+        return stats
+
+    def stop(self):
+        """Detiene todos los procesos y libera la memoria compartida"""
+        if not self.processes and not self.rings:
+            return
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: FPS agregado, latencia media y contadores por cámara
+        """
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0.0
+        cameras = []
+        for camera_id, ring in enumerate(self.rings):
+            cameras.append({
+                "source": self.cameras[camera_id].get("source", "synthetic"),
+                "captured": int(ring.counters[CAPTURED]),
+                "dropped": int(ring.counters[DROPPED]),
+                "processed": self.results_by_camera[camera_id],
+                "fps": self.results_by_camera[camera_id] / elapsed if elapsed > 0 else 0.0
+            })
+        return {
+            "workers": self.workers,
+            "cameras": cameras,
+            "results": self.results,
+            "seconds": elapsed,
+            "fps": self.results / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": 1000 * self.latency_total / self.results if self.results else 0.0,
+            "cpus": self.cpus
+        }
@@ -0,0 +1,326 @@
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+
+# Columnas de cada segmento (una fila por detección)
+COLUMNS = {
+    "timestamp": np.float64,   # Instante de captura (epoch, segundos)
+    "frame": np.int64,         # Número de frame
+    "track_id": np.int32,      # -1 = sin seguimiento
+    "class_id": np.int16,
+    "conf": np.float32,
+    "x": np.int16,
+    "y": np.int16,
+    "w": np.int16,
+    "h": np.int16,
+    "distance": np.float32     # NaN = sin distancia
+}
+
+SEGMENT_PREFIX = "seg_"
+
+
+class Segment:
+    """Segmento de historial: una matriz memmap por columna con capacidad fija"""
+
+    def __init__(self, path, capacity=None, writable=False):
+        """
+        Args:
+            path: Directorio del segmento
+            capacity: Filas reservadas (solo al crear)
+            writable: Abrir para añadir filas
+        """
+        self.path = path
+        self.writable = writable
+        mode = "r+" if writable else "r"
+        if capacity is not None:
+            os.makedirs(path, exist_ok=True)
+            self.columns = {
+                name: np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode="w+",
+                                                dtype=dtype, shape=(capacity,))
+                for name, dtype in COLUMNS.items()
+            }
+            # Filas válidas: se actualiza en el propio archivo tras escribir cada frame
+            self.state = np.lib.format.open_memmap(os.path.join(path, "rows.npy"), mode="w+",
+                                                   dtype=np.int64, shape=(1,))
+        else:
+            self.columns = {
+                name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode) for name in COLUMNS
+            }
+            self.state = np.load(os.path.join(path, "rows.npy"), mmap_mode=mode)
+        self.capacity = len(self.columns["timestamp"])
+        self.rows = int(self.state[0])
+
+    @property
+    def start_time(self):
+        return float(self.columns["timestamp"][0]) if self.rows else None
+
+    @property
+    def end_time(self):
+        return float(self.columns["timestamp"][self.rows - 1]) if self.rows else None
+
+    def append(self, values, n):
+        """Copia n filas al final del segmento (values: columna -> array o escalar)"""
+        start = self.rows
+        end = start + n
+        for name, column in self.columns.items():
+            column[start:end] = values[name]
+        self.rows = end
+        self.state[0] = end
+
+    def time_slice(self, t1, t2):
+        """
+        Rango de filas con t1 <= timestamp <= t2 (los timestamps están ordenados)
+
+        Returns:
+            start, end: Límites del rango
+        """
+        timestamps = self.columns["timestamp"][:self.rows]
+        start = 0 if t1 is None else int(np.searchsorted(timestamps, t1, side="left"))
+        end = self.rows if t2 is None else int(np.searchsorted(timestamps, t2, side="right"))
+        return start, end
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        self.state.flush()
+
+    def close(self):
+        if self.writable:
+            self.flush()
+        self.columns = {}
+        self.state = None
+
+
+class HistoryStore:
+    """
+    Historial de detecciones en disco, columnar y en segmentos memmap con rotación.
+
+    Las filas se añaden en orden de tiempo, así que cada segmento es su propio índice
+    temporal: las consultas descartan segmentos por su rango [inicio, fin] y localizan
+    las filas con búsqueda binaria antes de filtrar el resto de columnas con NumPy.
+    """
+
+    def __init__(self, root, camera="default", segment_rows=1_000_000, segment_s=3600,
+                 max_segments=0, flush_interval=5.0):
+        """
+        Args:
+            root: Directorio raíz del historial
+            camera: Clave de la cámara (subdirectorio)
+            segment_rows: Filas reservadas por segmento
+            segment_s: Duración máxima de un segmento en segundos
+            max_segments: Segmentos conservados (0 = sin límite)
+            flush_interval: Segundos entre volcados a disco del segmento activo
+        """
+        self.directory = os.path.join(root, camera)
+        self.segment_rows = segment_rows
+        self.segment_s = segment_s
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.names_path = os.path.join(self.directory, "names.json")
+        self.names = {}
+        self._names_source = None
+        if os.path.exists(self.names_path):
+            with open(self.names_path, "r", encoding="utf-8") as f:
+                self.names = {int(k): v for k, v in json.load(f).items()}
+
+        # Segmentos cerrados (solo lectura) y segmento activo
+        self.lock = threading.Lock()
+        self.sealed = [Segment(path) for path in self._segment_paths()]
+        self.active = None
+        self.last_timestamp = max((s.end_time for s in self.sealed if s.rows), default=0.0)
+        self.last_flush = time.monotonic()
+        self.appended = 0
+
+    def _segment_paths(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def append(self, timestamp, frame, detections):
+        """
+        Añade las detecciones de un frame (copia directa a las columnas memmap)
+
+        Args:
+            timestamp: Instante de captura (epoch, segundos)
+            frame: Número de frame
+            detections: Detections columnar con distancias
+        """
+        n = len(detections)
+        if n == 0:
+            return
+        if detections.names is not self._names_source:
+            self._names_source = detections.names
+            if detections.names != self.names:
+                self._save_names(detections.names)
+        # Orden no decreciente: el índice temporal depende de ello (saltos de reloj)
+        timestamp = max(timestamp, self.last_timestamp)
+        self.last_timestamp = timestamp
+
+        active = self.active
+        if (active is None or active.rows + n > active.capacity
+                or (active.rows and timestamp - active.start_time > self.segment_s)):
+            active = self._rotate(timestamp, n)
+
+        active.append({
+            "timestamp": timestamp,
+            "frame": frame,
+            "track_id": detections.track_id if detections.track_id is not None else -1,
+            "class_id": detections.class_id,
+            "conf": detections.conf,
+            "x": detections.x,
+            "y": detections.y,
+            "w": detections.w,
+            "h": detections.h,
+            "distance": detections.distance if detections.distance is not None else np.nan
+        }, n)
+        self.appended += n
+
+        now = time.monotonic()
+        if now - self.last_flush > self.flush_interval:
+            active.flush()
+            self.last_flush = now
+
+    def _rotate(self, timestamp, n):
+        """Cierra el segmento activo, abre uno nuevo y aplica la retención"""
+        with self.lock:
+            if self.active is not None:
+                path = self.active.path
+                self.active.close()
+                self.sealed.append(Segment(path))
+            name = f"{SEGMENT_PREFIX}{int(timestamp * 1000):015d}"
+            path = os.path.join(self.directory, name)
+            suffix = 1
+            while os.path.exists(path):
+                path = os.path.join(self.directory, f"{name}_{suffix}")
+                suffix += 1
+            self.active = Segment(path, capacity=max(self.segment_rows, n), writable=True)
+
+            if self.max_segments:
+                while len(self.sealed) + 1 > self.max_segments and self.sealed:
+                    oldest = self.sealed.pop(0)
+                    oldest.close()
+                    shutil.rmtree(oldest.path, ignore_errors=True)
+            return self.active
+
+    def _save_names(self, names):
+        self.names = dict(names)
+        temp_path = self.names_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({str(k): v for k, v in self.names.items()}, f, ensure_ascii=False)
+        os.replace(temp_path, self.names_path)
+
+    def class_ids(self, class_names):
+        """Ids de clase de una lista de nombres (los desconocidos se ignoran)"""
+        lookup = {name: class_id for class_id, name in self.names.items()}
+        return [lookup[name] for name in class_names if name in lookup]
+
+    def query(self, t1=None, t2=None, classes=None, max_distance=None, min_confidence=None,
+              track_id=None, columns=None):
+        """
+        Filas entre t1 y t2 que cumplen los filtros
+
+        Args:
+            t1, t2: Rango de tiempo (epoch, segundos; None = sin límite)
+            classes: Lista de nombres de clase (None = todas)
+            max_distance: Solo filas con distancia menor (cm)
+            min_confidence: Confianza mínima
+            track_id: Solo un objeto seguido
+            columns: Columnas devueltas (None = todas)
+
+        Returns:
+            result: Diccionario columna -> array con las filas seleccionadas
+        """
+        columns = list(columns or COLUMNS)
+        class_ids = np.array(self.class_ids(classes), dtype=np.int16) if classes is not None else None
+        with self.lock:
+            segments = list(self.sealed) + ([self.active] if self.active is not None else [])
+
+        parts = {name: [] for name in columns}
+        for segment in segments:
+            if not segment.rows:
+                continue
+            # Poda por rango de tiempo del segmento
+            if (t1 is not None and segment.end_time < t1) or (t2 is not None and segment.start_time > t2):
+                continue
+            start, end = segment.time_slice(t1, t2)
+            if start >= end:
+                continue
+            data = segment.columns
+            mask = np.ones(end - start, dtype=bool)
+            if class_ids is not None:
+                mask &= np.isin(data["class_id"][start:end], class_ids)
+            if max_distance is not None:
+                mask &= data["distance"][start:end] < max_distance
+            if min_confidence is not None:
+                mask &= data["conf"][start:end] >= min_confidence
+            if track_id is not None:
+                mask &= data["track_id"][start:end] == track_id
+            rows = np.flatnonzero(mask) + start
+            for name in columns:
+                parts[name].append(data[name][rows])
+
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+            for name, chunks in parts.items()
+        }
+
+    def flush(self):
+        """Vuelca a disco el segmento activo"""
+        if self.active is not None:
+            self.active.flush()
+
+    def close(self):
+        """Cierra el segmento activo (queda como segmento de solo lectura)"""
+        with self.lock:
+            if self.active is not None:
+                path = self.active.path
+                self.active.close()
+                self.sealed.append(Segment(path))
+                self.active = None
+
+    def stop(self):
+        """Alias de close() para la lista de servicios de main.py"""
+        self.close()
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: Filas añadidas, segmentos y filas totales almacenadas
+        """
+        with self.lock:
+            segments = list(self.sealed) + ([self.active] if self.active is not None else [])
+        return {
+            "appended": self.appended,
+            "segments": len(segments),
+            "rows": sum(segment.rows for segment in segments)
+        }
+
+
+def create_history(config, camera=None):
+    """
+    Crea el historial de detecciones si está activado
+
+    Args:
+        config: Configuración completa (sección history)
+        camera: Clave de la cámara (None = history.camera)
+
+    Returns:
+        store: HistoryStore o None
+    """
+    history_config = config.get("history", {})
+    if not history_config.get("enabled", False):
+        return None
+    store = HistoryStore(
+        history_config.get("root", "history"),
+        camera=camera or history_config.get("camera", "default"),
+        segment_rows=history_config.get("segment_rows", 1_000_000),
+        segment_s=history_config.get("segment_s", 3600),
+        max_segments=history_config.get("max_segments", 0),
+        flush_interval=history_config.get("flush_interval_s", 5.0)
+    )
+    print(f"[INFO] Historial de detecciones en {store.directory} ({len(store.sealed)} segmentos previos)")
+    return store
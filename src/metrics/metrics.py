@@ -0,0 +1,379 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+
+# Etapas instrumentadas del pipeline
+STAGES = ("capture", "inference", "postprocess", "distance", "render", "display")
+
+# Límites superiores de los buckets de latencia (segundos)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+# Reloj monotónico de alta resolución usado en todos los temporizadores
+now = time.perf_counter
+
+
+class Histogram:
+    """Histograma de buckets fijos; observe() no crea estructuras nuevas"""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        """
+        Args:
+            bounds: Límites superiores de los buckets (el último bucket es +Inf)
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Registra un valor
+
+        Args:
+            value: Valor observado (segundos)
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def observe_since(self, start):
+        """
+        Registra el tiempo transcurrido desde start (obtenido con now())
+
+        Args:
+            start: Marca de tiempo inicial
+        """
+        self.observe(now() - start)
+
+    def quantile(self, q):
+        """
+        Estimación del cuantil a partir de los buckets (límite superior del bucket)
+
+        Args:
+            q: Cuantil entre 0 y 1
+
+        Returns:
+            value: Límite del bucket que contiene el cuantil (inf si cae en el último)
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        """Estado del histograma como diccionario"""
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["+Inf"], self.counts))
+        }
+
+
+class Counter:
+    """Contador monotónico"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        """Incrementa el contador"""
+        self.value += amount
+
+
+class PipelineMetrics:
+    """Registro de métricas del pipeline: latencias por etapa y contadores"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, max_classes=1024):
+        """
+        Args:
+            buckets: Límites de los buckets de latencia en segundos
+            max_classes: Tamaño de la tabla de detecciones por id de clase
+        """
+        self.stages = {stage: Histogram(buckets) for stage in STAGES}
+        self.exceptions = {stage: Counter() for stage in STAGES}
+        self.frames = Counter()
+        self.detections_by_class = np.zeros(max_classes, dtype=np.int64)
+        self.class_names = {}
+        # Valores leídos solo al exportar: nombre -> (tipo, función)
+        self.gauges = {}
+        # Vistas JSON adicionales del endpoint HTTP: nombre -> función(parámetros)
+        self.views = {}
+        self.start_time = time.time()
+
+    def stage(self, name):
+        """
+        Histograma de una etapa (obtenerlo una vez y reutilizarlo en el bucle)
+
+        Args:
+            name: Nombre de la etapa (ver STAGES)
+
+        Returns:
+            histogram: Histogram de la etapa
+        """
+        return self.stages[name]
+
+    def count_detections(self, detections):
+        """
+        Suma las detecciones de un frame por clase (vectorizado)
+
+        Args:
+            detections: Detections columnar
+        """
+        if len(detections):
+            np.add.at(self.detections_by_class, detections.class_id, 1)
+            if detections.names is not self.class_names:
+                self.class_names = detections.names
+
+    def register_gauge(self, name, func, kind="gauge"):
+        """
+        Registra un valor calculado bajo demanda al exportar (sin coste en el bucle)
+
+        Args:
+            name: Nombre de la métrica
+            func: Función sin argumentos que devuelve un número
+            kind: "gauge" o "counter"
+        """
+        self.gauges[name] = (kind, func)
+
+    def register_view(self, name, func):
+        """
+        Registra una vista JSON servida en /<name>.json por el endpoint HTTP
+
+        Args:
+            name: Nombre de la vista
+            func: Función que recibe el diccionario de parámetros de la URL y devuelve un dict
+        """
+        self.views[name] = func
+
+    def snapshot(self):
+        """
+        Estado de todas las métricas
+
+        Returns:
+            snapshot: Diccionario serializable a JSON
+        """
+        class_ids = np.flatnonzero(self.detections_by_class)
+        gauges = {}
+        for name, (_, func) in self.gauges.items():
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                gauges[name] = None
+                print(f"[WARNING] Error leyendo métrica {name}: {e}")
+        return {
+            "timestamp": time.time(),
+            "uptime_s": time.time() - self.start_time,
+            "frames": self.frames.value,
+            "stages": {name: histogram.snapshot() for name, histogram in self.stages.items()},
+            "exceptions": {name: counter.value for name, counter in self.exceptions.items()},
+            "detections_by_class": {
+                self.class_names.get(int(i), str(int(i))): int(self.detections_by_class[i]) for i in class_ids
+            },
+            "gauges": gauges
+        }
+
+    def prometheus_text(self):
+        """
+        Exporta las métricas en formato de texto de Prometheus
+
+        Returns:
+            text: Cuerpo de la respuesta /metrics
+        """
+        lines = [
+            "# HELP yolo_stage_latency_seconds Latencia por etapa del pipeline",
+            "# TYPE yolo_stage_latency_seconds histogram"
+        ]
+        for stage, histogram in self.stages.items():
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'yolo_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'yolo_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'yolo_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(f'yolo_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines.append("# HELP yolo_exceptions_total Excepciones por etapa")
+        lines.append("# TYPE yolo_exceptions_total counter")
+        for stage, counter in self.exceptions.items():
+            lines.append(f'yolo_exceptions_total{{stage="{stage}"}} {counter.value}')
+
+        lines.append("# HELP yolo_frames_total Frames procesados")
+        lines.append("# TYPE yolo_frames_total counter")
+        lines.append(f"yolo_frames_total {self.frames.value}")
+
+        lines.append("# HELP yolo_detections_total Detecciones por clase")
+        lines.append("# TYPE yolo_detections_total counter")
+        for class_id in np.flatnonzero(self.detections_by_class).tolist():
+            name = str(self.class_names.get(class_id, class_id)).replace('"', '\\"')
+            lines.append(f'yolo_detections_total{{class="{name}"}} {int(self.detections_by_class[class_id])}')
+
+        for name, (kind, func) in self.gauges.items():
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines.append(f"# TYPE yolo_{name} {kind}")
+            lines.append(f"yolo_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Endpoint HTTP local con /metrics (Prometheus), /metrics.json y las vistas registradas"""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108):
+        """
+        Args:
+            metrics: PipelineMetrics a exportar
+            host: Interfaz de escucha (por defecto solo local)
+            port: Puerto TCP
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Arranca el servidor en un hilo en segundo plano"""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                view = metrics.views.get(url.path[1:-len(".json")]) if url.path.endswith(".json") else None
+                if url.path == "/metrics":
+                    body = metrics.prometheus_text().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif url.path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot()).encode("utf-8")
+                    content_type = "application/json"
+                elif view is not None:
+                    try:
+                        body = json.dumps(view(dict(parse_qsl(url.query)))).encode("utf-8")
+                    except ValueError as e:
+                        self.send_error(400, str(e))
+                        return
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Sin log por petición
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self.thread.start()
+        print(f"[INFO] Métricas disponibles en http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """Detiene el servidor"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MetricsDumper:
+    """Escribe periódicamente un volcado JSON de las métricas (reemplazo atómico)"""
+
+    def __init__(self, metrics, path, interval=10.0):
+        """
+        Args:
+            metrics: PipelineMetrics a volcar
+            path: Archivo JSON de salida
+            interval: Segundos entre volcados
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Arranca el hilo de volcado"""
+        self.thread = threading.Thread(target=self._loop, name="metrics-dump", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Detiene el hilo y hace un último volcado"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self.dump()
+
+    def dump(self):
+        """Escribe el volcado en un archivo temporal y lo renombra"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.metrics.snapshot(), f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"[ERROR] Error guardando métricas: {e}")
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+
+def create_metrics(config):
+    """
+    Crea el registro de métricas y, si están configurados, el endpoint HTTP y el volcado JSON
+
+    Args:
+        config: Configuración completa (sección metrics)
+
+    Returns:
+        metrics: PipelineMetrics o None si está desactivado
+        services: Lista de servicios arrancados (con método stop)
+    """
+    metrics_config = config.get("metrics", {})
+    if not metrics_config.get("enabled", False):
+        return None, []
+
+    metrics = PipelineMetrics()
+    services = []
+    port = metrics_config.get("http_port", 0)
+    if port:
+        server = MetricsServer(metrics, metrics_config.get("host", "127.0.0.1"), port)
+        try:
+            server.start()
+            services.append(server)
+        except OSError as e:
+            print(f"[WARNING] No se pudo abrir el endpoint de métricas: {e}")
+    json_path = metrics_config.get("json_path")
+    if json_path:
+        dumper = MetricsDumper(metrics, json_path, metrics_config.get("json_interval_s", 10))
+        dumper.start()
+        services.append(dumper)
+    return metrics, services
@@ -0,0 +1,153 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+from src.detector.yolo_detector import YOLODetector
+from src.detector.distance_calc import DistanceCalculator
+from src.offline.frame_sources import build_shards, iter_frames
+from src.offline.result_writers import create_writer
+
+# Componentes cargados una sola vez por proceso trabajador
+_worker_state = {}
+
+
+def _limit_threads(threads):
+    """Limita los hilos internos de OpenCV/PyTorch para no sobresuscribir núcleos"""
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(config, threads):
+    """
+    Inicializador del proceso trabajador: carga el modelo una vez
+
+    Args:
+        config: Configuración completa
+        threads: Hilos internos por proceso
+    """
+    _limit_threads(threads)
+    _worker_state["config"] = config
+    _worker_state["detector"] = YOLODetector(config)
+
+
+def iter_results(frames, detector, distance_calculator):
+    """
+    Etapa de detección y distancia sobre un generador de frames
+
+    Args:
+        frames: Iterable de (frame_index, timestamp, frame)
+        detector: YOLODetector
+        distance_calculator: DistanceCalculator
+
+    Yields:
+        frame_index, timestamp, detections: Detections con distance calculada
+    """
+    for frame_index, timestamp, frame in frames:
+        detections = detector.detect_columnar(frame)
+        distance_calculator.calculate_distances(detections, frame.shape[0])
+        yield frame_index, timestamp, detections
+
+
+def shard_name(shard, index):
+    """Nombre de archivo de salida para un fragmento"""
+    base = os.path.splitext(os.path.basename(os.path.normpath(shard["source"])))[0] or "input"
+    return f"{index:05d}_{base}_{shard['start']}"
+
+
+def process_shard(shard, index, output_dir, output_format):
+    """
+    Procesa un fragmento completo en el proceso actual
+
+    Args:
+        shard: Fragmento devuelto por build_shards
+        index: Número del fragmento (para el nombre de salida)
+        output_dir: Directorio de salida
+        output_format: "jsonl" o "npz"
+
+    Returns:
+        summary: Diccionario con frames, detecciones, tiempo y archivo de salida
+    """
+    detector = _worker_state["detector"]
+    # Estado de suavizado y tracking independiente por fragmento
+    detector.reset_tracking()
+    distance_calculator = DistanceCalculator(_worker_state["config"])
+
+    writer = create_writer(output_format, output_dir, shard_name(shard, index))
+    start = time.monotonic()
+    try:
+        for frame_index, timestamp, detections in iter_results(iter_frames(shard), detector, distance_calculator):
+            writer.write(shard["source"], frame_index, timestamp, detections)
+    finally:
+        writer.close()
+        distance_calculator.close()
+
+    return {
+        "source": shard["source"],
+        "start": shard["start"],
+        "frames": writer.frames,
+        "detections": writer.rows,
+        "seconds": time.monotonic() - start,
+        "output": writer.path
+    }
+
+
+def run_batch(config, inputs, output_dir, workers=None, chunk_frames=None, output_format=None):
+    """
+    Procesa vídeos y directorios de imágenes sin ventana, repartiendo fragmentos entre procesos
+
+    Args:
+        config: Configuración completa
+        inputs: Lista de vídeos, directorios o imágenes
+        output_dir: Directorio donde escribir un archivo por fragmento
+        workers: Número de procesos (None = offline.workers o núcleos disponibles)
+        chunk_frames: Frames por fragmento (None = offline.chunk_frames, 0 = archivo completo)
+        output_format: "jsonl" o "npz" (None = offline.output_format)
+
+    Returns:
+        summary: Diccionario con totales, FPS y resumen por fragmento
+    """
+    offline_config = config.get("offline", {})
+    workers = workers or offline_config.get("workers") or os.cpu_count() or 1
+    if chunk_frames is None:
+        chunk_frames = offline_config.get("chunk_frames", 0)
+    output_format = output_format or offline_config.get("output_format", "jsonl")
+    threads = offline_config.get("threads_per_worker", 1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    shards = build_shards(inputs, chunk_frames)
+    print(f"[INFO] {len(shards)} fragmentos repartidos entre {workers} procesos")
+
+    start = time.monotonic()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config, threads)) as executor:
+        futures = {
+            executor.submit(process_shard, shard, index, output_dir, output_format): shard
+            for index, shard in enumerate(shards)
+        }
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[ERROR] Error procesando {shard['source']} (desde {shard['start']}): {e}")
+                continue
+            results.append(result)
+            print(f"[INFO] {result['source']} [{result['start']}]: {result['frames']} frames, "
+                  f"{result['detections']} detecciones en {result['seconds']:.1f}s")
+
+    elapsed = time.monotonic() - start
+    frames = sum(result["frames"] for result in results)
+    results.sort(key=lambda result: (result["source"], result["start"]))
+    return {
+        "shards": results,
+        "frames": frames,
+        "detections": sum(result["detections"] for result in results),
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "workers": workers
+    }
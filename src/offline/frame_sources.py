@@ -0,0 +1,136 @@
+import os
+import cv2
+
+# Extensiones reconocidas
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v", ".webm", ".mpg", ".mpeg")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def list_images(directory):
+    """
+    Lista las imágenes de un directorio en orden alfabético
+
+    Args:
+        directory: Ruta del directorio
+
+    Returns:
+        files: Lista de rutas de imagen
+    """
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def video_frame_count(path):
+    """
+    Número de frames de un vídeo según sus metadatos
+
+    Args:
+        path: Ruta del vídeo
+
+    Returns:
+        count: Número de frames (0 si no se conoce)
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+
+def build_shards(inputs, chunk_frames=0):
+    """
+    Divide las entradas (vídeos, directorios de imágenes o imágenes sueltas) en fragmentos de trabajo
+
+    Args:
+        inputs: Lista de rutas
+        chunk_frames: Frames por fragmento (0 = un fragmento por archivo/directorio)
+
+    Returns:
+        shards: Lista de diccionarios con source, kind, start, end y files
+    """
+    shards = []
+    loose_images = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files = list_images(path)
+            step = chunk_frames or len(files) or 1
+            for start in range(0, len(files), step):
+                shards.append({
+                    "source": path,
+                    "kind": "images",
+                    "start": start,
+                    "end": min(start + step, len(files)),
+                    "files": files[start:start + step]
+                })
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            loose_images.append(path)
+        elif path.lower().endswith(VIDEO_EXTENSIONS):
+            total = video_frame_count(path) if chunk_frames else 0
+            if not chunk_frames or total <= chunk_frames:
+                shards.append({"source": path, "kind": "video", "start": 0, "end": None, "files": None})
+                continue
+            for start in range(0, total, chunk_frames):
+                shards.append({
+                    "source": path,
+                    "kind": "video",
+                    "start": start,
+                    "end": min(start + chunk_frames, total),
+                    "files": None
+                })
+        else:
+            print(f"[WARNING] Entrada ignorada (formato no reconocido): {path}")
+
+    if loose_images:
+        shards.append({
+            "source": "images",
+            "kind": "images",
+            "start": 0,
+            "end": len(loose_images),
+            "files": loose_images
+        })
+    return shards
+
+
+def iter_frames(shard):
+    """
+    Generador de frames de un fragmento
+
+    Args:
+        shard: Diccionario devuelto por build_shards
+
+    Yields:
+        frame_index: Índice del frame dentro de la fuente
+        timestamp: Marca de tiempo en segundos (posición en el vídeo, 0 para imágenes)
+        frame: Imagen BGR (en vídeos el mismo buffer se reutiliza en la siguiente iteración)
+    """
+    if shard["kind"] == "images":
+        for offset, path in enumerate(shard["files"]):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"[WARNING] No se pudo leer la imagen {path}")
+                continue
+            yield shard["start"] + offset, 0.0, frame
+        return
+
+    cap = cv2.VideoCapture(shard["source"])
+    if not cap.isOpened():
+        print(f"[ERROR] No se pudo abrir el vídeo {shard['source']}")
+        return
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        index = shard["start"]
+        if index:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        frame = None
+        while shard["end"] is None or index < shard["end"]:
+            # Decodificar sobre el buffer del frame anterior (ya consumido)
+            success, frame = cap.read(frame)
+            if not success:
+                break
+            yield index, index / fps, frame
+            index += 1
+    finally:
+        cap.release()
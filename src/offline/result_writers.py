@@ -0,0 +1,134 @@
+import json
+import os
+import numpy as np
+
+# Formatos de salida soportados
+OUTPUT_FORMATS = ("jsonl", "npz")
+
+
+class JsonlWriter:
+    """Escribe una línea JSON por frame con sus detecciones y distancias"""
+
+    extension = ".jsonl"
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Ruta del archivo de salida
+        """
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.frames = 0
+        self.rows = 0
+
+    def write(self, source, frame_index, timestamp, detections):
+        """
+        Añade los resultados de un frame
+
+        Args:
+            source: Ruta de la fuente (vídeo o directorio)
+            frame_index: Índice del frame en la fuente
+            timestamp: Marca de tiempo en segundos
+            detections: Detections con distance calculada
+        """
+        records = detections.to_list()
+        for record, class_id in zip(records, detections.class_id.tolist()):
+            record["class_id"] = class_id
+            record["box"] = list(record["box"])
+        self.file.write(json.dumps({
+            "source": source,
+            "frame": frame_index,
+            "timestamp": round(timestamp, 4),
+            "detections": records
+        }, ensure_ascii=False))
+        self.file.write("\n")
+        self.frames += 1
+        self.rows += len(records)
+
+    def close(self):
+        """Cierra el archivo"""
+        self.file.close()
+
+
+class NpzColumnarWriter:
+    """Acumula las detecciones en columnas y las guarda como .npz (una fila por detección)"""
+
+    extension = ".npz"
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Ruta del archivo de salida
+        """
+        self.path = path
+        self.columns = {name: [] for name in (
+            "frame", "timestamp", "class_id", "conf", "x", "y", "w", "h", "track_id", "distance"
+        )}
+        self.names = {}
+        self.source = ""
+        self.frames = 0
+        self.rows = 0
+
+    def write(self, source, frame_index, timestamp, detections):
+        """
+        Añade los resultados de un frame
+
+        Args:
+            source: Ruta de la fuente
+            frame_index: Índice del frame en la fuente
+            timestamp: Marca de tiempo en segundos
+            detections: Detections con distance calculada
+        """
+        n = len(detections)
+        self.source = source
+        self.frames += 1
+        if n == 0:
+            return
+        self.names = detections.names
+        columns = self.columns
+        columns["frame"].append(np.full(n, frame_index, dtype=np.int64))
+        columns["timestamp"].append(np.full(n, timestamp, dtype=np.float64))
+        columns["class_id"].append(detections.class_id)
+        columns["conf"].append(detections.conf)
+        columns["x"].append(detections.x)
+        columns["y"].append(detections.y)
+        columns["w"].append(detections.w)
+        columns["h"].append(detections.h)
+        track_id = detections.track_id if detections.track_id is not None else detections.instance_ids()
+        columns["track_id"].append(track_id.astype(np.int64))
+        columns["distance"].append(detections.distance.astype(np.float32))
+        self.rows += n
+
+    def close(self):
+        """Concatena las columnas y escribe el archivo"""
+        dtypes = {"frame": np.int64, "timestamp": np.float64, "class_id": np.int32, "conf": np.float32,
+                  "x": np.int32, "y": np.int32, "w": np.int32, "h": np.int32,
+                  "track_id": np.int64, "distance": np.float32}
+        arrays = {
+            name: np.concatenate(chunks).astype(dtypes[name]) if chunks else np.empty(0, dtype=dtypes[name])
+            for name, chunks in self.columns.items()
+        }
+        np.savez(
+            self.path,
+            source=np.array(self.source),
+            class_names=np.array(json.dumps({int(k): v for k, v in self.names.items()})),
+            **arrays
+        )
+
+
+def create_writer(output_format, output_dir, name):
+    """
+    Crea el escritor de resultados para un fragmento
+
+    Args:
+        output_format: "jsonl" o "npz"
+        output_dir: Directorio de salida
+        name: Nombre base del archivo (sin extensión)
+
+    Returns:
+        writer: JsonlWriter o NpzColumnarWriter
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida desconocido: {output_format}")
+    writer_class = JsonlWriter if output_format == "jsonl" else NpzColumnarWriter
+    return writer_class(os.path.join(output_dir, name + writer_class.extension))
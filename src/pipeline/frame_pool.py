@@ -0,0 +1,77 @@
+import threading
+from collections import deque
+import numpy as np
+
+
+class FramePool:
+    """Pool de buffers de frame preasignados que se reciclan al liberarse"""
+
+    def __init__(self, capacity, dtype=np.uint8):
+        """
+        Args:
+            capacity: Máximo de buffers libres guardados (frames en vuelo entre etapas)
+            dtype: Tipo de los buffers
+        """
+        self.capacity = capacity
+        self.dtype = dtype
+        self.shape = None
+        self.free = deque()
+        self.lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def configure(self, shape):
+        """
+        Fija la forma de los buffers; si cambia la resolución se descartan los anteriores
+
+        Args:
+            shape: Forma (alto, ancho, canales) de los frames
+        """
+        with self.lock:
+            if shape != self.shape:
+                self.shape = shape
+                self.free.clear()
+
+    def acquire(self):
+        """
+        Entrega un buffer libre (o uno nuevo si el pool está vacío)
+
+        Returns:
+            buffer: Array con la forma configurada, o None si aún no se conoce la forma
+        """
+        with self.lock:
+            if self.shape is None:
+                return None
+            if self.free:
+                self.reused += 1
+                return self.free.pop()
+            self.allocated += 1
+            shape = self.shape
+        return np.empty(shape, dtype=self.dtype)
+
+    def release(self, buffer):
+        """
+        Devuelve un buffer al pool; no debe volver a usarse después
+
+        Args:
+            buffer: Array entregado por acquire (se ignoran None y formas distintas)
+        """
+        if buffer is None:
+            return
+        with self.lock:
+            if buffer.shape == self.shape and len(self.free) < self.capacity:
+                self.free.append(buffer)
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: Buffers reservados, reutilizados y libres
+        """
+        with self.lock:
+            total = self.allocated + self.reused
+            return {
+                "allocated": self.allocated,
+                "reused": self.reused,
+                "free": len(self.free),
+                "reuse_ratio": self.reused / total if total else 0.0
+            }
@@ -0,0 +1,515 @@
+import queue
+import threading
+import time
+from src.detector.frame_skipper import AdaptiveFrameSkipper
+from src.detector.motion_gate import MotionGate
+from src.pipeline.frame_pool import FramePool
+from src.metrics.metrics import now
+
+# Políticas de descarte entre etapas
+DROP_OLDEST = "drop_oldest"   # Si la cola está llena, se descarta el frame más antiguo
+BLOCK = "block"               # La etapa anterior espera a que haya hueco
+SKIP_STALE = "skip_stale"     # Cola bloqueante, pero la inferencia ignora frames viejos
+
+DROP_POLICIES = (DROP_OLDEST, BLOCK, SKIP_STALE)
+
+
+class FramePacket:
+    """Paquete que viaja entre etapas del pipeline"""
+
+    __slots__ = ("seq", "frame", "timestamp", "columnar", "detections", "object_counts", "output")
+
+    def __init__(self, seq, frame, timestamp):
+        self.seq = seq
+        self.frame = frame
+        self.timestamp = timestamp
+        self.columnar = None
+        self.detections = []
+        self.object_counts = {}
+        self.output = None
+
+
+class StageQueue:
+    """Cola acotada entre dos etapas con política de descarte configurable"""
+
+    def __init__(self, maxsize, policy, on_drop=None):
+        """
+        Inicializa la cola
+
+        Args:
+            maxsize: Número máximo de paquetes en la cola
+            policy: Política de descarte (ver DROP_POLICIES)
+            on_drop: Función opcional llamada con cada paquete descartado
+        """
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item, stop_event, force_block=False):
+        """
+        Encola un paquete respetando la política de descarte
+
+        Args:
+            item: Paquete a encolar (None indica fin de stream)
+            stop_event: Evento de parada para no bloquear indefinidamente
+            force_block: Ignorar la política y esperar siempre (fin de stream)
+
+        Returns:
+            accepted: True si el paquete se encoló
+        """
+        if self.policy == DROP_OLDEST and not force_block:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    # Descartar el paquete más antiguo para dejar sitio al nuevo
+                    try:
+                        dropped = self.queue.get_nowait()
+                        self.dropped += 1
+                        if self.on_drop is not None and dropped is not None:
+                            self.on_drop(dropped)
+                    except queue.Empty:
+                        pass
+
+        while not stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, timeout):
+        """
+        Extrae un paquete de la cola
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            item: Paquete extraído
+
+        Raises:
+            queue.Empty: Si no llegó ningún paquete a tiempo
+        """
+        return self.queue.get(timeout=timeout)
+
+    def depth(self):
+        """Número aproximado de paquetes pendientes"""
+        return self.queue.qsize()
+
+
+class StageStats:
+    """Contadores de latencia de una etapa (un único hilo escritor)"""
+
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def record(self, elapsed):
+        """
+        Registra la latencia de un paquete procesado
+
+        Args:
+            elapsed: Tiempo de procesamiento en segundos
+        """
+        self.processed += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def snapshot(self):
+        """
+        Devuelve las estadísticas actuales
+
+        Returns:
+            stats: Diccionario con contadores y latencias en ms
+        """
+        avg = self.total_time / self.processed if self.processed else 0.0
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_ms": avg * 1000,
+            "max_ms": self.max_time * 1000,
+            "last_ms": self.last_time * 1000
+        }
+
+
+class DetectionPipeline:
+    """Pipeline con hilos para captura, inferencia y renderizado"""
+
+    def __init__(self, config, camera, detector, distance_calculator, visualizer, headless=None,
+                 metrics=None, publisher=None, history=None, analytics=None):
+        """
+        Inicializa el pipeline
+
+        Args:
+            config: Configuración completa de la aplicación
+            camera: CameraHandler ya inicializado
+            detector: YOLODetector
+            distance_calculator: DistanceCalculator
+            visualizer: DetectionVisualizer
+            headless: Si es True no se muestra ventana (None = usar configuración)
+            metrics: PipelineMetrics opcional para latencias por etapa y contadores
+            publisher: EventPublisher opcional que difunde las detecciones de cada frame
+            history: HistoryStore opcional donde se guardan las detecciones de cada frame
+            analytics: RollingAnalytics opcional con agregados deslizantes por clase y ocupación
+        """
+        self.config = config
+        self.pipeline_config = config.get("pipeline", {})
+        self.camera = camera
+        self.detector = detector
+        self.distance_calculator = distance_calculator
+        self.visualizer = visualizer
+        
+        # Salto adaptativo de frames (detectar cada K frames y propagar el resto)
+        self.frame_skipper = None
+        if config["detector"].get("frame_skip", {}).get("enabled", False):
+            self.frame_skipper = AdaptiveFrameSkipper(config, detector)
+
+        # Compuerta de movimiento: sin cambios en la escena se reutilizan las detecciones
+        self.motion_gate = None
+        if config["detector"].get("motion_gate", {}).get("enabled", False):
+            detect = self.frame_skipper.process if self.frame_skipper is not None else detector.detect_columnar
+            self.motion_gate = MotionGate(config, detect)
+
+        self.queue_size = self.pipeline_config.get("queue_size", 2)
+        self.drop_policy = self.pipeline_config.get("drop_policy", DROP_OLDEST)
+        if self.drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Política de descarte desconocida: {self.drop_policy}")
+        self.max_frame_age = self.pipeline_config.get("max_frame_age_ms", 200) / 1000.0
+        if headless is None:
+            headless = self.pipeline_config.get("headless", False)
+        self.headless = headless
+
+        # Buffers de frame reciclados: como máximo hay un frame por hueco de cola y por etapa
+        self.frame_pool = None
+        if self.pipeline_config.get("frame_pool", True):
+            self.frame_pool = FramePool(3 * self.queue_size + 4)
+
+        # Colas acotadas entre etapas
+        self.capture_queue = StageQueue(self.queue_size, self.drop_policy, self.release)
+        self.render_queue = StageQueue(self.queue_size, self.drop_policy, self.release)
+        self.output_queue = StageQueue(self.queue_size, self.drop_policy, self.release)
+
+        # Protege detector y calculador de distancia frente a cambios desde el hilo principal
+        # (reinicio de tracking, calibración)
+        self.lock = threading.Lock()
+
+        self.stats = {
+            "capture": StageStats(),
+            "inference": StageStats(),
+            "render": StageStats()
+        }
+        self.skipped_stale = 0
+        self.camera_dropped = 0
+        self.outputs = 0
+
+        self.stop_event = threading.Event()
+        self.finished = threading.Event()
+        self.threads = []
+        self.start_time = None
+
+        self.publisher = publisher
+        self.history = history
+        self.analytics = analytics
+        self.metrics = metrics
+        if metrics is not None:
+            detector.metrics = metrics
+            self._register_gauges(metrics)
+
+    def _register_gauges(self, metrics):
+        """Expone contadores del pipeline que solo se leen al exportar"""
+        metrics.register_gauge("dropped_frames_total", self.dropped_frames, kind="counter")
+        metrics.register_gauge("capture_queue_depth", self.capture_queue.depth)
+        metrics.register_gauge("render_queue_depth", self.render_queue.depth)
+        metrics.register_gauge("output_queue_depth", self.output_queue.depth)
+        metrics.register_gauge("pipeline_fps", lambda: self.get_stats()["fps"])
+        if self.publisher is not None:
+            metrics.register_gauge("stream_subscribers", lambda: self.publisher.get_stats()["subscribers"])
+            metrics.register_gauge("stream_dropped_total", lambda: self.publisher.get_stats()["dropped"],
+                                   kind="counter")
+        if self.analytics is not None:
+            metrics.register_gauge("analytics_active_tracks", lambda: self.analytics.get_stats()["active_tracks"])
+            metrics.register_view("analytics", self.analytics.query)
+        if self.motion_gate is not None:
+            metrics.register_gauge("motion_skip_ratio", lambda: self.motion_gate.get_stats()["skip_ratio"])
+        if self.frame_skipper is not None:
+            metrics.register_gauge("frame_detect_ratio", lambda: self.frame_skipper.get_stats()["detect_ratio"])
+
+    def apply_runtime(self, runtime):
+        """
+        Aplica una configuración recargada en caliente sin detener el pipeline
+
+        Args:
+            runtime: RuntimeConfig compilado
+        """
+        with self.lock:
+            self.detector.apply_runtime(runtime)
+            self.distance_calculator.apply_runtime(runtime)
+        self.visualizer.apply_runtime(runtime)
+
+    def dropped_frames(self):
+        """Total de frames descartados: colas, cámara y frames caducados"""
+        return (self.capture_queue.dropped + self.render_queue.dropped + self.output_queue.dropped
+                + self.camera_dropped + self.skipped_stale)
+
+    def start(self):
+        """Arranca un hilo por etapa"""
+        self.stop_event.clear()
+        self.finished.clear()
+        self.start_time = time.monotonic()
+        self.threads = [
+            threading.Thread(target=self._capture_worker, name="pipeline-capture", daemon=True),
+            threading.Thread(target=self._inference_worker, name="pipeline-inference", daemon=True),
+            threading.Thread(target=self._render_worker, name="pipeline-render", daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+        print(f"[INFO] Pipeline iniciado (cola={self.queue_size}, política={self.drop_policy})")
+
+    def stop(self):
+        """Detiene todas las etapas y espera a los hilos"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        self.threads = []
+
+    def get_result(self, timeout=1.0):
+        """
+        Obtiene el siguiente frame procesado
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            packet: FramePacket con detecciones y frame renderizado, o None si no hay
+                    resultado disponible (o si terminó el stream)
+        """
+        try:
+            packet = self.output_queue.get(timeout)
+        except queue.Empty:
+            return None
+        if packet is None:
+            self.finished.set()
+            return None
+        self.outputs += 1
+        if self.metrics is not None:
+            self.metrics.frames.inc()
+        return packet
+
+    def release(self, packet):
+        """
+        Devuelve el buffer del frame al pool cuando el consumidor termina con el paquete.
+        Con dibujo in situ packet.output es el mismo buffer: no usarlo después.
+
+        Args:
+            packet: FramePacket ya consumido
+        """
+        if self.frame_pool is not None and packet is not None:
+            self.frame_pool.release(packet.frame)
+            packet.frame = None
+            packet.output = None
+
+    def run_headless(self, max_frames=None, on_result=None):
+        """
+        Ejecuta el pipeline sin ventana hasta fin de stream o max_frames
+
+        Args:
+            max_frames: Número máximo de frames de salida (None = sin límite)
+            on_result: Callback opcional invocado con cada FramePacket
+
+        Returns:
+            stats: Estadísticas finales del pipeline
+        """
+        self.start()
+        try:
+            while not self.finished.is_set():
+                if max_frames is not None and self.outputs >= max_frames:
+                    break
+                packet = self.get_result(timeout=0.5)
+                if packet is not None:
+                    if on_result is not None:
+                        on_result(packet)
+                    self.release(packet)
+        finally:
+            self.stop()
+        return self.get_stats()
+
+    def get_stats(self):
+        """
+        Devuelve contadores por etapa: procesados, latencias y profundidad de colas
+
+        Returns:
+            stats: Diccionario con estadísticas del pipeline
+        """
+        stats = {name: stage.snapshot() for name, stage in self.stats.items()}
+        stats["capture"]["queue_depth"] = self.capture_queue.depth()
+        stats["capture"]["dropped"] = self.capture_queue.dropped
+        stats["capture"]["camera_dropped"] = self.camera_dropped
+        stats["inference"]["queue_depth"] = self.render_queue.depth()
+        stats["inference"]["dropped"] = self.render_queue.dropped
+        stats["inference"]["skipped_stale"] = self.skipped_stale
+        stats["render"]["queue_depth"] = self.output_queue.depth()
+        stats["render"]["dropped"] = self.output_queue.dropped
+        if self.frame_skipper is not None:
+            stats["frame_skip"] = self.frame_skipper.get_stats()
+        if self.motion_gate is not None:
+            stats["motion_gate"] = self.motion_gate.get_stats()
+        if self.frame_pool is not None:
+            stats["frame_pool"] = self.frame_pool.get_stats()
+        if self.publisher is not None:
+            stats["stream"] = self.publisher.get_stats()
+        if self.history is not None:
+            stats["history"] = self.history.get_stats()
+        if self.analytics is not None:
+            stats["analytics"] = self.analytics.get_stats()
+        if getattr(self.detector, "tiler", None) is not None:
+            stats["tiling"] = self.detector.tiler.get_stats()
+
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0.0
+        stats["outputs"] = self.outputs
+        stats["fps"] = self.outputs / elapsed if elapsed > 0 else 0.0
+        return stats
+
+    def _finish_stream(self, out_queue):
+        """Propaga el marcador de fin de stream a la siguiente etapa"""
+        out_queue.put(None, self.stop_event, force_block=True)
+
+    def _capture_worker(self):
+        """Etapa de captura: lee frames de la cámara o del vídeo"""
+        stats = self.stats["capture"]
+        histogram = self.metrics.stage("capture") if self.metrics is not None else None
+        pool = self.frame_pool
+        while not self.stop_event.is_set():
+            start = now()
+            buffer = pool.acquire() if pool is not None else None
+            frame, success, info = self.camera.read_frame(with_info=True, out=buffer)
+
+            if not success:
+                if pool is not None:
+                    pool.release(buffer)
+                # Fin de vídeo: propagar fin de stream
+                if getattr(self.camera, "is_file_source", False):
+                    self._finish_stream(self.capture_queue)
+                    return
+                stats.errors += 1
+                if self.metrics is not None:
+                    self.metrics.exceptions["capture"].inc()
+                print("[ERROR] Error al capturar el frame. Reintentando...")
+                time.sleep(0.5)
+                continue
+
+            # Primer frame o cambio de resolución: el pool adopta la nueva forma
+            if pool is not None and frame is not buffer:
+                pool.configure(frame.shape)
+
+            # El timestamp es el de captura, para medir la edad real del frame
+            packet = FramePacket(info["seq"], frame, info["timestamp"])
+            self.camera_dropped = info["dropped"]
+            elapsed = now() - start
+            stats.record(elapsed)
+            if histogram is not None:
+                histogram.observe(elapsed)
+            if not self.capture_queue.put(packet, self.stop_event):
+                # Parada con la cola llena: devolver el buffer al pool
+                self.release(packet)
+
+    def _inference_worker(self):
+        """Etapa de inferencia: detección YOLO y cálculo de distancias"""
+        stats = self.stats["inference"]
+        metrics = self.metrics
+        distance_histogram = metrics.stage("distance") if metrics is not None else None
+        while not self.stop_event.is_set():
+            try:
+                packet = self.capture_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if packet is None:
+                self._finish_stream(self.render_queue)
+                return
+
+            if self.drop_policy == SKIP_STALE and time.monotonic() - packet.timestamp > self.max_frame_age:
+                self.skipped_stale += 1
+                self.release(packet)
+                continue
+
+            start = now()
+
+            try:
+                with self.lock:
+                    if self.motion_gate is not None:
+                        columnar = self.motion_gate.process(packet.frame)
+                    elif self.frame_skipper is not None:
+                        columnar = self.frame_skipper.process(packet.frame)
+                    else:
+                        columnar = self.detector.detect_columnar(packet.frame)
+                    # Las detecciones reutilizadas ya llevan sus distancias
+                    distance_start = None
+                    if self.motion_gate is None or not self.motion_gate.reused:
+                        distance_start = now()
+                        self.distance_calculator.calculate_distances(columnar, packet.frame.shape[0])
+                if distance_histogram is not None:
+                    # Sin muestras de coste cero en los frames reutilizados: sesgarían p50/p95
+                    if distance_start is not None:
+                        distance_histogram.observe_since(distance_start)
+                    metrics.count_detections(columnar)
+                if self.publisher is not None:
+                    self.publisher.publish(columnar, packet.seq, packet.timestamp)
+                if self.history is not None:
+                    # Instante de captura en reloj de pared (el historial se consulta por fecha)
+                    capture_time = time.time() - (time.monotonic() - packet.timestamp)
+                    self.history.append(capture_time, packet.seq, columnar)
+                if self.analytics is not None:
+                    self.analytics.update(columnar, packet.timestamp, packet.frame.shape)
+            except Exception as e:
+                stats.errors += 1
+                if metrics is not None:
+                    metrics.exceptions["inference"].inc()
+                print(f"[ERROR] Error en inferencia: {e}")
+                self.release(packet)
+                continue
+
+            packet.columnar = columnar
+            stats.record(now() - start)
+            self.render_queue.put(packet, self.stop_event)
+
+    def _render_worker(self):
+        """Etapa de renderizado: dibuja detecciones sobre el frame"""
+        stats = self.stats["render"]
+        histogram = self.metrics.stage("render") if self.metrics is not None else None
+        while not self.stop_event.is_set():
+            try:
+                packet = self.render_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if packet is None:
+                self._finish_stream(self.output_queue)
+                return
+
+            start = now()
+            try:
+                # Vista de compatibilidad (lista de diccionarios) para el visualizador y main.py
+                packet.detections = packet.columnar.to_list()
+                packet.object_counts = packet.columnar.counts()
+                packet.output = self.visualizer.visualize_detections(
+                    packet.frame, packet.detections, packet.object_counts
+                )
+            except Exception as e:
+                stats.errors += 1
+                if self.metrics is not None:
+                    self.metrics.exceptions["render"].inc()
+                print(f"[ERROR] Error en renderizado: {e}")
+                packet.output = packet.frame
+
+            elapsed = now() - start
+            stats.record(elapsed)
+            if histogram is not None:
+                histogram.observe(elapsed)
+            self.output_queue.put(packet, self.stop_event)
@@ -0,0 +1,134 @@
+import importlib.util
+import os
+import time
+from contextlib import contextmanager
+
+# Módulo necesario por cada backend de inferencia
+BACKEND_MODULES = {
+    "ultralytics": "ultralytics",
+    "onnxruntime": "onnxruntime",
+    "openvino": "openvino"
+}
+
+
+class StartupTimer:
+    """Tiempos de cada fase del arranque (las fases pueden solaparse entre hilos)"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Cronometra un bloque como fase del arranque
+
+        Args:
+            name: Nombre de la fase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def timed(self, name, func, *args, **kwargs):
+        """
+        Ejecuta func cronometrándola (útil para lanzarla en otro hilo)
+
+        Returns:
+            result: Valor devuelto por func
+        """
+        with self.phase(name):
+            return func(*args, **kwargs)
+
+    def total(self):
+        """Segundos desde el inicio del arranque"""
+        return time.perf_counter() - self.start
+
+    def report(self):
+        """Muestra el tiempo de cada fase y el total"""
+        phases = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        print(f"[INFO] Arranque completado en {self.total() * 1000:.0f}ms ({phases})")
+
+
+def preflight(config):
+    """
+    Comprobaciones previas al arranque para fallar pronto y con un mensaje claro
+
+    Args:
+        config: Configuración completa de la aplicación
+
+    Returns:
+        errors: Lista de problemas que impiden arrancar (los avisos solo se muestran)
+    """
+    errors = []
+    detector_config = config["detector"]
+    backend = detector_config.get("backend", "ultralytics")
+    model_name = detector_config["model"]
+
+    module = BACKEND_MODULES.get(backend)
+    if module is None:
+        errors.append(f"Backend de inferencia desconocido: {backend}")
+    elif importlib.util.find_spec(module) is None:
+        errors.append(f"El backend {backend} necesita el paquete {module}")
+
+    if backend == "ultralytics":
+        if not os.path.exists(f"{model_name}.pt"):
+            print(f"[WARNING] {model_name}.pt no existe; Ultralytics lo descargará en el primer arranque")
+    elif module is not None:
+        from src.detector.backends.export_cache import artefact_path
+        from src.detector.backends.factory import parse_input_size
+
+        export_config = detector_config.get("export", {})
+        cache_dir = export_config.get("cache_dir", "models/exported")
+        int8 = export_config.get("int8", False)
+        path = artefact_path(cache_dir, model_name, backend,
+                             parse_input_size(export_config.get("input_size", 640)), int8)
+        if not os.path.exists(path):
+            print(f"[WARNING] {path} no está en caché; se exportará durante el arranque")
+            if importlib.util.find_spec("ultralytics") is None:
+                errors.append("Exportar el modelo necesita el paquete ultralytics")
+            if int8 and not export_config.get("calibration_source"):
+                errors.append("La cuantización INT8 necesita detector.export.calibration_source")
+            if int8 and backend == "openvino" and importlib.util.find_spec("nncf") is None:
+                errors.append("La cuantización INT8 con OpenVINO necesita el paquete nncf")
+            # La caché se crea al exportar: basta con poder escribir en el primer directorio existente
+            existing = os.path.abspath(cache_dir)
+            while not os.path.isdir(existing):
+                existing = os.path.dirname(existing)
+            if not os.access(existing, os.W_OK):
+                errors.append(f"No se puede escribir en la caché de modelos {cache_dir}")
+
+    source = config["camera"].get("source")
+    if source and not os.path.exists(source):
+        errors.append(f"No existe el vídeo de entrada {source}")
+
+    if not config.get("object_sizes"):
+        print("[WARNING] No hay tamaños de objetos configurados; no se calcularán distancias")
+    return errors
+
+
+def load_detector(config, timer):
+    """
+    Carga el detector y lo calienta; pensada para ejecutarse en un hilo en paralelo
+    con la inicialización de la cámara
+
+    Args:
+        config: Configuración completa de la aplicación
+        timer: StartupTimer donde registrar las fases model y warmup
+
+    Returns:
+        detector: YOLODetector listo para el primer frame
+    """
+    # Import diferido: el backend (torch, onnxruntime...) se importa dentro de este hilo
+    from src.detector.yolo_detector import YOLODetector
+
+    with timer.phase("model"):
+        detector = YOLODetector(config)
+
+    runs = config["detector"].get("warmup_runs", 2)
+    if runs:
+        with timer.phase("warmup"):
+            detector.warmup(config["camera"]["width"], config["camera"]["height"], runs)
+    return detector
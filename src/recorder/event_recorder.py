@@ -0,0 +1,294 @@
+import collections
+import json
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+
+class TriggerRule:
+    """Regla de disparo: una clase más cerca de una distancia dada"""
+
+    __slots__ = ("class_name", "max_distance", "min_confidence")
+
+    def __init__(self, class_name, max_distance, min_confidence=0.0):
+        """
+        Args:
+            class_name: Nombre de la clase vigilada
+            max_distance: Distancia (cm) por debajo de la cual se dispara
+            min_confidence: Confianza mínima de la detección
+        """
+        self.class_name = class_name
+        self.max_distance = max_distance
+        self.min_confidence = min_confidence
+
+    def describe(self):
+        return f"{self.class_name} < {self.max_distance}cm"
+
+
+class EventRecorder:
+    """
+    Graba clips con los segundos previos y posteriores a un evento sin bloquear el bucle principal.
+
+    El bucle solo evalúa las reglas (vectorizado) y encola una copia del frame; la
+    compresión JPEG del buffer previo, la decodificación y cv2.VideoWriter corren en
+    un hilo escritor. Si el escritor se retrasa, los frames se descartan en lugar de esperar.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Configuración completa (sección recorder)
+        """
+        recorder_config = config.get("recorder", {})
+        self.output_dir = recorder_config.get("output_dir", "recordings")
+        self.pre_event_s = recorder_config.get("pre_event_s", 5.0)
+        self.post_event_s = recorder_config.get("post_event_s", 5.0)
+        self.max_event_s = recorder_config.get("max_event_s", 60.0)
+        self.max_buffer_bytes = int(recorder_config.get("max_buffer_mb", 64) * 1024 * 1024)
+        self.jpeg_quality = recorder_config.get("jpeg_quality", 80)
+        self.scale = recorder_config.get("scale", 1.0)
+        self.codec = recorder_config.get("codec", "MJPG")
+        self.extension = recorder_config.get("extension", ".avi")
+        self.default_fps = config["camera"].get("fps", 30)
+        self.rules = [
+            TriggerRule(rule["class"], rule["max_distance"], rule.get("min_confidence", 0.0))
+            for rule in recorder_config.get("triggers", [])
+        ]
+
+        # Cola acotada hacia el escritor: (timestamp, frame, regla disparada o None, detecciones)
+        self.queue = queue.Queue(maxsize=recorder_config.get("queue_size", 8))
+
+        # Buffer previo al evento: (timestamp, JPEG) acotado por tiempo y por bytes
+        self.ring = collections.deque()
+        self.ring_bytes = 0
+
+        # Reglas resueltas a id de clase (se recalculan si cambia la tabla de nombres)
+        self._rule_names = None
+        self._rule_class_ids = []
+
+        # Evento en curso (solo lo usa el hilo escritor)
+        self.writer = None
+        self.event_path = None
+        self.event_info = None
+        self.event_start = 0.0
+        self.event_deadline = 0.0
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Estadísticas
+        self.submitted = 0
+        self.dropped = 0
+        self.events = 0
+        self.frames_written = 0
+
+    def start(self):
+        """Arranca el hilo escritor"""
+        self.thread = threading.Thread(target=self._writer_loop, name="event-recorder", daemon=True)
+        self.thread.start()
+        rules = ", ".join(rule.describe() for rule in self.rules) or "ninguna"
+        print(f"[INFO] Grabación de eventos activa en {self.output_dir} (reglas: {rules})")
+
+    def stop(self):
+        """Vacía la cola y detiene el hilo (que cierra el clip en curso antes de salir)"""
+        self.stop_event.set()
+        if self.thread is None:
+            return
+        self.thread.join(timeout=10.0)
+        if self.thread.is_alive():
+            # El clip pertenece al hilo escritor: cerrarlo aquí competiría con write()
+            print("[WARNING] El grabador sigue escribiendo; cerrará el clip al terminar")
+            return
+        self.thread = None
+
+    def check_triggers(self, detections):
+        """
+        Evalúa las reglas sobre las detecciones del frame
+
+        Args:
+            detections: Detections columnar con distancias
+
+        Returns:
+            rule: Primera TriggerRule que se cumple o None
+        """
+        if not self.rules or len(detections) == 0 or detections.distance is None:
+            return None
+        if detections.names is not self._rule_names:
+            class_ids = {name: class_id for class_id, name in detections.names.items()}
+            self._rule_class_ids = [class_ids.get(rule.class_name, -1) for rule in self.rules]
+            self._rule_names = detections.names
+        # Las distancias NaN (sin calcular) nunca cumplen la comparación
+        for rule, class_id in zip(self.rules, self._rule_class_ids):
+            hit = ((detections.class_id == class_id) & (detections.distance < rule.max_distance)
+                   & (detections.conf >= rule.min_confidence))
+            if hit.any():
+                return rule
+        return None
+
+    def submit(self, frame, detections, timestamp=None):
+        """
+        Entrega un frame al grabador (no bloquea nunca)
+
+        Args:
+            frame: Frame a grabar (normalmente el anotado); se copia
+            detections: Detections columnar del frame
+            timestamp: Instante del frame (None = ahora)
+
+        Returns:
+            accepted: False si el escritor iba retrasado y el frame se descartó
+        """
+        self.submitted += 1
+        rule = self.check_triggers(detections)
+        summary = None
+        if rule is not None:
+            summary = {"count": len(detections), "classes": detections.counts()}
+        item = (timestamp if timestamp is not None else time.monotonic(), frame.copy(), rule, summary)
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _writer_loop(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    self._close_event()
+                    return
+                continue
+            try:
+                self._process(*item)
+            except Exception as e:
+                print(f"[ERROR] Error grabando evento: {e}")
+                self._close_event()
+
+    def _process(self, timestamp, frame, rule, summary):
+        """Añade el frame al buffer previo o al clip en curso (hilo escritor)"""
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        if self.writer is None and rule is not None:
+            self._open_event(timestamp, frame, rule, summary)
+
+        if self.writer is not None:
+            if rule is not None:
+                # El evento sigue activo: alargar la grabación posterior
+                self.event_deadline = min(timestamp + self.post_event_s, self.event_start + self.max_event_s)
+            self.writer.write(frame)
+            self.frames_written += 1
+            if timestamp >= self.event_deadline:
+                self._close_event()
+            return
+
+        self._push_ring(timestamp, frame)
+
+    def _push_ring(self, timestamp, frame):
+        """Comprime el frame y descarta los más antiguos por tiempo y por memoria"""
+        success, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not success:
+            return
+        data = encoded.tobytes()
+        self.ring.append((timestamp, data))
+        self.ring_bytes += len(data)
+        while self.ring and (timestamp - self.ring[0][0] > self.pre_event_s
+                             or self.ring_bytes > self.max_buffer_bytes):
+            _, old = self.ring.popleft()
+            self.ring_bytes -= len(old)
+
+    def _estimate_fps(self):
+        """FPS real del buffer previo (los frames descartados no cuentan)"""
+        if len(self.ring) >= 2:
+            span = self.ring[-1][0] - self.ring[0][0]
+            if span > 0:
+                return (len(self.ring) - 1) / span
+        return self.default_fps
+
+    def _open_event(self, timestamp, frame, rule, summary):
+        """Crea el clip y vuelca en él el buffer previo"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Milisegundos y número de evento: dos eventos en el mismo segundo no se sobrescriben
+        wall_time = time.time()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(wall_time)) + f"_{int(wall_time * 1000) % 1000:03d}"
+        name = f"event_{stamp}_{self.events + 1:04d}_{rule.class_name.replace(' ', '_')}"
+        self.event_path = os.path.join(self.output_dir, name + self.extension)
+        height, width = frame.shape[:2]
+        fps = self._estimate_fps()
+        writer = cv2.VideoWriter(self.event_path, cv2.VideoWriter_fourcc(*self.codec), fps, (width, height))
+        if not writer.isOpened():
+            print(f"[ERROR] No se pudo crear el clip {self.event_path}")
+            self.ring.clear()
+            self.ring_bytes = 0
+            return
+
+        pre_frames = 0
+        for _, data in self.ring:
+            previous = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if previous is not None and previous.shape[:2] == (height, width):
+                writer.write(previous)
+                pre_frames += 1
+        self.ring.clear()
+        self.ring_bytes = 0
+
+        self.writer = writer
+        self.event_start = timestamp
+        self.event_deadline = timestamp + self.post_event_s
+        self.event_info = {
+            "trigger": rule.describe(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "fps": fps,
+            "pre_event_frames": pre_frames,
+            "detections": summary
+        }
+        self.frames_written += pre_frames
+        self.events += 1
+        print(f"[INFO] Evento ({rule.describe()}): grabando {self.event_path}")
+
+    def _close_event(self):
+        """Cierra el clip en curso y escribe sus metadatos"""
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        try:
+            with open(os.path.splitext(self.event_path)[0] + ".json", "w", encoding="utf-8") as f:
+                json.dump(self.event_info, f, indent=4, ensure_ascii=False)
+        except OSError as e:
+            print(f"[ERROR] Error guardando metadatos del evento: {e}")
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: Frames recibidos, descartados, eventos grabados y memoria del buffer previo
+        """
+        return {
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "events": self.events,
+            "frames_written": self.frames_written,
+            "buffer_frames": len(self.ring),
+            "buffer_mb": self.ring_bytes / (1024 * 1024),
+            "recording": self.writer is not None
+        }
+
+
+def create_recorder(config):
+    """
+    Crea y arranca el grabador de eventos si está activado
+
+    Args:
+        config: Configuración completa (sección recorder)
+
+    Returns:
+        recorder: EventRecorder arrancado o None
+    """
+    if not config.get("recorder", {}).get("enabled", False):
+        return None
+    recorder = EventRecorder(config)
+    recorder.start()
+    return recorder
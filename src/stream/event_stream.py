@@ -0,0 +1,402 @@
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import struct
+import threading
+import time
+import numpy as np
+
+# Formatos de mensaje
+BINARY = "binary"
+JSON = "json"
+FORMATS = (BINARY, JSON)
+
+# Políticas de cada suscriptor cuando su cola está llena
+DROP_OLDEST = "drop_oldest"   # Se descarta el mensaje más antiguo pendiente
+CONFLATE = "conflate"         # Solo se conserva el último mensaje (estado más reciente)
+POLICIES = (DROP_OLDEST, CONFLATE)
+
+# Tipos de mensaje binario
+MSG_NAMES = 1   # Tabla id de clase -> nombre (JSON), se envía al conectar
+MSG_FRAME = 2   # Detecciones de un frame
+
+PROTOCOL_VERSION = 1
+
+# Cabecera: tipo, versión, fuente, seq, timestamp de captura, timestamp de publicación, detecciones
+FRAME_HEADER = struct.Struct("<BBHQddH")
+NAMES_HEADER = struct.Struct("<BB")
+
+# Registro de una detección (22 bytes); distance NaN = sin distancia, track_id -1 = sin seguimiento
+RECORD_DTYPE = np.dtype([
+    ("class_id", "<u2"),
+    ("conf", "<f4"),
+    ("x", "<i2"),
+    ("y", "<i2"),
+    ("w", "<i2"),
+    ("h", "<i2"),
+    ("track_id", "<i4"),
+    ("distance", "<f4")
+])
+
+# Prefijo de longitud de cada mensaje en el stream TCP
+LENGTH_PREFIX = struct.Struct("<I")
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def encode_frame(detections, seq, capture_time, publish_time, source_id=0):
+    """
+    Codifica las detecciones de un frame en formato binario compacto
+
+    Args:
+        detections: Detections columnar
+        seq: Número de frame
+        capture_time: Instante de captura (epoch, segundos)
+        publish_time: Instante de publicación (epoch, segundos)
+        source_id: Identificador de la cámara
+
+    Returns:
+        message: Cabecera FRAME_HEADER seguida de N registros RECORD_DTYPE
+    """
+    count = len(detections)
+    records = np.empty(count, dtype=RECORD_DTYPE)
+    if count:
+        records["class_id"] = detections.class_id
+        records["conf"] = detections.conf
+        records["x"] = detections.x
+        records["y"] = detections.y
+        records["w"] = detections.w
+        records["h"] = detections.h
+        records["track_id"] = detections.track_id if detections.track_id is not None else -1
+        records["distance"] = detections.distance if detections.distance is not None else np.nan
+    header = FRAME_HEADER.pack(MSG_FRAME, PROTOCOL_VERSION, source_id, seq, capture_time, publish_time, count)
+    return header + records.tobytes()
+
+
+def encode_names(names):
+    """Mensaje binario con la tabla de nombres de clase"""
+    body = json.dumps({str(class_id): name for class_id, name in names.items()}).encode("utf-8")
+    return NAMES_HEADER.pack(MSG_NAMES, PROTOCOL_VERSION) + body
+
+
+def encode_json(detections, seq, capture_time, publish_time, source_id=0):
+    """
+    Codifica las detecciones de un frame en JSON (más legible, más grande)
+
+    Returns:
+        message: Bytes UTF-8 con un objeto JSON
+    """
+    names = detections.names
+    track_ids = detections.track_id.tolist() if detections.track_id is not None else [None] * len(detections)
+    distances = detections.distance.tolist() if detections.distance is not None else [None] * len(detections)
+    objects = []
+    for class_id, conf, x, y, w, h, track_id, distance in zip(
+            detections.class_id.tolist(), detections.conf.tolist(), detections.x.tolist(),
+            detections.y.tolist(), detections.w.tolist(), detections.h.tolist(), track_ids, distances):
+        objects.append({
+            "class": names.get(class_id, str(class_id)),
+            "confidence": round(conf, 4),
+            "box": [x, y, w, h],
+            "track_id": track_id,
+            "distance": None if distance is None or distance != distance else round(distance, 1)
+        })
+    return json.dumps({
+        "source": source_id,
+        "seq": seq,
+        "capture_time": capture_time,
+        "publish_time": publish_time,
+        "detections": objects
+    }).encode("utf-8")
+
+
+def decode_message(message):
+    """
+    Decodifica un mensaje binario (para consumidores en Python)
+
+    Args:
+        message: Bytes de un mensaje (sin prefijo de longitud ni trama WebSocket)
+
+    Returns:
+        decoded: Diccionario con "type" y sus campos; las detecciones son un array RECORD_DTYPE
+    """
+    if message[0] == MSG_NAMES:
+        names = json.loads(message[NAMES_HEADER.size:].decode("utf-8"))
+        return {"type": "names", "names": {int(k): v for k, v in names.items()}}
+    _, _, source_id, seq, capture_time, publish_time, count = FRAME_HEADER.unpack_from(message)
+    records = np.frombuffer(message, dtype=RECORD_DTYPE, count=count, offset=FRAME_HEADER.size)
+    return {
+        "type": "frame",
+        "source": source_id,
+        "seq": seq,
+        "capture_time": capture_time,
+        "publish_time": publish_time,
+        "detections": records
+    }
+
+
+def websocket_frame(payload, binary=True):
+    """Trama WebSocket de servidor (sin máscara, sin fragmentar)"""
+    opcode = 0x2 if binary else 0x1
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class Subscriber:
+    """Conexión de un consumidor con su propia cola acotada (solo se usa en el bucle asyncio)"""
+
+    def __init__(self, writer, framing, queue_size, policy):
+        """
+        Args:
+            writer: asyncio.StreamWriter de la conexión
+            framing: Función que convierte un mensaje en bytes para el transporte
+            queue_size: Mensajes pendientes como máximo
+            policy: DROP_OLDEST o CONFLATE
+        """
+        self.writer = writer
+        self.framing = framing
+        maxlen = 1 if policy == CONFLATE else queue_size
+        self.pending = collections.deque(maxlen=maxlen)
+        # Mensajes de control (tabla de nombres): nunca se descartan
+        self.control = collections.deque()
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, message, control=False):
+        """Encola un mensaje sin esperar nunca; si la cola está llena se pierde el más antiguo"""
+        if control:
+            self.control.append(message)
+        else:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(message)
+        self.ready.set()
+
+    def _next(self):
+        """Siguiente mensaje a enviar: primero los de control"""
+        return self.control.popleft() if self.control else self.pending.popleft()
+
+    async def run(self):
+        """Envía los mensajes pendientes; un consumidor lento solo se retrasa a sí mismo"""
+        try:
+            while not self.closed:
+                await self.ready.wait()
+                self.ready.clear()
+                while self.control or self.pending:
+                    self.writer.write(self.framing(self._next()))
+                    await self.writer.drain()
+                    self.sent += 1
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.closed = True
+            self.writer.close()
+
+
+class EventPublisher:
+    """Publica las detecciones de cada frame por TCP y WebSocket locales sin bloquear la inferencia"""
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Configuración completa (sección stream)
+        """
+        stream_config = config.get("stream", {})
+        self.host = stream_config.get("host", "127.0.0.1")
+        self.tcp_port = stream_config.get("tcp_port", 9200)
+        self.ws_port = stream_config.get("ws_port", 9201)
+        self.format = stream_config.get("format", BINARY)
+        self.queue_size = stream_config.get("queue_size", 8)
+        self.policy = stream_config.get("policy", DROP_OLDEST)
+        if self.format not in FORMATS:
+            raise ValueError(f"Formato de stream desconocido: {self.format}")
+        if self.policy not in POLICIES:
+            raise ValueError(f"Política de stream desconocida: {self.policy}")
+
+        self.names = {}
+        self.subscribers = []
+        self.published = 0
+        self.dropped_total = 0
+        self.sent_total = 0
+        self.loop = None
+        self.servers = []
+        self.thread = None
+        self.started = threading.Event()
+
+    def start(self):
+        """Arranca el bucle asyncio y los servidores en un hilo en segundo plano"""
+        self.thread = threading.Thread(target=self._run_loop, name="event-stream", daemon=True)
+        self.thread.start()
+        self.started.wait(timeout=5.0)
+
+    def stop(self):
+        """Cierra los servidores y las conexiones"""
+        if self.loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            future.result(timeout=2.0)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2.0)
+        self.loop = None
+
+    def publish(self, detections, seq, capture_timestamp, source_id=0):
+        """
+        Publica las detecciones de un frame (llamado desde el hilo de inferencia, no bloquea)
+
+        Args:
+            detections: Detections columnar con distancias ya calculadas
+            seq: Número de frame
+            capture_timestamp: Instante de captura en reloj monotónico
+            source_id: Identificador de la cámara
+        """
+        # Sin suscriptores no se codifica nada
+        if self.loop is None or not self.subscribers:
+            return
+        publish_time = time.time()
+        capture_time = publish_time - (time.monotonic() - capture_timestamp)
+        if detections.names is not self.names:
+            # Nombres nuevos (o primer frame): se reenvían a todos antes de las detecciones
+            self.names = detections.names
+            self.loop.call_soon_threadsafe(self._fanout, self._names_message(), True)
+        if self.format == BINARY:
+            message = encode_frame(detections, seq, capture_time, publish_time, source_id)
+        else:
+            message = encode_json(detections, seq, capture_time, publish_time, source_id)
+        self.published += 1
+        self.loop.call_soon_threadsafe(self._fanout, message)
+
+    def _fanout(self, message, control=False):
+        for subscriber in self.subscribers:
+            subscriber.offer(message, control)
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start_servers())
+        except OSError as e:
+            print(f"[WARNING] No se pudo abrir el stream de eventos: {e}")
+            self.loop.close()
+            self.loop = None
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _start_servers(self):
+        if self.tcp_port:
+            server = await asyncio.start_server(self._handle_tcp, self.host, self.tcp_port)
+            self.tcp_port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+            print(f"[INFO] Stream de detecciones (TCP) en {self.host}:{self.tcp_port}")
+        if self.ws_port:
+            server = await asyncio.start_server(self._handle_websocket, self.host, self.ws_port)
+            self.ws_port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+            print(f"[INFO] Stream de detecciones (WebSocket) en ws://{self.host}:{self.ws_port}")
+
+    async def _shutdown(self):
+        for server in self.servers:
+            server.close()
+        for subscriber in list(self.subscribers):
+            subscriber.closed = True
+            subscriber.ready.set()
+        self.servers = []
+
+    def _names_message(self):
+        if self.format == BINARY:
+            return encode_names(self.names)
+        return json.dumps({"names": {str(k): v for k, v in self.names.items()}}).encode("utf-8")
+
+    async def _serve(self, reader, writer, framing):
+        """Registra el suscriptor hasta que el cliente cierre la conexión"""
+        subscriber = Subscriber(writer, framing, self.queue_size, self.policy)
+        if self.names:
+            subscriber.offer(self._names_message(), control=True)
+        self.subscribers = self.subscribers + [subscriber]
+        sender = asyncio.ensure_future(subscriber.run())
+        try:
+            # Lo que envíe el cliente se ignora; EOF indica desconexión
+            while not subscriber.closed and await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            subscriber.closed = True
+            subscriber.ready.set()
+            self.subscribers = [s for s in self.subscribers if s is not subscriber]
+            self.dropped_total += subscriber.dropped
+            self.sent_total += subscriber.sent
+            await asyncio.gather(sender, return_exceptions=True)
+
+    async def _handle_tcp(self, reader, writer):
+        # Cada mensaje va precedido de su longitud (uint32 little-endian)
+        await self._serve(reader, writer, lambda message: LENGTH_PREFIX.pack(len(message)) + message)
+
+    async def _handle_websocket(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5.0)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        key = None
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip()
+        if key is None:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii")
+        )
+        binary = self.format == BINARY
+        await self._serve(reader, writer, lambda message: websocket_frame(message, binary))
+
+    def get_stats(self):
+        """
+        Returns:
+            stats: Mensajes publicados, suscriptores y mensajes descartados por colas llenas
+        """
+        subscribers = list(self.subscribers)
+        return {
+            "published": self.published,
+            "subscribers": len(subscribers),
+            "dropped": self.dropped_total + sum(s.dropped for s in subscribers),
+            "sent": self.sent_total + sum(s.sent for s in subscribers)
+        }
+
+
+def create_publisher(config):
+    """
+    Crea y arranca el publicador de detecciones si está activado
+
+    Args:
+        config: Configuración completa (sección stream)
+
+    Returns:
+        publisher: EventPublisher arrancado o None
+    """
+    if not config.get("stream", {}).get("enabled", False):
+        return None
+    publisher = EventPublisher(config)
+    publisher.start()
+    return publisher
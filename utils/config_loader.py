@@ -0,0 +1,450 @@
+import os
+import threading
+import yaml
+from dataclasses import dataclass
+from src.detector.smoothing import SMOOTHING_METHODS
+
+# Secciones obligatorias del archivo de configuración
+REQUIRED_SECTIONS = ("detector", "camera", "distance", "display", "object_sizes")
+
+# Parámetros que se pueden cambiar en caliente (sección -> claves)
+RUNTIME_KEYS = {
+    "detector": ("confidence", "iou_threshold", "max_det"),
+    "distance": ("max_distance", "min_size_px", "smoothing", "smooth_frames", "ema_alpha",
+                 "kalman_process_noise", "kalman_measurement_noise"),
+    "display": ("show_fps", "show_distance", "show_labels", "line_thickness", "font_scale",
+                "distance_colormap", "distance_unit", "text_bg_opacity", "draw_in_place",
+                "distance_label_step", "confidence_threshold_display", "show_debug_info")
+}
+
+# Valores admitidos de las opciones de visualización enumeradas
+DISTANCE_COLORMAPS = ("GREEN_TO_RED", "RED_TO_GREEN", "BLUE_TO_RED")
+DISTANCE_UNITS = ("cm", "m")
+
+# Configuración mínima que crea create_default_config (el resto usa valores por defecto)
+DEFAULT_CONFIG = {
+    "detector": {
+        "model": "yolov8n",
+        "confidence": 0.5,
+        "iou_threshold": 0.45,
+        "max_det": 100,
+        "backend": "ultralytics",
+        "tracking": True
+    },
+    "camera": {
+        "index": 0,
+        "width": 1280,
+        "height": 720,
+        "fps": 30,
+        "buffer_size": 3
+    },
+    "distance": {
+        "focal_length": 650,
+        "smooth_frames": 10,
+        "smoothing": "median",
+        "min_size_px": 20,
+        "max_distance": 500,
+        "calibration_mode": False
+    },
+    "display": {
+        "show_fps": True,
+        "show_distance": True,
+        "show_labels": True,
+        "line_thickness": 2,
+        "font_scale": 0.7,
+        "distance_colormap": "GREEN_TO_RED",
+        "distance_unit": "cm",
+        "text_bg_opacity": 0.7
+    },
+    "hot_reload": {
+        "enabled": True,
+        "interval_s": 1.0
+    },
+    "object_sizes": {
+        "person": {"width": 45, "height": 170, "reference": "height", "correction_factor": 0.85},
+        "bottle": {"width": 8, "height": 25, "reference": "height"},
+        "cell phone": {"width": 7.5, "height": 15, "reference": "height"}
+    }
+}
+
+
+class ConfigError(ValueError):
+    """Configuración inválida; el mensaje enumera todos los problemas encontrados"""
+
+
+@dataclass(frozen=True)
+class DetectorParams:
+    """Parámetros del detector modificables sin recargar el modelo"""
+    confidence: float
+    iou_threshold: float
+    max_det: int
+
+    @classmethod
+    def from_config(cls, config):
+        detector_config = config["detector"]
+        return cls(
+            confidence=float(detector_config["confidence"]),
+            iou_threshold=float(detector_config.get("iou_threshold", 0.45)),
+            max_det=int(detector_config.get("max_det", 100))
+        )
+
+
+@dataclass(frozen=True)
+class DistanceParams:
+    """Parámetros del cálculo y suavizado de distancias"""
+    max_distance: float
+    min_size_px: int
+    smoothing: str
+    smooth_frames: int
+    ema_alpha: float
+    process_noise: float
+    measurement_noise: float
+
+    @classmethod
+    def from_config(cls, config):
+        distance_config = config["distance"]
+        return cls(
+            max_distance=float(distance_config.get("max_distance", 500)),
+            min_size_px=int(distance_config.get("min_size_px", 20)),
+            smoothing=distance_config.get("smoothing", "median"),
+            smooth_frames=int(distance_config.get("smooth_frames", 10)),
+            ema_alpha=float(distance_config.get("ema_alpha", 0.3)),
+            process_noise=float(distance_config.get("kalman_process_noise", 4.0)),
+            measurement_noise=float(distance_config.get("kalman_measurement_noise", 100.0))
+        )
+
+
+@dataclass(frozen=True)
+class DisplayParams:
+    """Opciones de visualización leídas en cada frame"""
+    show_fps: bool
+    show_distance: bool
+    show_labels: bool
+    line_thickness: int
+    font_scale: float
+    distance_colormap: str
+    distance_unit: str
+    text_bg_opacity: float
+    draw_in_place: bool
+    distance_label_step: float
+    confidence_threshold_display: float
+    show_debug_info: bool
+
+    @classmethod
+    def from_config(cls, config):
+        display_config = config["display"]
+        return cls(
+            show_fps=bool(display_config.get("show_fps", True)),
+            show_distance=bool(display_config.get("show_distance", True)),
+            show_labels=bool(display_config.get("show_labels", True)),
+            line_thickness=int(display_config.get("line_thickness", 2)),
+            font_scale=float(display_config.get("font_scale", 0.7)),
+            distance_colormap=display_config.get("distance_colormap", "GREEN_TO_RED"),
+            distance_unit=display_config.get("distance_unit", "cm"),
+            text_bg_opacity=float(display_config.get("text_bg_opacity", 0.7)),
+            draw_in_place=bool(display_config.get("draw_in_place", False)),
+            distance_label_step=display_config.get("distance_label_step", 0),
+            confidence_threshold_display=float(display_config.get("confidence_threshold_display", 0.0)),
+            show_debug_info=bool(display_config.get("show_debug_info", False))
+        )
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Parámetros de ejecución compilados; se sustituyen enteros en cada recarga"""
+    detector: DetectorParams
+    distance: DistanceParams
+    display: DisplayParams
+    version: int = 0
+
+    @classmethod
+    def from_config(cls, config, version=0):
+        return cls(
+            detector=DetectorParams.from_config(config),
+            distance=DistanceParams.from_config(config),
+            display=DisplayParams.from_config(config),
+            version=version
+        )
+
+
+def _check_range(errors, section, key, value, low, high, low_inclusive=True):
+    """Añade un error si value no es un número dentro de [low, high]"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append(f"{section}.{key} debe ser un número (valor: {value!r})")
+        return
+    below = value < low if low_inclusive else value <= low
+    if below or value > high:
+        bracket = "[" if low_inclusive else "("
+        errors.append(f"{section}.{key} debe estar en {bracket}{low}, {high}] (valor: {value})")
+
+
+def _check_bool(errors, section, key, value):
+    """Añade un error si value no es un booleano"""
+    if not isinstance(value, bool):
+        errors.append(f"{section}.{key} debe ser true o false (valor: {value!r})")
+
+
+def _check_choice(errors, section, key, value, choices):
+    """Añade un error si value no es una de las opciones admitidas"""
+    if value not in choices:
+        errors.append(f"{section}.{key} debe ser uno de {choices} (valor: {value!r})")
+
+
+def validate_config(config):
+    """
+    Comprueba estructura, tipos y rangos de la configuración
+
+    Args:
+        config: Diccionario cargado del YAML
+
+    Returns:
+        errors: Lista de mensajes (vacía si la configuración es válida)
+    """
+    if not isinstance(config, dict):
+        return ["El archivo de configuración no contiene un diccionario"]
+    errors = [f"Falta la sección '{section}'" for section in REQUIRED_SECTIONS
+              if not isinstance(config.get(section), dict)]
+    if errors:
+        return errors
+
+    detector_config = config["detector"]
+    if not detector_config.get("model"):
+        errors.append("detector.model es obligatorio")
+    if "confidence" not in detector_config:
+        errors.append("detector.confidence es obligatorio")
+    else:
+        _check_range(errors, "detector", "confidence", detector_config["confidence"], 0.0, 1.0)
+    _check_range(errors, "detector", "iou_threshold", detector_config.get("iou_threshold", 0.45), 0.0, 1.0, False)
+    _check_range(errors, "detector", "max_det", detector_config.get("max_det", 100), 1, 10000)
+
+    camera_config = config["camera"]
+    for key in ("width", "height"):
+        if key not in camera_config:
+            errors.append(f"camera.{key} es obligatorio")
+        else:
+            _check_range(errors, "camera", key, camera_config[key], 1, 16384)
+
+    distance_config = config["distance"]
+    for key in ("focal_length", "smooth_frames"):
+        if key not in distance_config:
+            errors.append(f"distance.{key} es obligatorio")
+    _check_range(errors, "distance", "focal_length", distance_config.get("focal_length", 1), 0, 100000, False)
+    _check_range(errors, "distance", "smooth_frames", distance_config.get("smooth_frames", 1), 1, 1000)
+    _check_range(errors, "distance", "max_distance", distance_config.get("max_distance", 500), 0, 1e6, False)
+    _check_range(errors, "distance", "min_size_px", distance_config.get("min_size_px", 20), 0, 16384)
+    _check_range(errors, "distance", "ema_alpha", distance_config.get("ema_alpha", 0.3), 0.0, 1.0, False)
+    _check_range(errors, "distance", "kalman_process_noise",
+                 distance_config.get("kalman_process_noise", 4.0), 0, 1e6, False)
+    _check_range(errors, "distance", "kalman_measurement_noise",
+                 distance_config.get("kalman_measurement_noise", 100.0), 0, 1e6, False)
+    _check_choice(errors, "distance", "smoothing", distance_config.get("smoothing", "median"), SMOOTHING_METHODS)
+
+    display_config = config["display"]
+    for key in ("show_fps", "show_distance", "show_labels", "draw_in_place", "show_debug_info"):
+        if key in display_config:
+            _check_bool(errors, "display", key, display_config[key])
+    _check_range(errors, "display", "line_thickness", display_config.get("line_thickness", 2), 1, 50)
+    _check_range(errors, "display", "font_scale", display_config.get("font_scale", 0.7), 0.0, 10.0, False)
+    _check_range(errors, "display", "text_bg_opacity", display_config.get("text_bg_opacity", 0.7), 0.0, 1.0)
+    _check_range(errors, "display", "distance_label_step", display_config.get("distance_label_step", 0), 0, 1000)
+    _check_range(errors, "display", "confidence_threshold_display",
+                 display_config.get("confidence_threshold_display", 0.0), 0.0, 1.0)
+    _check_choice(errors, "display", "distance_colormap",
+                  display_config.get("distance_colormap", "GREEN_TO_RED"), DISTANCE_COLORMAPS)
+    _check_choice(errors, "display", "distance_unit", display_config.get("distance_unit", "cm"), DISTANCE_UNITS)
+
+    for class_name, obj_info in config["object_sizes"].items():
+        if not isinstance(obj_info, dict):
+            errors.append(f"object_sizes.{class_name} debe ser un diccionario")
+            continue
+        for key in ("width", "height"):
+            if key not in obj_info:
+                errors.append(f"object_sizes.{class_name}.{key} es obligatorio")
+            else:
+                _check_range(errors, f"object_sizes.{class_name}", key, obj_info[key], 0, 1e5, False)
+        if obj_info.get("reference", "width") not in ("width", "height"):
+            errors.append(f"object_sizes.{class_name}.reference debe ser width o height")
+    return errors
+
+
+class ConfigLoader:
+    """Carga, valida y compila la configuración YAML"""
+
+    @staticmethod
+    def load_config(path):
+        """
+        Carga y valida el archivo de configuración
+
+        Args:
+            path: Ruta del YAML
+
+        Returns:
+            config: Diccionario validado (configuración estructural de los componentes)
+
+        Raises:
+            ConfigError: Si la configuración no es válida
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        errors = validate_config(config)
+        if errors:
+            raise ConfigError("Configuración inválida:\n  - " + "\n  - ".join(errors))
+        return config
+
+    @staticmethod
+    def compile(config, version=0):
+        """
+        Compila los parámetros de ejecución en objetos inmutables de acceso por atributo
+
+        Args:
+            config: Diccionario validado
+            version: Número de recarga
+
+        Returns:
+            runtime: RuntimeConfig
+        """
+        return RuntimeConfig.from_config(config, version)
+
+    @staticmethod
+    def create_default_config(path):
+        """
+        Escribe una configuración por defecto
+
+        Args:
+            path: Ruta del YAML a crear
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(DEFAULT_CONFIG, f, sort_keys=False, allow_unicode=True)
+
+
+def runtime_subset(config):
+    """Valores de las claves recargables (para comparar con el resto de la configuración)"""
+    return {section: {key: config[section].get(key) for key in keys} for section, keys in RUNTIME_KEYS.items()}
+
+
+def structural_changes(old, new):
+    """
+    Secciones cuyo cambio no se puede aplicar en caliente
+
+    Returns:
+        sections: Lista de secciones (o section.key) que necesitan reiniciar
+    """
+    changed = []
+    for section in sorted(set(old) | set(new)):
+        old_section = old.get(section)
+        new_section = new.get(section)
+        if old_section == new_section:
+            continue
+        runtime_keys = RUNTIME_KEYS.get(section)
+        if runtime_keys is None or not isinstance(old_section, dict) or not isinstance(new_section, dict):
+            changed.append(section)
+            continue
+        for key in sorted(set(old_section) | set(new_section)):
+            if key not in runtime_keys and old_section.get(key) != new_section.get(key):
+                changed.append(f"{section}.{key}")
+    return changed
+
+
+class ConfigWatcher:
+    """Recarga en caliente los parámetros de ejecución cuando cambia el archivo de configuración"""
+
+    def __init__(self, path, config, on_reload, interval=1.0):
+        """
+        Args:
+            path: Ruta del YAML vigilado
+            config: Configuración cargada al arrancar
+            on_reload: Función llamada con el nuevo RuntimeConfig
+            interval: Segundos entre comprobaciones
+        """
+        self.path = path
+        self.config = config
+        self.on_reload = on_reload
+        self.interval = interval
+        self.version = 0
+        self.file_stat = self._stat()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def start(self):
+        """Arranca el hilo de vigilancia"""
+        self.thread = threading.Thread(target=self._loop, name="config-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Detiene el hilo"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def check(self):
+        """
+        Recarga el archivo si cambió
+
+        Returns:
+            runtime: Nuevo RuntimeConfig aplicado o None
+        """
+        signature = self._stat()
+        if signature is None or signature == self.file_stat:
+            return None
+        self.file_stat = signature
+        try:
+            config = ConfigLoader.load_config(self.path)
+        except Exception as e:
+            # Se conserva la configuración vigente hasta que el archivo vuelva a ser válido
+            print(f"[WARNING] Configuración no recargada: {e}")
+            return None
+
+        ignored = structural_changes(self.config, config)
+        if ignored:
+            print(f"[WARNING] Cambios que requieren reiniciar (ignorados): {', '.join(ignored)}")
+        if runtime_subset(config) == runtime_subset(self.config):
+            return None
+
+        # Solo se adoptan las claves recargables; el resto sigue como al arrancar
+        merged = dict(self.config)
+        for section, keys in RUNTIME_KEYS.items():
+            merged[section] = dict(self.config[section])
+            for key in keys:
+                if key in config[section]:
+                    merged[section][key] = config[section][key]
+                else:
+                    merged[section].pop(key, None)
+        self.version += 1
+        runtime = ConfigLoader.compile(merged, self.version)
+        self.config = merged
+        self.on_reload(runtime)
+        print(f"[INFO] Configuración recargada (versión {self.version})")
+        return runtime
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[ERROR] Error recargando configuración: {e}")
+
+
+def create_config_watcher(path, config, on_reload):
+    """
+    Crea y arranca el vigilante de configuración si hot_reload está activado
+
+    Returns:
+        watcher: ConfigWatcher arrancado o None
+    """
+    reload_config = config.get("hot_reload", {})
+    if not reload_config.get("enabled", False):
+        return None
+    watcher = ConfigWatcher(path, config, on_reload, reload_config.get("interval_s", 1.0))
+    watcher.start()
+    return watcher
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+class LabelSprite:
+    """Etiqueta pre-renderizada: factor multiplicativo y término aditivo por píxel"""
+
+    __slots__ = ("offset_x", "offset_y", "factor", "additive", "nbytes")
+
+    def __init__(self, offset_x, offset_y, factor, additive):
+        """
+        Args:
+            offset_x, offset_y: Desplazamiento de la esquina del sprite respecto al origen del texto
+            factor: Array (h, w, 3) uint8 con 255 * (1 - opacidad_fondo) * (1 - cobertura_texto)
+            additive: Array (h, w, 3) uint8 con color * cobertura_texto
+        """
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.factor = factor
+        self.additive = additive
+        self.nbytes = factor.nbytes + additive.nbytes
+
+
+class LabelSpriteCache:
+    """
+    Caché LRU de etiquetas (texto + fondo + máscara alfa) ya rasterizadas y de sus medidas.
+
+    Solo compensa con textos que se repiten entre frames (franja de resumen, FPS): un texto
+    nuevo en cada frame cuesta más rasterizado que dibujado directamente.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_text_sizes=4096):
+        """
+        Inicializa la caché
+
+        Args:
+            max_bytes: Memoria máxima de los sprites almacenados
+            max_text_sizes: Número máximo de medidas de texto almacenadas
+        """
+        self.max_bytes = max_bytes
+        self.max_text_sizes = max_text_sizes
+        self.bytes = 0
+        self.sprites = OrderedDict()
+        # Medidas de texto: (texto, fuente, escala, grosor) -> ((ancho, alto), baseline)
+        self.sizes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def text_size(self, text, font_scale, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+        """
+        Medidas del texto como cv2.getTextSize, calculadas solo la primera vez
+
+        Args:
+            text: Texto de la etiqueta
+            font_scale: Escala de la fuente
+            thickness: Grosor del trazo
+            font: Fuente de OpenCV
+
+        Returns:
+            size: Tupla (ancho, alto) del texto
+            baseline: Línea base
+        """
+        key = (text, font, font_scale, thickness)
+        measured = self.sizes.get(key)
+        if measured is not None:
+            self.sizes.move_to_end(key)
+            return measured
+        measured = cv2.getTextSize(text, font, font_scale, thickness)
+        self.sizes[key] = measured
+        if len(self.sizes) > self.max_text_sizes:
+            self.sizes.popitem(last=False)
+        return measured
+
+    def get(self, text, color, font_scale, thickness, background, opacity):
+        """
+        Devuelve el sprite de una etiqueta, rasterizándolo solo la primera vez
+
+        Args:
+            text: Texto de la etiqueta
+            color: Color BGR del texto
+            font_scale: Escala de la fuente
+            thickness: Grosor del trazo
+            background: Rectángulo de fondo (x1, y1, x2, y2) relativo al origen del texto
+            opacity: Opacidad del fondo
+
+        Returns:
+            sprite: LabelSprite
+        """
+        key = (text, color, font_scale, thickness, background, opacity)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = self._render(text, color, font_scale, thickness, background, opacity)
+        if sprite.nbytes > self.max_bytes:
+            return sprite
+        self.sprites[key] = sprite
+        self.bytes += sprite.nbytes
+        # Expulsar por memoria: una franja a ancho completo pesa cientos de KB
+        while self.bytes > self.max_bytes:
+            _, old = self.sprites.popitem(last=False)
+            self.bytes -= old.nbytes
+            self.evictions += 1
+        return sprite
+
+    def clear(self):
+        """Vacía la caché"""
+        self.sprites.clear()
+        self.sizes.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        """
+        Devuelve estadísticas de uso
+
+        Returns:
+            stats: Diccionario con aciertos, fallos, expulsiones y tasa de acierto
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self.sprites),
+            "text_sizes": len(self.sizes),
+            "mb": self.bytes / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def _render(self, text, color, font_scale, thickness, background, opacity):
+        """Rasteriza texto y fondo en un sprite"""
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        (text_width, text_height), baseline = self.text_size(text, font_scale, thickness, font)
+
+        # Caja del sprite: unión del fondo y del texto (con margen por el grosor)
+        bg_x1, bg_y1, bg_x2, bg_y2 = background
+        x1 = min(bg_x1, -thickness)
+        y1 = min(bg_y1, -text_height - thickness)
+        x2 = max(bg_x2 + 1, text_width + thickness + 1)
+        y2 = max(bg_y2 + 1, baseline + thickness + 1)
+        width = x2 - x1
+        height = y2 - y1
+
+        # Cobertura del texto con antialiasing (0-1)
+        canvas = np.zeros((height, width), dtype=np.uint8)
+        cv2.putText(canvas, text, (-x1, -y1), font, font_scale, 255, thickness, cv2.LINE_AA)
+        coverage = canvas.astype(np.float32) / 255.0
+
+        # Opacidad del fondo dentro de su rectángulo (bordes incluidos)
+        background_alpha = np.zeros((height, width), dtype=np.float32)
+        background_alpha[bg_y1 - y1:bg_y2 - y1 + 1, bg_x1 - x1:bg_x2 - x1 + 1] = opacity
+
+        # Mezcla en enteros de 8 bits para usar las operaciones vectorizadas de OpenCV
+        factor = (1.0 - background_alpha) * (1.0 - coverage) * 255.0
+        factor = np.repeat(np.rint(factor).astype(np.uint8)[..., None], 3, axis=2)
+        additive = np.rint(coverage[..., None] * np.array(color, dtype=np.float32)).astype(np.uint8)
+        return LabelSprite(x1, y1, factor, additive)
+
+    @staticmethod
+    def blit(frame, sprite, origin):
+        """
+        Compone un sprite sobre el frame (solo en su región)
+
+        Args:
+            frame: Frame donde dibujar (se modifica en sitio)
+            sprite: LabelSprite
+            origin: Origen (x, y) del texto en el frame
+        """
+        frame_h, frame_w = frame.shape[:2]
+        height, width = sprite.factor.shape[:2]
+        x1 = origin[0] + sprite.offset_x
+        y1 = origin[1] + sprite.offset_y
+
+        # Recortar a los límites del frame
+        sx1 = max(0, -x1)
+        sy1 = max(0, -y1)
+        sx2 = min(width, frame_w - x1)
+        sy2 = min(height, frame_h - y1)
+        if sx1 >= sx2 or sy1 >= sy2:
+            return
+
+        roi = frame[y1 + sy1:y1 + sy2, x1 + sx1:x1 + sx2]
+        scaled = cv2.multiply(roi, sprite.factor[sy1:sy2, sx1:sx2], scale=1.0 / 255.0)
+        roi[...] = cv2.add(scaled, sprite.additive[sy1:sy2, sx1:sx2])
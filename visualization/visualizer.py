@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
 import time
+from visualization.label_cache import LabelSpriteCache
+from utils.config_loader import DisplayParams, DistanceParams
 
 class DetectionVisualizer:
     """Clase para visualizar detecciones y distancias"""
@@ -15,6 +17,10 @@ class DetectionVisualizer:
         self.config = config
         self.display_config = config["display"]
         
+        # Parámetros compilados leídos en cada frame (se sustituyen al recargar la configuración)
+        self.display = DisplayParams.from_config(config)
+        self.max_distance = DistanceParams.from_config(config).max_distance
+        
         # Inicializar contador FPS
         self.fps_start_time = time.time()
         self.fps_counter = 0
@@ -22,8 +28,23 @@ class DetectionVisualizer:
         
         # Paleta de colores consistente para clases
         self.color_palette = {}
+        
+        # Caché de etiquetas pre-renderizadas, acotada por memoria (0 = desactivada)
+        cache_mb = self.display_config.get("label_cache_mb", 16)
+        self.label_cache = LabelSpriteCache(int(cache_mb * 1024 * 1024)) if cache_mb > 0 else None
+        
+    
+    def apply_runtime(self, runtime):
+        """
+        Aplica parámetros recargados en caliente (sustitución atómica de referencias)
+        
+        Args:
+            runtime: RuntimeConfig compilado
+        """
+        self.display = runtime.display
+        self.max_distance = runtime.distance.max_distance
     
-    def visualize_detections(self, frame, detections, object_counts):
+    def visualize_detections(self, frame, detections, object_counts, in_place=None):
         """
         Visualiza detecciones en el frame
         
@@ -31,6 +52,8 @@ class DetectionVisualizer:
             frame: Frame original
             detections: Lista de detecciones
             object_counts: Conteo de objetos por clase
+            in_place: Dibujar directamente sobre frame sin copiarlo
+                      (None = usar display.draw_in_place)
             
         Returns:
             frame_viz: Frame con visualizaciones
@@ -38,8 +61,16 @@ class DetectionVisualizer:
         # Actualizar FPS
         self._update_fps()
         
-        # Crear copia del frame para no modificar el original
-        frame_viz = frame.copy()
+        # Una sola lectura por frame: una recarga concurrente no mezcla parámetros
+        display = self.display
+        if in_place is None:
+            in_place = display.draw_in_place
+        
+        # Copiar el frame solo si el llamador necesita conservar el original
+        frame_viz = frame if in_place else frame.copy()
+        
+        # Etiquetas pendientes (texto + fondo semitransparente): se componen al final
+        labels = []
         
         # Mostrar cada detección
         for det in detections:
@@ -49,7 +80,7 @@ class DetectionVisualizer:
             distance = det["distance"]
             
             # Determinar color (basado en distancia si está disponible)
-            if distance is not None and self.display_config["show_distance"]:
+            if distance is not None and display.show_distance:
                 color = self._get_distance_color(distance)
                 
                 # Dibujar rectángulo
@@ -58,25 +89,25 @@ class DetectionVisualizer:
                     (x, y), 
                     (x + w, y + h), 
                     color, 
-                    self.display_config["line_thickness"]
+                    display.line_thickness
                 )
                 
                 # Mostrar etiqueta con distancia
-                if self.display_config["show_labels"]:
+                if display.show_labels:
+                    # Cuantizar para que las etiquetas se repitan entre frames
+                    if display.distance_label_step:
+                        distance = round(distance / display.distance_label_step) * display.distance_label_step
+                    
                     # Determinar unidad de distancia
-                    if self.display_config.get("distance_unit", "cm") == "m" and distance > 100:
+                    if display.distance_unit == "m" and distance > 100:
                         # Convertir a metros si es mayor a 1 metro y está configurado
                         label = f"{class_name}: {distance/100:.2f}m"
                     else:
                         label = f"{class_name}: {distance:.1f}cm"
                     
-                    # Dibujar fondo semi-transparente para texto
-                    self._draw_text_with_background(
-                        frame_viz, 
-                        label, 
-                        (x, y - 10), 
-                        color
-                    )
+                    # Fondo semi-transparente para texto (cambia casi cada frame: no se cachea,
+                    # incluso cuantizada la rasterización de los fallos cuesta más que dibujarla)
+                    self._add_label(labels, label, (x, y - 10), color)
             else:
                 # Color consistente para esta clase
                 color = self._get_class_color(class_name)
@@ -87,146 +118,178 @@ class DetectionVisualizer:
                     (x, y), 
                     (x + w, y + h), 
                     color, 
-                    self.display_config["line_thickness"]
+                    display.line_thickness
                 )
                 
                 # Mostrar etiqueta
-                if self.display_config["show_labels"]:
+                if display.show_labels:
                     label = f"{class_name}: {confidence:.2f}"
-                    self._draw_text_with_background(
-                        frame_viz, 
-                        label, 
-                        (x, y - 10), 
-                        color
-                    )
+                    self._add_label(labels, label, (x, y - 10), color)
         
         # Añadir información adicional al frame
-        self._add_info_overlay(frame_viz, object_counts)
+        self._add_info_overlay(frame_viz, object_counts, labels)
+        
+        # Componer todos los elementos translúcidos: los textos que cambian en cada frame
+        # por ROI y los que se repiten (franja de resumen, FPS) como sprites
+        if self.label_cache is not None:
+            self._composite(frame_viz, [label for label in labels if not label[7]])
+            self._blit_labels(frame_viz, [label for label in labels if label[7]])
+        else:
+            self._composite(frame_viz, labels)
         
         return frame_viz
     
-    def _draw_text_with_background(self, frame, text, position, color):
+    def _add_label(self, labels, text, position, color, cacheable=False):
         """
-        Dibuja texto con fondo semi-transparente para mejor legibilidad
+        Registra una etiqueta con fondo semi-transparente para mejor legibilidad
         
         Args:
-            frame: Frame donde dibujar
+            labels: Lista de etiquetas pendientes
             text: Texto a mostrar
             position: Posición (x, y) del texto
             color: Color del texto
+            cacheable: El texto se repite entre frames y conviene dibujarlo como sprite
         """
         font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale = self.display_config["font_scale"]
-        thickness = self.display_config["line_thickness"]
-        opacity = self.display_config.get("text_bg_opacity", 0.7)
+        display = self.display
+        font_scale = display.font_scale
+        thickness = display.line_thickness
+        opacity = display.text_bg_opacity
         
-        # Obtener tamaño del texto
-        (text_width, text_height), baseline = cv2.getTextSize(
-            text, font, font_scale, thickness
-        )
+        # Obtener tamaño del texto (medido una sola vez por texto si hay caché)
+        (text_width, text_height), baseline = self._text_size(text, font, font_scale, thickness)
         
-        # Coordenadas del rectángulo de fondo
-        x, y = position
-        bg_rect = (
-            x, y - text_height - baseline,
-            x + text_width + 10, y + baseline
-        )
+        # Texto con padding y rectángulo de fondo relativo al origen del texto
+        labels.append((
+            text, (position[0] + 5, position[1] - 5), font_scale, color, thickness,
+            (-5, 5 - text_height - baseline, text_width + 5, 5 + baseline),
+            opacity,
+            cacheable
+        ))
+    
+    def _text_size(self, text, font, font_scale, thickness):
+        """
+        Medidas del texto (desde la caché de etiquetas si está activa)
         
-        # Crear capa de fondo semi-transparente
-        overlay = frame.copy()
-        cv2.rectangle(
-            overlay, 
-            (bg_rect[0], bg_rect[1]), 
-            (bg_rect[2], bg_rect[3]), 
-            (0, 0, 0), 
-            -1  # Relleno
-        )
+        Returns:
+            size: Tupla (ancho, alto) del texto
+            baseline: Línea base
+        """
+        if self.label_cache is not None:
+            return self.label_cache.text_size(text, font_scale, thickness, font)
+        return cv2.getTextSize(text, font, font_scale, thickness)
+    
+    def _blit_labels(self, frame, labels):
+        """
+        Dibuja cada etiqueta como un sprite cacheado (fondo y texto en una sola mezcla)
         
-        # Combinar con el frame original
-        cv2.addWeighted(overlay, opacity, frame, 1 - opacity, 0, frame)
+        Args:
+            frame: Frame donde dibujar (se modifica en sitio)
+            labels: Lista de etiquetas (texto, origen, escala, color, grosor, fondo, opacidad, cacheable)
+        """
+        cache = self.label_cache
+        for text, origin, font_scale, color, thickness, background, opacity, _ in labels:
+            sprite = cache.get(text, color, font_scale, thickness, background, opacity)
+            cache.blit(frame, sprite, origin)
+    
+    def _composite(self, frame, labels):
+        """
+        Oscurece solo la región de cada fondo y dibuja después todos los textos
         
-        # Dibujar texto
-        cv2.putText(
-            frame,
-            text,
-            (x + 5, y - 5),  # Añadir padding
-            font,
-            font_scale,
-            color,
-            thickness,
-            cv2.LINE_AA
-        )
+        Args:
+            frame: Frame donde dibujar (se modifica en sitio)
+            labels: Lista de etiquetas (texto, origen, escala, color, grosor, fondo, opacidad, cacheable)
+        """
+        frame_h, frame_w = frame.shape[:2]
+        for _, (ox, oy), _, _, _, (x1, y1, x2, y2), opacity, _ in labels:
+            x1 += ox
+            y1 += oy
+            x2 += ox
+            y2 += oy
+            # Recortar al frame (los rectángulos incluyen su borde final)
+            x1 = max(x1, 0)
+            y1 = max(y1, 0)
+            x2 = min(x2 + 1, frame_w)
+            y2 = min(y2 + 1, frame_h)
+            if x1 >= x2 or y1 >= y2:
+                continue
+            # Mezclar con negro equivale a escalar la ROI por (1 - opacidad)
+            roi = frame[y1:y2, x1:x2]
+            roi[...] = cv2.convertScaleAbs(roi, alpha=1 - opacity)
+        
+        for text, origin, font_scale, color, thickness, _, _, _ in labels:
+            cv2.putText(
+                frame,
+                text,
+                origin,
+                cv2.FONT_HERSHEY_SIMPLEX,
+                font_scale,
+                color,
+                thickness,
+                cv2.LINE_AA
+            )
     
-    def _add_info_overlay(self, frame, object_counts):
+    def _add_info_overlay(self, frame, object_counts, labels):
         """
         Añade información general al frame (FPS, conteo de objetos)
         
         Args:
             frame: Frame donde añadir información
             object_counts: Conteo de objetos por clase
+            labels: Lista de etiquetas pendientes
         """
+        display = self.display
+        
         # Información de objetos detectados
         summary = ", ".join([f"{count} {obj}" for obj, count in object_counts.items()])
         summary_text = f"Objetos: {summary}"
         
-        # Añadir fondo semi-transparente en la parte superior
-        overlay = frame.copy()
-        cv2.rectangle(
-            overlay,
-            (0, 0),
-            (frame.shape[1], 40),
-            (0, 0, 0),
-            -1
-        )
-        
-        # Combinar con el frame original
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
-        
-        # Mostrar resumen de objetos
-        cv2.putText(
-            frame,
+        # Resumen de objetos sobre una franja semi-transparente en la parte superior
+        labels.append((
             summary_text,
             (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            self.display_config["font_scale"],
+            display.font_scale,
             (0, 0, 255),  # Rojo
-            self.display_config["line_thickness"],
-            cv2.LINE_AA
-        )
+            display.line_thickness,
+            (-10, -30, frame.shape[1] - 10, 10),
+            0.7,
+            True
+        ))
         
         # Mostrar FPS en la esquina inferior
-        if self.display_config["show_fps"]:
+        if display.show_fps:
             fps_text = f"FPS: {self.fps}"
             
             # Añadir fondo para FPS
-            text_size = cv2.getTextSize(
+            text_size = self._text_size(
                 fps_text, 
                 cv2.FONT_HERSHEY_SIMPLEX,
-                self.display_config["font_scale"],
-                self.display_config["line_thickness"]
+                display.font_scale,
+                display.line_thickness
             )[0]
             
-            overlay = frame.copy()
-            cv2.rectangle(
-                overlay,
-                (5, frame.shape[0] - 10 - text_size[1] - 10),
-                (15 + text_size[0], frame.shape[0] - 5),
-                (0, 0, 0),
-                -1
-            )
-            
-            cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
-            
-            cv2.putText(
-                frame,
+            labels.append((
                 fps_text,
                 (10, frame.shape[0] - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                self.display_config["font_scale"],
+                display.font_scale,
                 (0, 255, 255),  # Amarillo
-                self.display_config["line_thickness"],
-                cv2.LINE_AA
-            )
+                display.line_thickness,
+                (-5, -text_size[1] - 10, 5 + text_size[0], 5),
+                0.7,
+                True
+            ))
+    
+    def get_stats(self):
+        """
+        Devuelve estadísticas del visualizador
+        
+        Returns:
+            stats: Diccionario con FPS y estado de la caché de etiquetas
+        """
+        stats = {"fps": self.fps}
+        if self.label_cache is not None:
+            stats["label_cache"] = self.label_cache.get_stats()
+        return stats
     
     def _update_fps(self):
         """Actualiza el contador de FPS"""
@@ -247,10 +310,9 @@ class DetectionVisualizer:
             color: Tupla BGR para OpenCV
         """
         # Normalizar entre 0 y 1 (máximo configurado)
-        max_dist = self.config["distance"].get("max_distance", 500)
-        normalized = min(distance / max_dist, 1.0)
+        normalized = min(distance / self.max_distance, 1.0)
         
-        colormap = self.display_config["distance_colormap"]
+        colormap = self.display.distance_colormap
         
         if colormap == "GREEN_TO_RED":
             # Verde cercano a rojo lejano (formato BGR para OpenCV)
@@ -267,7 +329,7 @@ class DetectionVisualizer:
                 int(255 * (1 - normalized))     # R disminuye con distancia
             )
         else:
-            # Por defecto, azul a rojo
+            # BLUE_TO_RED: azul a rojo
             if normalized < 0.5:
                 # Azul a magenta
                 ratio = normalized * 2